@@ -0,0 +1,86 @@
+"""Micro-benchmark of decoding and dispatching messages received from Teams.
+
+Run with: python -m benchmarks.decode
+"""
+
+import asyncio
+import json
+import time
+
+from teams_connex.decoder import (
+    JSON_BACKEND,
+    MeetingUpdate,
+    MessageDispatcher,
+    Response,
+    TokenRefresh,
+    decode_messages,
+)
+
+FRAMES = {
+    "meeting_update": json.dumps(
+        {
+            "meetingUpdate": {
+                "meetingState": {
+                    "isMuted": False,
+                    "isVideoOn": True,
+                    "isHandRaised": False,
+                    "isInMeeting": True,
+                    "isRecordingOn": False,
+                    "isBackgroundBlurred": True,
+                    "isSharing": False,
+                    "hasUnreadMessages": False,
+                },
+                "meetingPermissions": {
+                    "canToggleMute": True,
+                    "canToggleVideo": True,
+                    "canToggleHand": True,
+                    "canToggleBlur": True,
+                    "canLeave": True,
+                    "canReact": True,
+                    "canToggleShareTray": True,
+                    "canToggleChat": True,
+                    "canStopSharing": False,
+                    "canPair": False,
+                },
+            }
+        }
+    ),
+    "token_refresh": '{"tokenRefresh":"1273d305-d1a5-4484-b623-a65467a72a50"}',
+    "response": '{"requestId":1,"response":"Success"}',
+}
+ITERATIONS = 100_000
+
+
+async def _ignore(message):
+    """Handle a message without doing anything."""
+
+
+async def _dispatch_all(dispatcher: MessageDispatcher, frame: str | bytes):
+    """Dispatch the same frame repeatedly."""
+    for _ in range(ITERATIONS):
+        await dispatcher.dispatch(frame)
+
+
+def main():
+    """Print decode and decode plus dispatch cost per frame."""
+    dispatcher = MessageDispatcher()
+    for message_type in (TokenRefresh, MeetingUpdate, Response):
+        dispatcher.register(message_type, _ignore)
+    print(f"JSON backend: {JSON_BACKEND}, {ITERATIONS} iterations")  # noqa: T201
+    for name, text in FRAMES.items():
+        for kind, frame in (("str", text), ("bytes", text.encode())):
+            started = time.perf_counter()
+            for _ in range(ITERATIONS):
+                decode_messages(frame)
+            decode = (time.perf_counter() - started) / ITERATIONS
+            started = time.perf_counter()
+            asyncio.run(_dispatch_all(dispatcher, frame))
+            dispatch = (time.perf_counter() - started) / ITERATIONS
+            print(  # noqa: T201
+                f"{name:>15} {kind:>5}: decode {decode * 1e6:6.2f} µs, "
+                f"decode+dispatch {dispatch * 1e6:6.2f} µs"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Local stand-ins for Microsoft Teams and Home Assistant."""
+
+import asyncio
+from collections.abc import Iterator
+import contextlib
+from http import HTTPStatus
+import itertools
+import json
+import random
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from websockets.asyncio.server import ServerConnection, serve
+
+from teams_connex.http_server import HttpRequest, HttpResponse, LocalHttpServer
+
+TOKEN = "benchmark-token"  # noqa: S105
+WEBHOOK_PATH = "/api/webhook/benchmark"
+
+
+def load_trace(path: str) -> list[tuple[float, str]]:
+    """Load a recorded trace of (delay in seconds, frame) from a JSON lines file."""
+    trace = []
+    with open(path) as stream:
+        for line in stream:
+            if line.strip():
+                record = json.loads(line)
+                trace.append((float(record["delay"]), json.dumps(record["message"])))
+    return trace
+
+
+def _pair_message(can_pair: bool) -> str:
+    """Return meeting update telling the client whether it may pair."""
+    return json.dumps({"meetingUpdate": {"meetingPermissions": {"canPair": can_pair}}})
+
+
+class FakeTeams:
+    """Websocket server speaking the Teams third-party device API."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        trace: list[tuple[float, str]],
+        frames: int,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        rate: float | None = None,
+        *,
+        hang: bool = False,
+        dismissed_pairings: int = 0,
+    ):
+        """Initialise fake Teams."""
+        self.trace: list[tuple[float, str]] = trace
+        self.frames: int = frames
+        self.host: str = host
+        self.port: int = port
+        # Frames per second, or None to replay with the recorded delays.
+        self.rate: float | None = rate
+        # Stop responding after the replay without closing the connection.
+        self.hang: bool = hang
+        # Pairing requests acknowledged, but dismissed by the user without a token.
+        self.dismissed_pairings: int = dismissed_pairings
+        self.pairing_requests: int = 0
+        self.connections: int = 0
+        self.frames_sent: int = 0
+        # Requests received from the client after pairing.
+        self.requests: list[dict] = []
+        self.started_at: float | None = None
+        self.done = asyncio.Event()
+        self._server = None
+
+    async def start(self):
+        """Start listening."""
+        self._server = await serve(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stop listening and disconnect all clients."""
+        if self._server is not None:
+            if self.hang:
+                # Hanging connections would not complete the closing handshake.
+                for connection in self._server.connections:
+                    connection.transport.abort()
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _schedule(self) -> Iterator[tuple[float, str]]:
+        """Return delays and frames to send, repeating the trace as required."""
+        frames = itertools.islice(itertools.cycle(self.trace), self.frames)
+        if self.rate:
+            return ((1 / self.rate, frame) for _, frame in frames)
+        return iter(frames)
+
+    async def _send(self, connection: ServerConnection, frame: str):
+        """Send a frame and count it."""
+        await connection.send(frame)
+        self.frames_sent += 1
+
+    async def _pair(self, connection: ServerConnection):
+        """Let the client pair and issue a token."""
+        await self._send(connection, _pair_message(True))
+        async for message in connection:
+            request = json.loads(message)
+            if request.get("action") == "pair":
+                self.pairing_requests += 1
+                await self._send(
+                    connection,
+                    json.dumps(
+                        {"requestId": request["requestId"], "response": "Success"}
+                    ),
+                )
+                if self.pairing_requests <= self.dismissed_pairings:
+                    continue
+                await self._send(connection, json.dumps({"tokenRefresh": TOKEN}))
+                return
+
+    async def _handle(self, connection: ServerConnection):
+        """Pair if necessary, then replay the trace."""
+        self.connections += 1
+        query = parse_qs(urlsplit(connection.request.path).query)
+        if query.get("token") != [TOKEN]:
+            await self._pair(connection)
+        await self._send(connection, _pair_message(False))
+        # Answer requests the client sends while the trace is replayed.
+        reader = asyncio.create_task(self._answer(connection))
+        self.started_at = time.monotonic()
+        due = self.started_at
+        try:
+            for delay, frame in self._schedule():
+                # Sleep until the frame is due, without accumulating drift.
+                due += delay
+                await asyncio.sleep(max(0.0, due - time.monotonic()))
+                await self._send(connection, frame)
+        finally:
+            self.done.set()
+        if self.hang:
+            reader.cancel()
+            # Pings are not answered anymore either.
+            connection.transport.pause_reading()
+        try:
+            await connection.wait_closed()
+        finally:
+            reader.cancel()
+
+    async def _answer(self, connection: ServerConnection):
+        """Record requests from the client and report success."""
+        with contextlib.suppress(Exception):
+            async for message in connection:
+                request = json.loads(message)
+                self.requests.append(request)
+                await connection.send(
+                    json.dumps(
+                        {"requestId": request["requestId"], "response": "Success"}
+                    )
+                )
+
+
+class FakeHomeAssistant:
+    """Webhook endpoint with injectable latency and failures."""
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0):
+        """Initialise fake Home Assistant."""
+        self.latency: float = latency
+        self.failure_rate: float = failure_rate
+        self.received: list[tuple[float, dict]] = []
+        self.failed: int = 0
+        self._server = LocalHttpServer()
+        self._server.route("PUT", WEBHOOK_PATH, self._webhook)
+
+    @property
+    def uri(self) -> str:
+        """Return the webhook URI."""
+        return f"http://{self._server.host}:{self._server.bound_port}{WEBHOOK_PATH}"
+
+    async def start(self):
+        """Start listening."""
+        await self._server.start()
+
+    async def close(self):
+        """Stop listening."""
+        await self._server.close()
+
+    async def _webhook(self, request: HttpRequest) -> HttpResponse:
+        """Accept a meeting update, or fail at the configured rate."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if random.random() < self.failure_rate:  # noqa: S311
+            self.failed += 1
+            return HttpResponse(HTTPStatus.INTERNAL_SERVER_ERROR)
+        self.received.append((time.monotonic(), json.loads(request.body)))
+        return HttpResponse()
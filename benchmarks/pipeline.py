@@ -0,0 +1,173 @@
+"""End-to-end benchmark of the pipeline against fake Teams and Home Assistant.
+
+Runs headless on any platform, the status bar app is not involved.
+
+Run with: python -m benchmarks.pipeline --frames 10000 --rate 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from ruamel.yaml import YAML
+
+from benchmarks.fakes import FakeHomeAssistant, FakeTeams, load_trace
+from teams_connex.configuration import ConfigurationStore
+from teams_connex.consts import (
+    CONFIGURATION_COALESCE_MAX_DELAY,
+    CONFIGURATION_COALESCE_QUIET_WINDOW,
+    CONFIGURATION_FILE_NAME,
+    CONFIGURATION_SETTINGS,
+    CONFIGURATION_WEBHOOK_URI,
+    WEBHOOK_SINK_NAME,
+)
+from teams_connex.pipeline import Pipeline
+
+DEFAULT_TRACE = os.path.join(os.path.dirname(__file__), "traces", "meeting.jsonl")
+FRAMES_PER_REPORT = 10_000
+DRAIN_TIMEOUT_IN_SECONDS = 30.0
+
+
+class PipelineThread(threading.Thread):
+    """Run the pipeline on its own event loop, just like the status bar app does."""
+
+    def __init__(self, pipeline: Pipeline):
+        """Initialise pipeline thread."""
+        super().__init__(daemon=True)
+        self.pipeline: Pipeline = pipeline
+        self.loop = asyncio.new_event_loop()
+        self.cpu_time: float = 0.0
+        self._task: asyncio.Task | None = None
+        self._started_cpu_time: float = 0.0
+
+    def run(self):
+        """Run the pipeline until it is stopped."""
+        asyncio.set_event_loop(self.loop)
+        self._started_cpu_time = time.thread_time()
+        self._task = self.loop.create_task(self.pipeline.run())
+        try:
+            self.loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.close()
+
+    async def _drain(self, frames: int):
+        """Wait until all frames were received and delivered, then stop."""
+        # Returns the existing counter, the help text is only used on registration.
+        received = self.pipeline.metrics.counter("frames_received_total", "")
+        async with asyncio.timeout(DRAIN_TIMEOUT_IN_SECONDS):
+            while received.value < frames:
+                await asyncio.sleep(0.01)
+            await self.pipeline.drain()
+        self.cpu_time = time.thread_time() - self._started_cpu_time
+        self._task.cancel()
+
+    def drain(self, frames: int):
+        """Stop the pipeline once it has processed the number of frames."""
+        asyncio.run_coroutine_threadsafe(self._drain(frames), self.loop).result()
+
+
+def _write_configuration(directory: str, webhook_uri: str, args) -> str:
+    """Write a configuration file for the benchmark and return its path."""
+    path = os.path.join(directory, CONFIGURATION_FILE_NAME)
+    settings = {CONFIGURATION_WEBHOOK_URI: webhook_uri}
+    if args.quiet_window is not None:
+        settings[CONFIGURATION_COALESCE_QUIET_WINDOW] = args.quiet_window
+        settings[CONFIGURATION_COALESCE_MAX_DELAY] = max(
+            args.quiet_window, args.max_delay
+        )
+    with open(path, "w") as stream:
+        YAML(typ="safe").dump({CONFIGURATION_SETTINGS: settings}, stream)
+    return path
+
+
+def _max_rss_in_kib() -> float:
+    """Return peak resident set size of the process in KiB."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in KiB on Linux.
+    return max_rss / 1024 if sys.platform == "darwin" else max_rss
+
+
+async def run_benchmark(args) -> dict:
+    """Replay the trace through the pipeline and return the results."""
+    home_assistant = FakeHomeAssistant(args.ha_latency, args.ha_failure_rate)
+    await home_assistant.start()
+    teams = FakeTeams(
+        load_trace(args.trace), args.frames, port=args.port, rate=args.rate
+    )
+    await teams.start()
+    with tempfile.TemporaryDirectory() as directory:
+        configuration_file = _write_configuration(directory, home_assistant.uri, args)
+        pipeline = Pipeline(
+            ConfigurationStore(configuration_file), host=teams.host, port=teams.port
+        )
+        if args.trace_memory:
+            tracemalloc.start()
+        max_rss = _max_rss_in_kib()
+        thread = PipelineThread(pipeline)
+        thread.start()
+        await teams.done.wait()
+        await asyncio.to_thread(thread.drain, teams.frames_sent)
+        elapsed = time.monotonic() - teams.started_at
+        await asyncio.to_thread(thread.join)
+        memory = {"max_rss_growth_kib": _max_rss_in_kib() - max_rss}
+        if args.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory = {
+                "traced_current_kib": current / 1024,
+                "traced_peak_kib": peak / 1024,
+            }
+    await teams.close()
+    await home_assistant.close()
+    metrics = pipeline.metrics.snapshot()
+    end_to_end = metrics[
+        f'teams_connex_end_to_end_seconds{{sink="{WEBHOOK_SINK_NAME}"}}'
+    ]
+    per_report = FRAMES_PER_REPORT / max(1, teams.frames_sent)
+    return {
+        "frames": teams.frames_sent,
+        "elapsed_seconds": round(elapsed, 3),
+        "frames_per_second": round(teams.frames_sent / elapsed, 1),
+        "webhook_requests": len(home_assistant.received),
+        "webhook_failures": home_assistant.failed,
+        "deduped": metrics["teams_connex_meeting_updates_deduped_total"],
+        # Upper bounds of the histogram buckets that contain the quantiles.
+        "end_to_end_p50_seconds": end_to_end["p50"],
+        "end_to_end_p99_seconds": end_to_end["p99"],
+        "pipeline_cpu_seconds_per_10k_frames": round(thread.cpu_time * per_report, 4),
+        **{
+            f"{key}_per_10k_frames": round(value * per_report, 1)
+            for key, value in memory.items()
+        },
+    }
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", default=DEFAULT_TRACE, help="recorded trace file")
+    parser.add_argument("--frames", type=int, default=FRAMES_PER_REPORT)
+    parser.add_argument(
+        "--rate", type=float, help="frames per second instead of recorded delays"
+    )
+    parser.add_argument("--port", type=int, default=0, help="fake Teams port")
+    parser.add_argument("--ha-latency", type=float, default=0.0)
+    parser.add_argument("--ha-failure-rate", type=float, default=0.0)
+    parser.add_argument("--quiet-window", type=float, help="coalescing quiet window")
+    parser.add_argument("--max-delay", type=float, default=0.0)
+    parser.add_argument("--trace-memory", action="store_true")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run_benchmark(args)), indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
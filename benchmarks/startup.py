@@ -0,0 +1,43 @@
+"""Startup benchmark based on the interpreter's -X importtime output.
+
+Run with: python -m benchmarks.startup [module]
+"""
+
+import subprocess
+import sys
+
+# Modules that must only be loaded once the user interface is showing.
+DEFERRED_MODULES = ("httpx", "websockets", "webbrowser")
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """Import the module in a fresh interpreter, return self and cumulative microseconds per module."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = (int(self_time), int(cumulative))
+    return times
+
+
+def main():
+    """Print the slowest imports of the module."""
+    module = sys.argv[1] if len(sys.argv) > 1 else "teams_connex.daemon"
+    times = import_times(module)
+    print(f"{module}: {times[module][1] / 1000:.1f} ms")  # noqa: T201
+    slowest = sorted(times.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (self_time, cumulative) in slowest[1:16]:
+        print(f"  {cumulative / 1000:7.1f} ms {self_time / 1000:7.1f} ms  {name}")  # noqa: T201
+    deferred = [name for name in DEFERRED_MODULES if name in times]
+    print(f"Deferred modules loaded at startup: {deferred or 'none'}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Micro-benchmark of rendering payloads with and without a template.
+
+Run with: python -m benchmarks.templates
+"""
+
+import json
+import time
+
+from benchmarks.decode import FRAMES
+from teams_connex.meeting import MeetingState
+from teams_connex.templates import compile_template
+
+TEMPLATES = {
+    "flat": {
+        "muted": "isMuted",
+        "video": "isVideoOn",
+        "inMeeting": "isInMeeting",
+        "busy": "isInMeeting and not isMuted",
+    },
+    "nested": {
+        "busy": "isInMeeting and not isMuted",
+        "presenting": "isSharing or isRecordingOn",
+        "state": {
+            "muted": "isMuted",
+            "video": "isVideoOn",
+            "hand": "isHandRaised",
+            "blurred": "isBackgroundBlurred",
+        },
+        "permissions": {
+            "mute": "canToggleMute",
+            "video": "canToggleVideo",
+            "leave": "canLeave",
+            "react": "canReact",
+        },
+        "free": "not (isInMeeting or isSharing) and not isVideoOn",
+    },
+}
+ITERATIONS = 100_000
+
+
+def _per_call(function, *args) -> float:
+    """Return seconds per call."""
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        function(*args)
+    return (time.perf_counter() - started) / ITERATIONS
+
+
+def main():
+    """Print render cost per meeting update."""
+    state = MeetingState.from_message(json.loads(FRAMES["meeting_update"]))
+    print(f"{ITERATIONS} iterations")  # noqa: T201
+    print(  # noqa: T201
+        f"{'teams message':>15}: {_per_call(state.to_message) * 1e6:6.2f} µs"
+    )
+    for name, template in TEMPLATES.items():
+        started = time.perf_counter()
+        compiled = compile_template(template)
+        compile_seconds = time.perf_counter() - started
+        print(  # noqa: T201
+            f"{name:>15}: {_per_call(compiled.render, state) * 1e6:6.2f} µs, "
+            f"compiled once in {compile_seconds * 1e6:.0f} µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
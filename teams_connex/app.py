@@ -3,46 +3,33 @@
 import asyncio
 import importlib.metadata
 import json
-from json import JSONDecodeError
 import logging
 import os
 import sys
 import threading
-import time
-import webbrowser
 
-from expiringdict import ExpiringDict
-import httpx
-import platformdirs
-from ruamel.yaml import YAML, YAMLError
 import rumps
-import websockets
 
 from teams_connex.autostart import Autostart
+from teams_connex.configuration import ConfigurationStore, default_configuration_file
 from teams_connex.consts import (
     APPLICATION_HOMEPAGE,
     APPLICATION_NAME,
-    CONFIGURATION_DEBUG_MODE,
-    CONFIGURATION_FILE_NAME,
-    CONFIGURATION_SETTINGS,
-    CONFIGURATION_TEAMS_TOKEN,
-    CONFIGURATION_WEBHOOK_URI,
-    MEETING_UPDATE_LAST_MESSAGE,
-    MEETING_UPDATE_SEND_BACKOFF_IN_SECONDS,
-    TEAMS_MESSAGE_MEETING_UPDATE,
-    TEAMS_MESSAGE_TOKEN_REFRESH,
+    UI_DEFERRED_START_DELAY_IN_SECONDS,
+    UI_STATUS_POLL_INTERVAL_IN_SECONDS,
     WEBHOOK_URI_SAMPLE,
-    WEBSOCKET_APPLICATION_NAME,
-    WEBSOCKET_APPLICATION_VERSION,
-    WEBSOCKET_HOSTNAME,
-    WEBSOCKET_MANUFACTURER,
-    WEBSOCKET_PAIRING_REQUEST_BACKOFF_IN_SECONDS,
-    WEBSOCKET_PORT,
-    WEBSOCKET_SLEEP_BEFORE_RECONNECT_IN_SECONDS,
 )
+from teams_connex.pipeline import Pipeline
+from teams_connex.status import ConnectionStatus
 
 _LOGGER = logging.getLogger(__name__)
 
+STATUSBAR_ICONS = {
+    ConnectionStatus.DISCONNECTED: "statusbar-grey.png",
+    ConnectionStatus.CONNECTED: "statusbar-blue.png",
+    ConnectionStatus.READY: "statusbar-green.png",
+}
+
 
 class TeamsConnex:
     """Teams Connex."""
@@ -50,143 +37,71 @@ class TeamsConnex:
     def __init__(self):
         """Initialise Teams Connex application."""
         self.app = rumps.App(APPLICATION_NAME)
-        self.configuration_file = os.path.join(
-            platformdirs.user_data_dir(appname=APPLICATION_NAME, ensure_exists=True),
-            CONFIGURATION_FILE_NAME,
+        self.configuration_file = default_configuration_file()
+        self.pipeline = Pipeline(ConfigurationStore(self.configuration_file))
+        # Resolve icon paths once, they are only applied on status transitions.
+        resources = os.path.abspath(
+            os.path.join(os.path.dirname(__file__), "../resources/")
         )
-        self._configuration: dict = {}
-        self.read_configuration()
-        self.update_log_level()
+        self._statusbar_icons = {
+            status: os.path.join(resources, icon)
+            for status, icon in STATUSBAR_ICONS.items()
+        }
+        self._statusbar_status: ConnectionStatus | None = None
         self.set_up_menu()
-        self._websocket_connected: bool = False
-        self._websocket_paired: bool = False
-        self._websocket_can_pair: bool = False
-        self._websocket_pairing_request_cache = ExpiringDict(
-            max_len=1, max_age_seconds=WEBSOCKET_PAIRING_REQUEST_BACKOFF_IN_SECONDS
-        )
-        self._meeting_update_cache = ExpiringDict(
-            max_len=1, max_age_seconds=MEETING_UPDATE_SEND_BACKOFF_IN_SECONDS
-        )
+        # Reconnect immediately when the Mac wakes up, Teams is likely to be back.
+        rumps.events.on_wake.register(self.pipeline.wake_threadsafe)
+        # Deliver pending meeting updates before quitting.
+        rumps.events.before_quit.register(self.pipeline.stop)
+        # Quitting exits the process, a debounced write would be lost.
+        rumps.events.before_quit.register(self.flush_configuration)
 
     @property
     def token(self) -> str:
         """Return token if known, otherwise an empty string."""
-        return (
-            self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_TEAMS_TOKEN]
-            if self._configuration
-            and CONFIGURATION_SETTINGS in self._configuration
-            and CONFIGURATION_TEAMS_TOKEN in self._configuration[CONFIGURATION_SETTINGS]
-            else ""
-        )
+        return self.pipeline.token
 
     @token.setter
     def token(self, new_token: str):
         """Set new token."""
-        if CONFIGURATION_SETTINGS not in self._configuration:
-            self._configuration[CONFIGURATION_SETTINGS] = {}
-        self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_TEAMS_TOKEN] = (
-            new_token
-        )
-        self.write_configuration()
+        self.pipeline.token = new_token
 
     @property
     def webhook_uri(self) -> str:
         """Return webhook uri if known, otherwise an empty string."""
-        return (
-            self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_WEBHOOK_URI]
-            if self._configuration
-            and CONFIGURATION_SETTINGS in self._configuration
-            and CONFIGURATION_WEBHOOK_URI in self._configuration[CONFIGURATION_SETTINGS]
-            else ""
-        )
+        return self.pipeline.webhook_uri
 
     @webhook_uri.setter
     def webhook_uri(self, new_webhook_uri: str):
         """Set new webhook uri."""
-        if new_webhook_uri and new_webhook_uri != WEBHOOK_URI_SAMPLE:
-            if CONFIGURATION_SETTINGS not in self._configuration:
-                self._configuration[CONFIGURATION_SETTINGS] = {}
-            self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_WEBHOOK_URI] = (
-                new_webhook_uri
-            )
-            self.write_configuration()
-            self.update_statusbar_icon()
-
-    @property
-    def websocket_connected(self) -> bool:
-        """Return if websocket is connected."""
-        return self._websocket_connected
-
-    @websocket_connected.setter
-    def websocket_connected(self, connected: bool):
-        """Set status if websocket is connected or not."""
-        self._websocket_connected = connected
-        self.update_statusbar_icon()
-
-    @property
-    def websocket_paired(self) -> bool:
-        """Return if websocket is paired."""
-        return self._websocket_paired
-
-    @websocket_paired.setter
-    def websocket_paired(self, paired: bool):
-        """Set status if websocket is paired or not."""
-        self._websocket_paired = paired
-        self.update_statusbar_icon()
-
-    def update_statusbar_icon(self):
-        """Update the icon in the status bar."""
-        if self.websocket_connected and self.websocket_paired and self.webhook_uri:
-            icon = "statusbar-green.png"
-        elif self.websocket_connected:
-            icon = "statusbar-blue.png"
-        else:
-            icon = "statusbar-grey.png"
-        try:
-            self.app.icon = os.path.abspath(
-                os.path.join(
-                    os.path.dirname(__file__),
-                    "../resources/",
-                    icon,
-                )
-            )
-        except OSError as error:
-            _LOGGER.warning("Unable to set application icon: %s", error)
+        self.pipeline.webhook_uri = new_webhook_uri
 
     @property
     def debug_mode(self) -> bool:
         """Return whether the application is running in debug mode or not."""
-        return (
-            self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_DEBUG_MODE]
-            if self._configuration
-            and CONFIGURATION_SETTINGS in self._configuration
-            and CONFIGURATION_DEBUG_MODE in self._configuration[CONFIGURATION_SETTINGS]
-            else False
-        )
+        return self.pipeline.debug_mode
 
     @debug_mode.setter
     def debug_mode(self, new_value: bool):
         """Set application's debug mode."""
-        if CONFIGURATION_SETTINGS not in self._configuration:
-            self._configuration[CONFIGURATION_SETTINGS] = {}
-        self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_DEBUG_MODE] = (
-            new_value
-        )
-        self.write_configuration()
-        self.update_log_level()
+        self.pipeline.debug_mode = new_value
 
-    @property
-    def websocket_pairing_request_pending(self) -> bool:
-        """Return if websocket pairing request is currently pending."""
-        return (
-            "pairing_request_pending" in self._websocket_pairing_request_cache
-            and self._websocket_pairing_request_cache["pairing_request_pending"]
-        )
+    def update_statusbar_icon(self, status: ConnectionStatus):
+        """Update the icon in the status bar, must run on the main thread."""
+        if status == self._statusbar_status:
+            return
+        try:
+            self.app.icon = self._statusbar_icons[status]
+        except OSError as error:
+            _LOGGER.warning("Unable to set application icon: %s", error)
+            return
+        self._statusbar_status = status
 
-    @websocket_pairing_request_pending.setter
-    def websocket_pairing_request_pending(self, pending: bool):
-        """Set if websocket pairing request is currently pending."""
-        self._websocket_pairing_request_cache["pairing_request_pending"] = pending
+    def apply_status(self, timer):
+        """Apply the latest status published by the pipeline, if it has changed."""
+        status = self.pipeline.status_channel.consume()
+        if status is not None:
+            self.update_statusbar_icon(status)
 
     @property
     def start_at_login(self) -> bool:
@@ -233,26 +148,20 @@ class TeamsConnex:
 
     def set_up_menu(self):
         """Set up system tray menu."""
-        try:
-            self.app.icon = os.path.abspath(
-                os.path.join(
-                    os.path.dirname(__file__), "../resources/statusbar-grey.png"
-                )
-            )
-        except OSError as error:
-            _LOGGER.warning("Unable to set application icon: %s", error)
-        start_at_login_menu_item = rumps.MenuItem(
+        self.update_statusbar_icon(ConnectionStatus.DISCONNECTED)
+        # State is looked up once the icon is showing, see start_deferred.
+        self._start_at_login_menu_item = rumps.MenuItem(
             title="Start at login", callback=self.toggle_start_at_login
         )
-        start_at_login_menu_item.state = self.start_at_login
         debug_mode_menu_item = rumps.MenuItem(
             title="Debug mode", callback=self.toggle_debug_mode
         )
         debug_mode_menu_item.state = self.debug_mode
         self.app.menu = [
             rumps.MenuItem(title="Settings...", callback=self.settings),
-            start_at_login_menu_item,
+            self._start_at_login_menu_item,
             debug_mode_menu_item,
+            rumps.MenuItem(title="Metrics...", callback=self.show_metrics),
             rumps.MenuItem(title="About...", callback=self.about),
             rumps.MenuItem(title="Help", callback=self.help),
         ]
@@ -282,6 +191,10 @@ class TeamsConnex:
         self.debug_mode = not sender.state
         sender.state = self.debug_mode
 
+    def show_metrics(self, sender):
+        """Show metrics snapshot."""
+        rumps.alert("Metrics", json.dumps(self.pipeline.metrics.snapshot(), indent=2))
+
     def about(self, sender):
         """Show about dialogue."""
         rumps.alert(
@@ -291,12 +204,9 @@ class TeamsConnex:
 
     def help(self, sender):
         """Open help."""
-        webbrowser.open(APPLICATION_HOMEPAGE, new=2)
+        import webbrowser  # noqa: PLC0415
 
-    def update_log_level(self):
-        """Change log level."""
-        root = logging.getLogger()
-        root.setLevel(logging.DEBUG if self.debug_mode else logging.INFO)
+        webbrowser.open(APPLICATION_HOMEPAGE, new=2)
 
     def start_updater_thread(self):
         """Start websocket updater thread."""
@@ -307,150 +217,36 @@ class TeamsConnex:
         """Start websocket thread."""
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        loop.run_until_complete(self.websocket_handler())
-
-    async def websocket_handler(self):
-        """Handle websocket messages."""
-        # Outer loop is ensuring that the application is reconnecting to Teams if the connection is completely lost.
-        while True:
-            uri = f"ws://{WEBSOCKET_HOSTNAME}:{WEBSOCKET_PORT}?token={self.token}&protocol-version=2.0.0&manufacturer={WEBSOCKET_MANUFACTURER}&device=Mac&app={WEBSOCKET_APPLICATION_NAME}&app-version={WEBSOCKET_APPLICATION_VERSION}"
-            try:
-                async with websockets.connect(uri) as websocket:
-                    _LOGGER.debug("Websocket connection opened: %s", uri)
-                    # Inner loop is ensuring that the websocket connection is opened once and kept open.
-                    self.websocket_connected = True
-                    try:
-                        while True:
-                            _LOGGER.debug(
-                                "Pairing request pending: %s",
-                                self.websocket_pairing_request_pending,
-                            )
-                            if (
-                                not self.token
-                                and self._websocket_can_pair
-                                and not self.websocket_pairing_request_pending
-                            ):
-                                _LOGGER.debug("Sending pairing request")
-                                self.websocket_pairing_request_pending = True
-                                await websocket.send(
-                                    '{"action":"pair","parameters":{},"requestId":1}'
-                                )
-                            # Reading messages from websocket.
-                            message: str | bytes = await websocket.recv()
-                            _LOGGER.debug("Received message: %s", message)
-                            await self.process_message(message)
-                    except websockets.exceptions.ConnectionClosedOK as exc:
-                        _LOGGER.debug("Websocket connection closed ok: %s", exc)
-                        self.websocket_pairing_request_pending = False
-                    except websockets.exceptions.ConnectionClosedError as exc:
-                        _LOGGER.debug("Websocket connection closed error: %s", exc)
-                        self.websocket_pairing_request_pending = False
-            except OSError as exc:  # noqa: PERF203
-                _LOGGER.debug("Websocket connection failed: %s", exc)
-                self.websocket_connected = False
-                self.websocket_pairing_request_pending = False
-                # Wait for 10 seconds before reconnecting.
-                time.sleep(WEBSOCKET_SLEEP_BEFORE_RECONNECT_IN_SECONDS)
-
-    async def process_message(self, message: str | bytes):
-        """Process an incoming message from Teams."""
-        if isinstance(message, str):
-            try:
-                decoded_message: dict = json.loads(message)
-                if TEAMS_MESSAGE_TOKEN_REFRESH in decoded_message:
-                    await self.process_token_refresh(
-                        decoded_message[TEAMS_MESSAGE_TOKEN_REFRESH]
-                    )
-                if TEAMS_MESSAGE_MEETING_UPDATE in decoded_message:
-                    await self.process_meeting_update(decoded_message)
-            except JSONDecodeError as exc:
-                _LOGGER.warning("Unable to decode message: %s", exc)
-
-    async def process_token_refresh(self, token: str):
-        """Process a token refresh message."""
-        # Example: {"tokenRefresh":"1273d305-d1a5-4484-b623-a65467a72a50"}
-        _LOGGER.info("Processing token refresh: %s", token)
-        self.token = token
-
-    async def process_meeting_update(self, meeting_update: dict):
-        """Process a meeting update message."""
-        # Example: {"meetingUpdate":{"meetingPermissions":{"canToggleMute":false,"canToggleVideo":false,"canToggleHand":false,"canToggleBlur":false,"canLeave":false,"canReact":false,"canToggleShareTray":false,"canToggleChat":false,"canStopSharing":false,"canPair":false}}}
-        # Example: {"meetingUpdate":{"meetingState":{"isMuted":false,"isVideoOn":false,"isHandRaised":false,"isInMeeting":false,"isRecordingOn":false,"isBackgroundBlurred":false,"isSharing":false,"hasUnreadMessages":false},"meetingPermissions":{"canToggleMute":false,"canToggleVideo":false,"canToggleHand":false,"canToggleBlur":false,"canLeave":false,"canReact":false,"canToggleShareTray":false,"canToggleChat":false,"canStopSharing":false,"canPair":false}}}
-        _LOGGER.info("Processing meeting update: %s", meeting_update)
-        # Check if re-pairing information is available.
-        if (
-            "meetingPermissions" in meeting_update["meetingUpdate"]
-            and "canPair" in meeting_update["meetingUpdate"]["meetingPermissions"]
-        ):
-            if bool(meeting_update["meetingUpdate"]["meetingPermissions"]["canPair"]):
-                self._websocket_can_pair = True
-                _LOGGER.info("Re-pairing required")
-                self.token = ""
-                self.websocket_paired = False
-            else:
-                self._websocket_can_pair = False
-                # Assume we are paired if the meeting permissions say that we can't pair AND we have a token.
-                self.websocket_paired = self.token
-        # Don't send the same message payload twice in a row within 30 seconds.
-        if (
-            MEETING_UPDATE_LAST_MESSAGE in self._meeting_update_cache
-            and self._meeting_update_cache[MEETING_UPDATE_LAST_MESSAGE]
-            == meeting_update
-        ):
-            _LOGGER.debug(
-                "Ignoring meeting update because it is the same information already sent within the last %s seconds",
-                MEETING_UPDATE_SEND_BACKOFF_IN_SECONDS,
-            )
-        elif self.webhook_uri:
-            # Home Assistant expects:
-            # * Method: PUT
-            # * Content-Type: application/json
-            # * JSON encoded payload
-            try:
-                with httpx.Client() as client:
-                    headers = {"Content-Type": "application/json"}
-                    response = client.put(
-                        self.webhook_uri, headers=headers, json=meeting_update
-                    )
-                    _LOGGER.debug("Webhook response: %s", response)
-                    # Update cache
-                    self._meeting_update_cache[MEETING_UPDATE_LAST_MESSAGE] = (
-                        meeting_update
-                    )
-            except httpx.RequestError as exc:
-                _LOGGER.error("Webhook error: %s", exc)
-        else:
-            _LOGGER.warning("Webhook URI is not set.")
-
-    def read_configuration(self):
-        """Read application configuration from file."""
         try:
-            if os.path.isfile(self.configuration_file):
-                with open(self.configuration_file) as stream:
-                    try:
-                        yaml = YAML(typ="safe")
-                        configuration = yaml.load(stream)
-                        self._configuration = configuration if configuration else {}
-                    except YAMLError as exc:
-                        _LOGGER.warning("Unable to read configuration: %s", exc)
-        except OSError as error:
-            _LOGGER.warning("Unable to read configuration from file: %s", error)
+            loop.run_until_complete(self.pipeline.run())
+        finally:
+            loop.close()
 
-    def write_configuration(self):
-        """Write configuration to file."""
-        try:
-            with open(self.configuration_file, mode="w") as stream:
-                yaml = YAML(typ="safe")
-                yaml.default_flow_style = False
-                yaml.dump(self._configuration, stream)
-        except OSError as error:
-            _LOGGER.warning("Unable to write configuration to file: %s", error)
+    def flush_configuration(self):
+        """Write pending configuration changes to file now."""
+        self.pipeline.flush_configuration()
 
     def start_system_tray_app(self):
         """Start system tray application."""
         self.app.run()
 
+    def start_deferred(self, timer):
+        """Start everything that is not needed to show the icon."""
+        timer.stop()
+        self._start_at_login_menu_item.state = self.start_at_login
+        self.start_updater_thread()
+
     def run(self):
         """Run application components."""
-        self.start_updater_thread()
+        # Show the icon first, the network stack is loaded in the background afterwards.
+        self._startup_timer = rumps.Timer(
+            self.start_deferred, UI_DEFERRED_START_DELAY_IN_SECONDS
+        )
+        self._startup_timer.start()
+        # Status transitions are published by the websocket thread and applied here,
+        # on the main thread, because AppKit must not be touched from other threads.
+        self._status_timer = rumps.Timer(
+            self.apply_status, UI_STATUS_POLL_INTERVAL_IN_SECONDS
+        )
+        self._status_timer.start()
         self.start_system_tray_app()
@@ -0,0 +1,152 @@
+"""Commands sent to Teams on behalf of Home Assistant."""
+
+from collections.abc import Awaitable, Callable
+from http import HTTPStatus
+import json
+import logging
+import time
+from typing import Any, Final
+
+from teams_connex.consts import (
+    COMMAND_REACTIONS,
+    COMMAND_TIMEOUT_IN_SECONDS,
+    TEAMS_MESSAGE_ACTION,
+    TEAMS_MESSAGE_PARAMETERS,
+    TEAMS_MESSAGE_REQUEST_ID,
+)
+from teams_connex.correlation import RequestTracker
+from teams_connex.decoder import Response
+from teams_connex.meeting import MeetingState
+from teams_connex.metrics import MetricsRegistry
+
+_LOGGER = logging.getLogger(__name__)
+
+# Command name to Teams action and the meeting permission it requires.
+COMMANDS: Final = {
+    "toggle-mute": ("toggle-mute", "canToggleMute"),
+    "toggle-video": ("toggle-video", "canToggleVideo"),
+    "raise-hand": ("toggle-hand", "canToggleHand"),
+    "toggle-background-blur": ("toggle-background-blur", "canToggleBlur"),
+    "leave-call": ("leave-call", "canLeave"),
+    "react": ("send-reaction", "canReact"),
+    "stop-sharing": ("stop-sharing", "canStopSharing"),
+}
+REACTION_COMMAND: Final = "react"
+
+
+class CommandError(Exception):
+    """Command could not be sent to Teams or Teams answered with an error."""
+
+    def __init__(self, message: str, status: HTTPStatus = HTTPStatus.BAD_GATEWAY):
+        """Initialise command error."""
+        super().__init__(message)
+        # Status reported to the caller of the control API.
+        self.status: HTTPStatus = status
+
+
+def build_command(
+    name: str, permissions: MeetingState, reaction: str | None = None
+) -> tuple[str, dict]:
+    """Return Teams action and parameters for the command, if it is permitted."""
+    if name not in COMMANDS:
+        raise CommandError(f"Unknown command: {name}", HTTPStatus.NOT_FOUND)
+    action, permission = COMMANDS[name]
+    if not permissions.get(permission):
+        raise CommandError(f"Command not permitted: {name}", HTTPStatus.CONFLICT)
+    parameters = {}
+    if name == REACTION_COMMAND:
+        if reaction not in COMMAND_REACTIONS:
+            raise CommandError(f"Unknown reaction: {reaction}", HTTPStatus.BAD_REQUEST)
+        parameters["type"] = reaction
+    return action, parameters
+
+
+class CommandChannel:
+    """Send requests over the websocket and match responses by request ID."""
+
+    def __init__(
+        self,
+        metrics: MetricsRegistry | None = None,
+        timeout: float = COMMAND_TIMEOUT_IN_SECONDS,
+        labels: dict | None = None,
+    ):
+        """Initialise command channel."""
+        self.timeout: float = timeout
+        self._metrics: MetricsRegistry = metrics or MetricsRegistry()
+        # Distinguishes the metrics of several Teams sessions.
+        self._labels: dict = labels or {}
+        self._send: Callable[[str], Awaitable[None]] | None = None
+        self._requests = RequestTracker(self._metrics, labels)
+
+    @property
+    def connected(self) -> bool:
+        """Return whether requests can be sent."""
+        return self._send is not None
+
+    def open(self, send: Callable[[str], Awaitable[None]]):
+        """Send requests with the function from now on."""
+        self._send = send
+
+    def close(self):
+        """Stop sending and fail all requests still waiting for a response."""
+        self._send = None
+        self._requests.fail_all(
+            CommandError("Connection to Teams lost", HTTPStatus.BAD_GATEWAY)
+        )
+
+    async def request(
+        self, action: str, parameters: dict | None = None, timeout: float | None = None
+    ) -> Any:
+        """Send a request to Teams and return its response."""
+        if self._send is None:
+            raise CommandError("Not connected to Teams", HTTPStatus.SERVICE_UNAVAILABLE)
+        timeout = self.timeout if timeout is None else timeout
+        request_id, future = self._requests.create(timeout)
+        started = time.monotonic()
+        message = json.dumps(
+            {
+                TEAMS_MESSAGE_ACTION: action,
+                TEAMS_MESSAGE_PARAMETERS: parameters or {},
+                TEAMS_MESSAGE_REQUEST_ID: request_id,
+            }
+        )
+        try:
+            try:
+                await self._send(message)
+            except Exception as exc:
+                # Connection closed while sending, the receive loop reconnects.
+                raise CommandError(f"Unable to send {action}: {exc}") from exc
+            response: Response = await future
+        except TimeoutError as exc:
+            self._failed(action)
+            raise CommandError(
+                f"No response to {action} within {timeout} seconds",
+                HTTPStatus.GATEWAY_TIMEOUT,
+            ) from exc
+        except CommandError:
+            self._failed(action)
+            raise
+        finally:
+            future.cancel()
+        self._metrics.histogram(
+            "command_seconds",
+            "Round trip time of commands sent to Teams",
+            {**self._labels, "action": action},
+        ).observe(time.monotonic() - started)
+        if response.error:
+            self._failed(action)
+            raise CommandError(f"Teams rejected {action}: {response.error}")
+        _LOGGER.debug("Response to %s: %s", action, response.response)
+        return response.response
+
+    def resolve(self, response: Response) -> bool:
+        """Complete the request the response belongs to, return whether it was pending."""
+        return self._requests.resolve(response)
+
+    def _failed(self, action: str):
+        """Count a failed command."""
+        self._metrics.counter(
+            "command_failures_total",
+            "Commands that failed or timed out",
+            {**self._labels, "action": action},
+        ).inc()
@@ -0,0 +1,134 @@
+"""Configuration storage."""
+
+import copy
+import io
+import logging
+import os
+import threading
+
+import platformdirs
+from ruamel.yaml import YAML, YAMLError
+
+from teams_connex.consts import (
+    APPLICATION_NAME,
+    CONFIGURATION_FILE_NAME,
+    CONFIGURATION_WRITE_DELAY_IN_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def default_configuration_file() -> str:
+    """Return path to the configuration file in the user's data directory."""
+    return os.path.join(
+        platformdirs.user_data_dir(appname=APPLICATION_NAME, ensure_exists=True),
+        CONFIGURATION_FILE_NAME,
+    )
+
+
+class ConfigurationStore:
+    """Keep configuration in memory and persist it atomically in the background."""
+
+    def __init__(
+        self, path: str, write_delay: float = CONFIGURATION_WRITE_DELAY_IN_SECONDS
+    ):
+        """Initialise configuration store."""
+        self.path: str = path
+        self.write_delay: float = write_delay
+        self._yaml = YAML(typ="safe")
+        # Separate instance for writing, so that reading never waits for a write.
+        self._dumper = YAML(typ="safe")
+        self._dumper.default_flow_style = False
+        # Only held briefly, saving must never wait for a write to disk.
+        self._lock = threading.Lock()
+        # Held while writing, so that writes happen in the order of their snapshots.
+        self._write_lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._pending: dict | None = None
+        self._written: str | None = None
+        # Identifies the file content last read or written by this store.
+        self._signature: tuple | None = None
+
+    def _stat_signature(self) -> tuple | None:
+        """Return a cheap signature of the file that changes whenever it is replaced or modified."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @property
+    def changed_on_disk(self) -> bool:
+        """Return if the file was changed by someone else since it was last read or written."""
+        return self._stat_signature() != self._signature
+
+    def read(self) -> dict:
+        """Read configuration from file, return an empty configuration if unavailable."""
+        self._signature = self._stat_signature()
+        try:
+            if os.path.isfile(self.path):
+                with open(self.path) as stream:
+                    try:
+                        with self._lock:
+                            configuration = self._yaml.load(stream)
+                    except YAMLError as exc:
+                        _LOGGER.warning("Unable to read configuration: %s", exc)
+                    else:
+                        return configuration if configuration else {}
+        except OSError as error:
+            _LOGGER.warning("Unable to read configuration from file: %s", error)
+        return {}
+
+    def save(self, configuration: dict):
+        """Schedule writing a snapshot of the configuration, later saves win."""
+        snapshot = copy.deepcopy(configuration)
+        with self._lock:
+            self._pending = snapshot
+            if self._timer:
+                self._timer.cancel()
+            # Not a daemon thread, so that a pending write completes before exit.
+            self._timer = threading.Timer(self.write_delay, self.flush)
+            self._timer.start()
+
+    def flush(self):
+        """Write pending configuration to file now."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer:
+                    self._timer.cancel()
+                    self._timer = None
+                configuration, self._pending = self._pending, None
+            if configuration is None:
+                return
+            stream = io.StringIO()
+            self._dumper.dump(configuration, stream)
+            content = stream.getvalue()
+            if content == self._written:
+                _LOGGER.debug("Configuration unchanged, not writing")
+                return
+            try:
+                self._write_atomically(content)
+                self._written = content
+            except OSError as error:
+                _LOGGER.warning("Unable to write configuration to file: %s", error)
+
+    def _write_atomically(self, content: str):
+        """Replace the configuration file so that it is never left truncated."""
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, mode="w") as stream:
+            stream.write(content)
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temporary_path, self.path)
+        self._signature = self._stat_signature()
+
+    def reload(self) -> dict | None:
+        """Return the re-read configuration if the file has changed, otherwise None."""
+        with self._write_lock, self._lock:
+            if self._pending is not None or not self.changed_on_disk:
+                # Own changes that have not been written yet take precedence.
+                return None
+            # The file no longer has the content that was last written.
+            self._written = None
+        _LOGGER.info("Configuration file changed, reloading")
+        return self.read()
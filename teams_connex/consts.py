@@ -5,27 +5,154 @@ from typing import Final
 APPLICATION_NAME: Final = "Teams Connex"
 APPLICATION_SHORTENED_NAME: Final = "TeamsConnex"
 APPLICATION_HOMEPAGE: Final = "https://neon.ninja/teams-connex/"
+UI_DEFERRED_START_DELAY_IN_SECONDS: Final = 0.1
+UI_STATUS_POLL_INTERVAL_IN_SECONDS: Final = 0.5
+
+LOG_FORMAT: Final = "%(asctime)s %(levelname)s:%(name)s:%(module)s:%(message)s"
+LOG_FILE_MAX_BYTES: Final = 5 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT: Final = 5
+LOG_FILE_ROTATION_INTERVAL_IN_SECONDS: Final = 24 * 60 * 60
+LOG_RATE_LIMIT_BURST: Final = 20
+LOG_RATE_LIMIT_PERIOD_IN_SECONDS: Final = 10.0
 
 CONFIGURATION_FILE_NAME: Final = "teams_connex.yaml"
+CONFIGURATION_WRITE_DELAY_IN_SECONDS: Final = 0.5
+CONFIGURATION_WATCH_INTERVAL_IN_SECONDS: Final = 2.0
 
 CONFIGURATION_SETTINGS: Final = "settings"
+CONFIGURATION_SINKS: Final = "sinks"
+CONFIGURATION_SESSIONS: Final = "sessions"
 CONFIGURATION_WEBHOOK_URI: Final = "webhook_uri"
 CONFIGURATION_TEAMS_TOKEN: Final = "teams_token"
+CONFIGURATION_TEAMS_TOKENS: Final = "teams_tokens"
 CONFIGURATION_DEBUG_MODE: Final = "debug_mode"
+CONFIGURATION_WEBHOOK_TIMEOUT: Final = "webhook_timeout"
+CONFIGURATION_OUTBOUND_QUEUE_SIZE: Final = "outbound_queue_size"
+CONFIGURATION_OUTBOUND_QUEUE_POLICY: Final = "outbound_queue_policy"
+CONFIGURATION_COALESCE_QUIET_WINDOW: Final = "coalesce_quiet_window"
+CONFIGURATION_COALESCE_MAX_DELAY: Final = "coalesce_max_delay"
+CONFIGURATION_WEBHOOK_SEND_DELTA: Final = "webhook_send_delta"
+CONFIGURATION_WEBHOOK_RETRY_ATTEMPTS: Final = "webhook_retry_attempts"
+CONFIGURATION_WEBHOOK_TEMPLATE: Final = "webhook_template"
+CONFIGURATION_WEBHOOK_RULES: Final = "webhook_rules"
+CONFIGURATION_METRICS_PORT: Final = "metrics_port"
+CONFIGURATION_CONTROL_PORT: Final = "control_port"
+CONFIGURATION_CONTROL_SOCKET: Final = "control_socket"
+CONFIGURATION_STATE_PORT: Final = "state_port"
+CONFIGURATION_STATE_SOCKET: Final = "state_socket"
+CONFIGURATION_WEBSOCKET_PING_INTERVAL: Final = "websocket_ping_interval"
+CONFIGURATION_WEBSOCKET_PING_TIMEOUT: Final = "websocket_ping_timeout"
+CONFIGURATION_WEBSOCKET_IDLE_TIMEOUT: Final = "websocket_idle_timeout"
+CONFIGURATION_HEARTBEAT_INTERVAL: Final = "heartbeat_interval"
+CONFIGURATION_HEALTH_PROBE_INTERVAL: Final = "health_probe_interval"
+CONFIGURATION_JOURNAL: Final = "journal"
+
+CONFIGURATION_SINK_NAME: Final = "name"
+CONFIGURATION_SINK_TYPE: Final = "type"
+CONFIGURATION_SINK_TIMEOUT: Final = "timeout"
+CONFIGURATION_SINK_RETRY_ATTEMPTS: Final = "retry_attempts"
+CONFIGURATION_SINK_SEND_DELTA: Final = "send_delta"
+CONFIGURATION_SINK_URI: Final = "uri"
+CONFIGURATION_SINK_HOST: Final = "host"
+CONFIGURATION_SINK_PORT: Final = "port"
+CONFIGURATION_SINK_TOPIC: Final = "topic"
+CONFIGURATION_SINK_USERNAME: Final = "username"
+CONFIGURATION_SINK_PASSWORD: Final = "password"
+CONFIGURATION_SINK_PATH: Final = "path"
+CONFIGURATION_SINK_TEMPLATE: Final = "template"
+CONFIGURATION_SINK_RULES: Final = "rules"
+
+CONFIGURATION_RULE_INCLUDE: Final = "include"
+CONFIGURATION_RULE_EXCLUDE: Final = "exclude"
+CONFIGURATION_RULE_RATE_LIMIT: Final = "rate_limit"
+CONFIGURATION_RULE_BURST: Final = "burst"
+CONFIGURATION_RULE_QUIET_HOURS: Final = "quiet_hours"
+
+CONFIGURATION_SESSION_NAME: Final = "name"
+CONFIGURATION_SESSION_HOST: Final = "host"
+CONFIGURATION_SESSION_PORT: Final = "port"
+CONFIGURATION_SESSION_SINKS: Final = "sinks"
+
+MEETING_UPDATE_COALESCE_QUIET_WINDOW_IN_SECONDS: Final = 0.05
+MEETING_UPDATE_COALESCE_MAX_DELAY_IN_SECONDS: Final = 0.25
+
+OUTBOUND_QUEUE_SIZE: Final = 16
+OUTBOUND_QUEUE_POLICY: Final = "coalesce"
+
+DELIVERY_RETRY_ATTEMPTS: Final = 3
+DELIVERY_RETRY_BASE_DELAY_IN_SECONDS: Final = 0.5
+DELIVERY_RETRY_MAX_DELAY_IN_SECONDS: Final = 10.0
+DELIVERY_CIRCUIT_BREAKER_THRESHOLD: Final = 3
+DELIVERY_CIRCUIT_BREAKER_RESET_IN_SECONDS: Final = 5.0
+DELIVERY_RECOVERY_INTERVAL_IN_SECONDS: Final = 1.0
+OUTBOX_FILE_NAME: Final = "outbox.sqlite3"
+DELIVERY_RATE_LIMIT_BURST: Final = 1
+SHUTDOWN_DRAIN_TIMEOUT_IN_SECONDS: Final = 5.0
+JOURNAL_DIRECTORY_NAME: Final = "journal"
+JOURNAL_SEGMENT_SUFFIX: Final = ".journal"
+JOURNAL_SEGMENT_MAX_RECORDS: Final = 65536
+JOURNAL_MAX_SEGMENTS: Final = 64
+HEARTBEAT_INTERVAL_IN_SECONDS: Final = 300.0
+HEALTH_PROBE_INTERVAL_IN_SECONDS: Final = 30.0
+HEARTBEAT_KEY: Final = "heartbeat"
+HEARTBEAT_VERSION: Final = "version"
+
+SINK_TIMEOUT_IN_SECONDS: Final = 5.0
+WEBHOOK_SINK_NAME: Final = "webhook"
+MQTT_DEFAULT_PORT: Final = 1883
+MQTT_DEFAULT_TOPIC: Final = "teams_connex/meeting"
 
-MEETING_UPDATE_LAST_MESSAGE: Final = "last_message"
-MEETING_UPDATE_SEND_BACKOFF_IN_SECONDS: Final = 30
+HTTP_SERVER_HOST: Final = "127.0.0.1"
+HTTP_SERVER_LOOPBACK_HOSTS: Final = ("127.0.0.1", "localhost", "::1")
+HTTP_SERVER_READ_TIMEOUT_IN_SECONDS: Final = 5.0
+HTTP_SERVER_MAX_BODY_SIZE: Final = 65536
+METRICS_PATH: Final = "/metrics"
+METRICS_CONTENT_TYPE: Final = (
+    "application/openmetrics-text; version=1.0.0; charset=utf-8"
+)
+COMMANDS_PATH: Final = "/commands"
+COMMAND_TIMEOUT_IN_SECONDS: Final = 5.0
+COMMAND_SESSION_PARAMETER: Final = "session"
+COMMAND_REACTIONS: Final = ("applause", "laugh", "like", "love", "wow")
+STATE_PATH: Final = "/state"
+STATE_EVENTS_PATH: Final = "/events"
+STATE_EVENT_NAME: Final = "meetingUpdate"
+STATE_VERSION_KEY: Final = "version"
+STATE_VERSION_PARAMETER: Final = "version"
+STATE_LONG_POLL_TIMEOUT_IN_SECONDS: Final = 30.0
+STATE_EVENTS_KEEPALIVE_IN_SECONDS: Final = 15.0
 
 TEAMS_MESSAGE_MEETING_UPDATE: Final = "meetingUpdate"
 TEAMS_MESSAGE_TOKEN_REFRESH: Final = "tokenRefresh"
+TEAMS_MESSAGE_RESPONSE: Final = "response"
+TEAMS_MESSAGE_REQUEST_ID: Final = "requestId"
+TEAMS_MESSAGE_ERROR: Final = "errorMsg"
+TEAMS_MESSAGE_ACTION: Final = "action"
+TEAMS_MESSAGE_PARAMETERS: Final = "parameters"
+TEAMS_MEETING_STATE: Final = "meetingState"
+TEAMS_MEETING_PERMISSIONS: Final = "meetingPermissions"
 
 WEBHOOK_URI_SAMPLE: Final = "http://your-home-assistant:8123/api/webhook/some_hook_id"
+WEBHOOK_TIMEOUT_IN_SECONDS: Final = 5.0
+WEBHOOK_CONNECT_TIMEOUT_IN_SECONDS: Final = 2.0
+WEBHOOK_MAX_CONNECTIONS: Final = 4
+WEBHOOK_MAX_KEEPALIVE_CONNECTIONS: Final = 2
+WEBHOOK_KEEPALIVE_EXPIRY_IN_SECONDS: Final = 60.0
 
 WEBSOCKET_HOSTNAME: Final = "localhost"
 WEBSOCKET_PORT: Final = 8124
+WEBSOCKET_DEFAULT_SESSION_NAME: Final = "default"
 WEBSOCKET_MANUFACTURER: Final = "NeonNinjaSoftware"
 WEBSOCKET_APPLICATION_NAME: Final = APPLICATION_SHORTENED_NAME
 WEBSOCKET_APPLICATION_VERSION: Final = "1"
 
-WEBSOCKET_PAIRING_REQUEST_BACKOFF_IN_SECONDS: Final = 2.0
-WEBSOCKET_SLEEP_BEFORE_RECONNECT_IN_SECONDS: Final = 10.0
+WEBSOCKET_PAIRING_REQUEST_TIMEOUT_IN_SECONDS: Final = 10.0
+# Time to allow pairing in Teams before the request is sent again.
+WEBSOCKET_PAIRING_TOKEN_TIMEOUT_IN_SECONDS: Final = 60.0
+WEBSOCKET_PING_INTERVAL_IN_SECONDS: Final = 20.0
+WEBSOCKET_PING_TIMEOUT_IN_SECONDS: Final = 10.0
+WEBSOCKET_IDLE_TIMEOUT_IN_SECONDS: Final = 60.0
+WEBSOCKET_RECONNECT_MIN_DELAY_IN_SECONDS: Final = 0.5
+WEBSOCKET_RECONNECT_MAX_DELAY_IN_SECONDS: Final = 30.0
+WEBSOCKET_RECONNECT_PROBE_INTERVAL_IN_SECONDS: Final = 1.0
+WEBSOCKET_RECONNECT_PROBE_TIMEOUT_IN_SECONDS: Final = 0.5
@@ -0,0 +1,107 @@
+"""Correlation of requests sent to Teams with their responses."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from teams_connex.decoder import Response
+from teams_connex.metrics import MetricsRegistry
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RequestTracker:
+    """Pending requests by ID, expired by a single timer on the earliest deadline."""
+
+    def __init__(
+        self, metrics: MetricsRegistry | None = None, labels: dict | None = None
+    ):
+        """Initialise request tracker."""
+        self._request_ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future[Response]] = {}
+        # Heap of (deadline, request ID); entries of completed requests are skipped.
+        self._deadlines: list[tuple[float, int]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._timer_deadline: float | None = None
+        metrics = metrics or MetricsRegistry()
+        metrics.gauge(
+            "outstanding_requests",
+            "Requests sent to Teams and waiting for a response",
+            labels,
+            function=lambda: len(self._pending),
+        )
+        self._expired = metrics.counter(
+            "expired_requests_total",
+            "Requests Teams did not respond to in time",
+            labels,
+        )
+
+    @property
+    def outstanding(self) -> int:
+        """Return number of requests waiting for a response."""
+        return len(self._pending)
+
+    def create(self, timeout: float) -> tuple[int, asyncio.Future[Response]]:
+        """Register a new request, return its ID and the future of its response."""
+        request_id = next(self._request_ids)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Responses to abandoned requests are not waited for anymore.
+        future.add_done_callback(lambda _: self._pending.pop(request_id, None))
+        self._pending[request_id] = future
+        deadline = time.monotonic() + timeout
+        heapq.heappush(self._deadlines, (deadline, request_id))
+        if self._timer_deadline is None or deadline < self._timer_deadline:
+            self._schedule(loop, deadline)
+        return request_id, future
+
+    def resolve(self, response: Response) -> bool:
+        """Complete the request the response belongs to, return whether it was pending."""
+        future = self._pending.get(response.request_id)
+        if future is None or future.done():
+            return False
+        future.set_result(response)
+        return True
+
+    def fail_all(self, exc: Exception):
+        """Fail all pending requests, for example because the connection was lost."""
+        for future in list(self._pending.values()):
+            if not future.done():
+                future.set_exception(exc)
+        self._pending.clear()
+        self._deadlines.clear()
+        self._cancel_timer()
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop, deadline: float):
+        """Run expiry at the deadline, replacing any later timer."""
+        self._cancel_timer()
+        self._timer_deadline = deadline
+        self._timer = loop.call_at(
+            loop.time() + max(0.0, deadline - time.monotonic()), self._expire
+        )
+
+    def _cancel_timer(self):
+        """Cancel the expiry timer."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = None
+        self._timer_deadline = None
+
+    def _expire(self):
+        """Time out all requests past their deadline and wait for the next one."""
+        self._timer = None
+        self._timer_deadline = None
+        now = time.monotonic()
+        while self._deadlines and (
+            self._deadlines[0][0] <= now or self._deadlines[0][1] not in self._pending
+        ):
+            _, request_id = heapq.heappop(self._deadlines)
+            future = self._pending.get(request_id)
+            if future is not None and not future.done():
+                _LOGGER.debug("Request %s expired", request_id)
+                self._expired.inc()
+                future.set_exception(TimeoutError(f"Request {request_id} expired"))
+        if self._deadlines:
+            self._schedule(asyncio.get_running_loop(), self._deadlines[0][0])
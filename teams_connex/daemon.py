@@ -0,0 +1,65 @@
+"""Headless daemon running the pipeline without user interface."""
+
+import asyncio
+import logging
+import signal
+
+from teams_connex.configuration import ConfigurationStore, default_configuration_file
+from teams_connex.consts import WEBSOCKET_HOSTNAME, WEBSOCKET_PORT
+from teams_connex.pipeline import Pipeline
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Daemon:
+    """Run the pipeline on the main thread until terminated by a signal."""
+
+    def __init__(
+        self,
+        configuration_file: str | None = None,
+        host: str = WEBSOCKET_HOSTNAME,
+        port: int = WEBSOCKET_PORT,
+    ):
+        """Initialise daemon."""
+        self.configuration_file: str = (
+            configuration_file or default_configuration_file()
+        )
+        self._configuration_store = ConfigurationStore(self.configuration_file)
+        self.pipeline = Pipeline(self._configuration_store, host=host, port=port)
+        # Keeps reload tasks referenced until they are done.
+        self._reload_tasks: set[asyncio.Task] = set()
+
+    async def reload(self):
+        """Re-read and apply the configuration file."""
+        _LOGGER.info("Reloading configuration")
+        # Own changes not written yet, such as a refreshed token, would be lost otherwise.
+        await asyncio.to_thread(self.pipeline.flush_configuration)
+        await self.pipeline.apply_configuration(
+            await asyncio.to_thread(self._configuration_store.read)
+        )
+
+    async def run(self):
+        """Run until SIGINT or SIGTERM, then drain and shut down gracefully."""
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, self.pipeline.stop)
+        loop.add_signal_handler(signal.SIGHUP, self._schedule_reload)
+        try:
+            await self.pipeline.run()
+        finally:
+            for signal_number in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+                loop.remove_signal_handler(signal_number)
+            # Write configuration changes such as a new token before exiting.
+            await asyncio.to_thread(self.pipeline.flush_configuration)
+        _LOGGER.info("Stopped")
+
+    def _schedule_reload(self):
+        """Reload the configuration from the signal handler."""
+        task = asyncio.get_running_loop().create_task(self.reload())
+        self._reload_tasks.add(task)
+        task.add_done_callback(self._reload_tasks.discard)
+
+
+def run_headless(configuration_file: str | None = None):
+    """Run the daemon until it is terminated."""
+    asyncio.run(Daemon(configuration_file).run())
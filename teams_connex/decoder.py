@@ -0,0 +1,155 @@
+"""Decoding and dispatching of messages received from Teams."""
+
+from collections.abc import Awaitable, Callable
+import json
+import logging
+from typing import Any, Final, Self
+
+from teams_connex.consts import (
+    TEAMS_MESSAGE_ERROR,
+    TEAMS_MESSAGE_MEETING_UPDATE,
+    TEAMS_MESSAGE_REQUEST_ID,
+    TEAMS_MESSAGE_RESPONSE,
+    TEAMS_MESSAGE_TOKEN_REFRESH,
+)
+from teams_connex.meeting import MeetingState
+
+_LOGGER = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The optional orjson package decodes considerably faster than the standard library.
+JSON_BACKEND: Final = "orjson" if orjson else "json"
+_loads: Callable[[str | bytes], Any] = orjson.loads if orjson else json.loads
+
+
+class MessageDecodeError(ValueError):
+    """Frame received from Teams is not a valid message."""
+
+
+def loads(frame: str | bytes) -> dict:
+    """Decode a text or binary frame into a JSON object."""
+    try:
+        decoded = _loads(frame)
+    except ValueError as exc:
+        # Covers JSON errors of all backends and invalid UTF-8 in binary frames.
+        raise MessageDecodeError(str(exc)) from exc
+    if not isinstance(decoded, dict):
+        raise MessageDecodeError(f"Expected JSON object, got {type(decoded).__name__}")
+    return decoded
+
+
+class TokenRefresh:
+    """New token issued by Teams after pairing."""
+
+    __slots__ = ("token",)
+
+    def __init__(self, token: str):
+        """Initialise token refresh message."""
+        self.token: str = token
+
+    @classmethod
+    def from_message(cls, message: dict) -> Self:
+        """Create from a decoded message."""
+        # Example: {"tokenRefresh":"1273d305-d1a5-4484-b623-a65467a72a50"}
+        return cls(str(message[TEAMS_MESSAGE_TOKEN_REFRESH]))
+
+
+class MeetingUpdate:
+    """Meeting state and permissions reported by Teams."""
+
+    __slots__ = ("meeting_state",)
+
+    def __init__(self, meeting_state: MeetingState):
+        """Initialise meeting update message."""
+        self.meeting_state: MeetingState = meeting_state
+
+    @property
+    def can_pair(self) -> bool | None:
+        """Return if Teams allows pairing, or None if not reported."""
+        return self.meeting_state.get("canPair")
+
+    @classmethod
+    def from_message(cls, message: dict) -> Self:
+        """Create from a decoded message."""
+        return cls(MeetingState.from_message(message))
+
+
+class Response:
+    """Response of Teams to a request sent by this application."""
+
+    __slots__ = ("error", "request_id", "response")
+
+    def __init__(self, request_id: int | None, response: Any, error: Any = None):
+        """Initialise response message."""
+        self.request_id: int | None = request_id
+        self.response: Any = response
+        self.error: Any = error
+
+    @classmethod
+    def from_message(cls, message: dict) -> Self:
+        """Create from a decoded message."""
+        # Example: {"requestId":1,"response":"Success"}
+        return cls(
+            message.get(TEAMS_MESSAGE_REQUEST_ID),
+            message.get(TEAMS_MESSAGE_RESPONSE),
+            message.get(TEAMS_MESSAGE_ERROR),
+        )
+
+
+TeamsMessage = TokenRefresh | MeetingUpdate | Response
+
+# Top level key identifying the message type, in the order they are dispatched.
+MESSAGE_TYPES: Final[dict[str, Callable[[dict], TeamsMessage]]] = {
+    TEAMS_MESSAGE_TOKEN_REFRESH: TokenRefresh.from_message,
+    TEAMS_MESSAGE_MEETING_UPDATE: MeetingUpdate.from_message,
+    # Errors come without a response, so responses are identified by request ID.
+    TEAMS_MESSAGE_REQUEST_ID: Response.from_message,
+}
+
+
+def decode_messages(
+    frame: str | bytes, received_at: float | None = None
+) -> list[TeamsMessage]:
+    """Decode a frame into all typed messages it contains."""
+    decoded = loads(frame)
+    messages: list[TeamsMessage] = []
+    for key, factory in MESSAGE_TYPES.items():
+        if key in decoded:
+            try:
+                message = factory(decoded)
+            except (AttributeError, TypeError) as exc:
+                raise MessageDecodeError(f"Invalid {key} message: {exc}") from exc
+            if isinstance(message, MeetingUpdate):
+                message.meeting_state.received_at = received_at
+            messages.append(message)
+    if not messages:
+        _LOGGER.debug("Ignoring unknown message: %s", list(decoded))
+    return messages
+
+
+class MessageDispatcher:
+    """Route decoded messages to the handler registered for their type."""
+
+    def __init__(self):
+        """Initialise dispatcher."""
+        self._handlers: dict[type, Callable[[Any], Awaitable[None]]] = {}
+
+    def register(self, message_type: type, handler: Callable[[Any], Awaitable[None]]):
+        """Register the handler for a message type."""
+        self._handlers[message_type] = handler
+
+    async def dispatch(
+        self, frame: str | bytes, received_at: float | None = None
+    ) -> int:
+        """Decode a frame and dispatch its messages, return the number handled."""
+        handled = 0
+        for message in decode_messages(frame, received_at):
+            handler = self._handlers.get(type(message))
+            if handler is not None:
+                await handler(message)
+                handled += 1
+        return handled
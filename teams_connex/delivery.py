@@ -0,0 +1,336 @@
+"""Reliable delivery of meeting state."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from enum import StrEnum
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+from teams_connex.consts import (
+    DELIVERY_CIRCUIT_BREAKER_RESET_IN_SECONDS,
+    DELIVERY_CIRCUIT_BREAKER_THRESHOLD,
+    DELIVERY_RETRY_ATTEMPTS,
+    DELIVERY_RETRY_BASE_DELAY_IN_SECONDS,
+    DELIVERY_RETRY_MAX_DELAY_IN_SECONDS,
+)
+from teams_connex.meeting import MeetingState
+from teams_connex.metrics import MetricsRegistry
+from teams_connex.rules import DeliveryRules, RuleDecision
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DeliveryError(Exception):
+    """Delivery of meeting state failed."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        """Initialise delivery error."""
+        super().__init__(message)
+        self.retryable: bool = retryable
+
+
+class RetryPolicy:
+    """Bounded retries with exponential backoff and full jitter."""
+
+    def __init__(
+        self,
+        attempts: int = DELIVERY_RETRY_ATTEMPTS,
+        base_delay: float = DELIVERY_RETRY_BASE_DELAY_IN_SECONDS,
+        max_delay: float = DELIVERY_RETRY_MAX_DELAY_IN_SECONDS,
+    ):
+        """Initialise retry policy."""
+        self.attempts: int = max(1, attempts)
+        self.base_delay: float = base_delay
+        self.max_delay: float = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Return the time to wait after the given (zero-based) failed attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))  # noqa: S311
+
+
+class CircuitState(StrEnum):
+    """State of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop calling a target that keeps failing until it had time to recover."""
+
+    def __init__(
+        self,
+        threshold: int = DELIVERY_CIRCUIT_BREAKER_THRESHOLD,
+        reset_timeout: float = DELIVERY_CIRCUIT_BREAKER_RESET_IN_SECONDS,
+    ):
+        """Initialise circuit breaker."""
+        self.threshold: int = max(1, threshold)
+        self.reset_timeout: float = reset_timeout
+        self.failures: int = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> CircuitState:
+        """Return current state."""
+        if self._opened_at is None:
+            return CircuitState.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return CircuitState.HALF_OPEN
+        return CircuitState.OPEN
+
+    def allow(self) -> bool:
+        """Return if a call may be attempted now."""
+        return self.state != CircuitState.OPEN
+
+    def record_success(self):
+        """Close the circuit after a successful call."""
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        """Count a failed call and open the circuit if the threshold is reached."""
+        self.failures += 1
+        if self.failures >= self.threshold or self._opened_at is not None:
+            # A failed trial call in half-open state re-opens the circuit.
+            self._opened_at = time.monotonic()
+
+
+class Outbox:
+    """On-disk store of the latest undelivered meeting state per target."""
+
+    def __init__(self, path: str):
+        """Initialise outbox."""
+        self.path: str = path
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Return database connection, creating the schema on first use."""
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS outbox "
+                "(target TEXT PRIMARY KEY, state_values INTEGER, state_known INTEGER, updated REAL)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def store(self, target: str, meeting_state: MeetingState):
+        """Store meeting state for the target, replacing any older state."""
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO outbox VALUES (?, ?, ?, ?)",
+                (target, meeting_state.values, meeting_state.known, time.time()),
+            )
+            self.connection.commit()
+
+    def load(self, target: str) -> MeetingState | None:
+        """Return stored meeting state for the target, if any."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT state_values, state_known FROM outbox WHERE target = ?",
+                (target,),
+            ).fetchone()
+        return MeetingState(*row) if row else None
+
+    def clear(self, target: str):
+        """Remove stored meeting state for the target."""
+        with self._lock:
+            self.connection.execute("DELETE FROM outbox WHERE target = ?", (target,))
+            self.connection.commit()
+
+    def close(self):
+        """Close database connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class Delivery:
+    """Deliver meeting state to one target with retries, circuit breaker and outbox."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        send: Callable[[MeetingState, int], Awaitable[None]],
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        outbox: Outbox | None = None,
+        *,
+        metrics: MetricsRegistry | None = None,
+        rules: DeliveryRules | None = None,
+    ):
+        """Initialise delivery."""
+        self.name: str = name
+        self._send = send
+        self.retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        self.circuit_breaker: CircuitBreaker = circuit_breaker or CircuitBreaker()
+        self.outbox: Outbox | None = outbox
+        # Without rules every change is delivered at once.
+        self.rules: DeliveryRules = rules or DeliveryRules()
+        # Last state confirmed by the target.
+        self.acknowledged: MeetingState = MeetingState()
+        # Latest state that could not be delivered yet.
+        self.pending: MeetingState | None = None
+        self.sent: int = 0
+        self.failed: int = 0
+        self._lock = asyncio.Lock()
+        metrics = metrics or MetricsRegistry()
+        labels = {"sink": name}
+        self._sent_counter = metrics.counter(
+            "sent_total", "Meeting states delivered", labels
+        )
+        self._failed_counter = metrics.counter(
+            "failed_total", "Meeting states that could not be delivered", labels
+        )
+        self._send_histogram = metrics.histogram(
+            "send_seconds", "Duration of a single send attempt", labels
+        )
+        self._heartbeat_counter = metrics.counter(
+            "heartbeats_total", "Unchanged meeting states re-sent as heartbeat", labels
+        )
+        self._end_to_end_histogram = metrics.histogram(
+            "end_to_end_seconds",
+            "Time from receiving an update from Teams until it was delivered",
+            labels,
+        )
+        self._suppressed_counters = {
+            decision: metrics.counter(
+                "suppressed_total",
+                "Meeting states held back by the rules of the sink",
+                {**labels, "reason": decision.value},
+            )
+            for decision in RuleDecision
+            if rules is not None and decision != RuleDecision.DELIVER
+        }
+
+    def forget(self):
+        """Forget what the target has acknowledged, so that the next state is sent in full."""
+        self.acknowledged = MeetingState()
+
+    async def load_pending(self):
+        """Restore undelivered state from the outbox."""
+        if self.outbox and self.pending is None:
+            self.pending = await asyncio.to_thread(self.outbox.load, self.name)
+            if self.pending:
+                _LOGGER.info("Restored undelivered meeting state for %s", self.name)
+
+    async def deliver(self, meeting_state: MeetingState) -> bool:
+        """Deliver meeting state, return whether the target is up to date."""
+        async with self._lock:
+            return await self._deliver(meeting_state)
+
+    async def recover(self) -> bool:
+        """Replay the latest undelivered state if the target may be available again."""
+        async with self._lock:
+            if self.pending is None or not self.circuit_breaker.allow():
+                return self.pending is None
+            _LOGGER.debug("Replaying latest meeting state to %s", self.name)
+            return await self._deliver(self.pending)
+
+    async def heartbeat(self, meeting_state: MeetingState) -> bool:
+        """Re-send meeting state once even if unchanged, return whether it was sent."""
+        async with self._lock:
+            # Undelivered state is replayed by recovery, which also covers this.
+            if self.pending is not None or not self.circuit_breaker.allow():
+                return False
+            if self.rules.quiet():
+                return False
+            try:
+                # No changed fields tells the sink that this is a heartbeat.
+                await self._send(meeting_state, 0)
+            except DeliveryError as exc:
+                _LOGGER.debug("Heartbeat to %s failed: %s", self.name, exc)
+                if exc.retryable:
+                    self.circuit_breaker.record_failure()
+                return False
+            self.circuit_breaker.record_success()
+            self.acknowledged = self.acknowledged.merge(meeting_state)
+            self._heartbeat_counter.inc()
+            return True
+
+    async def _deliver(self, meeting_state: MeetingState) -> bool:
+        """Send meeting state with retries."""
+        changed_fields = meeting_state.changed_fields(self.acknowledged)
+        if not changed_fields:
+            await self._set_pending(None)
+            return True
+        decision = self.rules.check(changed_fields)
+        if decision != RuleDecision.DELIVER:
+            return await self._suppress(meeting_state, decision)
+        changed_fields &= self.rules.fields
+        for attempt in range(self.retry_policy.attempts):
+            if not self.circuit_breaker.allow():
+                _LOGGER.debug("Circuit open for %s, deferring delivery", self.name)
+                break
+            started = time.monotonic()
+            try:
+                await self._send(meeting_state, changed_fields)
+            except DeliveryError as exc:
+                _LOGGER.warning(
+                    "Delivery to %s failed (attempt %s): %s",
+                    self.name,
+                    attempt + 1,
+                    exc,
+                )
+                if not exc.retryable:
+                    # Retrying won't help, and the target itself is reachable.
+                    self.failed += 1
+                    self._failed_counter.inc()
+                    await self._set_pending(None)
+                    return False
+                self.circuit_breaker.record_failure()
+                if attempt + 1 < self.retry_policy.attempts:
+                    await asyncio.sleep(self.retry_policy.delay(attempt))
+            else:
+                delivered = time.monotonic()
+                self._send_histogram.observe(delivered - started)
+                if meeting_state.received_at is not None:
+                    self._end_to_end_histogram.observe(
+                        delivered - meeting_state.received_at
+                    )
+                self.circuit_breaker.record_success()
+                self.acknowledged = self.acknowledged.merge(meeting_state)
+                self.sent += 1
+                self._sent_counter.inc()
+                await self._set_pending(None)
+                return True
+        self.failed += 1
+        self._failed_counter.inc()
+        await self._set_pending(meeting_state)
+        return False
+
+    async def _suppress(
+        self, meeting_state: MeetingState, decision: RuleDecision
+    ) -> bool:
+        """Drop or defer meeting state held back by the rules."""
+        if meeting_state != self.pending:
+            # Not counted again while recovery retries the same state.
+            self._suppressed_counters[decision].inc()
+        if decision == RuleDecision.FILTERED:
+            await self._set_pending(None)
+            return True
+        # Deferred, recovery delivers the latest state once allowed again.
+        _LOGGER.debug("Deferring delivery to %s: %s", self.name, decision)
+        await self._set_pending(meeting_state)
+        return False
+
+    async def _set_pending(self, meeting_state: MeetingState | None):
+        """Remember undelivered state in memory and in the outbox."""
+        if meeting_state == self.pending:
+            return
+        self.pending = meeting_state
+        if self.outbox:
+            try:
+                if meeting_state is None:
+                    await asyncio.to_thread(self.outbox.clear, self.name)
+                else:
+                    await asyncio.to_thread(self.outbox.store, self.name, meeting_state)
+            except sqlite3.Error as exc:
+                _LOGGER.warning("Unable to update outbox: %s", exc)
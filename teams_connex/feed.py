@@ -0,0 +1,114 @@
+"""Latest meeting state for local clients, on request, by long-poll or as events."""
+
+import asyncio
+import contextlib
+import json
+import logging
+
+from teams_connex.consts import (
+    STATE_EVENT_NAME,
+    STATE_EVENTS_KEEPALIVE_IN_SECONDS,
+    STATE_LONG_POLL_TIMEOUT_IN_SECONDS,
+    STATE_VERSION_KEY,
+    STATE_VERSION_PARAMETER,
+)
+from teams_connex.http_server import HttpRequest, HttpResponse
+from teams_connex.meeting import MeetingState
+from teams_connex.metrics import MetricsRegistry
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENTS_HEAD = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/event-stream\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+)
+
+
+class StateFeed:
+    """Keep the latest meeting state encoded and wake up clients waiting for changes."""
+
+    def __init__(
+        self,
+        metrics: MetricsRegistry | None = None,
+        long_poll_timeout: float = STATE_LONG_POLL_TIMEOUT_IN_SECONDS,
+        keepalive: float = STATE_EVENTS_KEEPALIVE_IN_SECONDS,
+    ):
+        """Initialise state feed."""
+        self.long_poll_timeout: float = long_poll_timeout
+        self.keepalive: float = keepalive
+        self.version: str = ""
+        self._body: bytes = b""
+        self._event: bytes = b""
+        # Set and replaced on every change, so that all waiting clients wake up once.
+        self._changed = asyncio.Event()
+        self._closed: bool = False
+        self.subscribers: int = 0
+        self.publish(MeetingState())
+        metrics = metrics or MetricsRegistry()
+        metrics.gauge(
+            "state_subscribers",
+            "Local clients receiving meeting state as events",
+            function=lambda: self.subscribers,
+        )
+
+    def publish(self, meeting_state: MeetingState) -> bool:
+        """Encode meeting state once and notify clients, return whether it changed."""
+        version = meeting_state.version
+        if version == self.version:
+            return False
+        self.version = version
+        data = json.dumps({**meeting_state.to_message(), STATE_VERSION_KEY: version})
+        self._body = data.encode()
+        self._event = (
+            f"id: {version}\nevent: {STATE_EVENT_NAME}\ndata: {data}\n\n".encode()
+        )
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        return True
+
+    def close(self):
+        """Release all waiting clients, for example when shutting down."""
+        self._closed = True
+        self._changed.set()
+
+    async def wait(self, version: str, timeout: float):
+        """Wait until the state differs from the version, or the timeout expires."""
+        changed = self._changed
+        if version != self.version or self._closed:
+            return
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(timeout):
+                await changed.wait()
+
+    async def serve_state(self, request: HttpRequest) -> HttpResponse:
+        """Return the latest state, after it differs from the version if one is given."""
+        version = request.query.get(STATE_VERSION_PARAMETER)
+        if version is not None:
+            await self.wait(version, self.long_poll_timeout)
+        return HttpResponse(body=self._body, content_type="application/json")
+
+    async def serve_events(self, request: HttpRequest) -> None:
+        """Stream every change of the state as server-sent event until disconnected."""
+        writer = request.writer
+        # Clients that reconnect do not receive the state they already have again.
+        sent = request.headers.get("last-event-id")
+        self.subscribers += 1
+        try:
+            writer.write(EVENTS_HEAD)
+            while not self._closed:
+                if sent != self.version:
+                    sent = self.version
+                    writer.write(self._event)
+                else:
+                    # Detects clients that have gone away.
+                    writer.write(b": keepalive\n\n")
+                # Slow clients skip intermediate states rather than holding up others.
+                await writer.drain()
+                await self.wait(sent, self.keepalive)
+        except ConnectionError as exc:
+            _LOGGER.debug("State subscriber disconnected: %s", exc)
+        finally:
+            self.subscribers -= 1
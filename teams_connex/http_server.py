@@ -0,0 +1,187 @@
+"""Minimal local HTTP server."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import contextlib
+from http import HTTPStatus
+import logging
+import os
+import stat
+from urllib.parse import parse_qs, urlsplit
+
+from teams_connex.consts import (
+    HTTP_SERVER_HOST,
+    HTTP_SERVER_LOOPBACK_HOSTS,
+    HTTP_SERVER_MAX_BODY_SIZE,
+    HTTP_SERVER_READ_TIMEOUT_IN_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HttpRequest:
+    """Incoming HTTP request."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        method: str,
+        target: str,
+        headers: dict[str, str],
+        body: bytes,
+        writer: asyncio.StreamWriter,
+    ):
+        """Initialise request."""
+        self.method: str = method
+        url = urlsplit(target)
+        self.path: str = url.path
+        self.query: dict[str, str] = {
+            key: values[-1] for key, values in parse_qs(url.query).items()
+        }
+        self.headers: dict[str, str] = headers
+        self.body: bytes = body
+        # Handlers that stream their response write to this directly.
+        self.writer: asyncio.StreamWriter = writer
+
+    @property
+    def from_browser(self) -> bool:
+        """Return if a web page may have sent the request, rather than a local client."""
+        if "origin" in self.headers:
+            return True
+        # A web page resolving its own name to 127.0.0.1 still sends that name.
+        host = self.headers.get("host")
+        return (
+            host is not None
+            and urlsplit(f"//{host}").hostname not in HTTP_SERVER_LOOPBACK_HOSTS
+        )
+
+
+class HttpResponse:
+    """Outgoing HTTP response."""
+
+    def __init__(
+        self,
+        status: HTTPStatus = HTTPStatus.OK,
+        body: bytes | str = b"",
+        content_type: str = "text/plain; charset=utf-8",
+    ):
+        """Initialise response."""
+        self.status: HTTPStatus = status
+        self.body: bytes = body.encode() if isinstance(body, str) else body
+        self.content_type: str = content_type
+
+    def encode(self) -> bytes:
+        """Return the complete response including headers."""
+        head = (
+            f"HTTP/1.1 {self.status.value} {self.status.phrase}\r\n"
+            f"Content-Type: {self.content_type}\r\n"
+            f"Content-Length: {len(self.body)}\r\n"
+            # Each connection serves a single request.
+            "Connection: close\r\n"
+            "\r\n"
+        )
+        return head.encode() + self.body
+
+
+# Handlers return a response, or None if they have written the response themselves.
+HttpHandler = Callable[[HttpRequest], Awaitable[HttpResponse | None]]
+
+
+class LocalHttpServer:
+    """HTTP/1.1 server on a local TCP port or Unix domain socket."""
+
+    def __init__(
+        self, host: str = HTTP_SERVER_HOST, port: int = 0, path: str | None = None
+    ):
+        """Initialise server."""
+        self.host: str = host
+        self.port: int = port
+        self.path: str | None = path
+        self._routes: dict[tuple[str, str], HttpHandler] = {}
+        self._server: asyncio.Server | None = None
+
+    def route(self, method: str, path: str, handler: HttpHandler):
+        """Register handler for the method and path."""
+        self._routes[(method.upper(), path)] = handler
+
+    @property
+    def bound_port(self) -> int | None:
+        """Return the TCP port the server is listening on."""
+        if self._server is None or self.path:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self):
+        """Start listening."""
+        if self.path:
+            with contextlib.suppress(FileNotFoundError):
+                # Never delete anything but a socket left behind, the path may be a typo.
+                if not stat.S_ISSOCK(os.lstat(self.path).st_mode):
+                    raise FileExistsError(f"Not a socket: {self.path}")
+                os.remove(self.path)
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self._server = await asyncio.start_server(
+                self._handle, self.host, self.port
+            )
+        _LOGGER.debug("HTTP server listening on %s", self.path or self.bound_port)
+
+    async def close(self):
+        """Stop listening."""
+        if self._server is not None:
+            self._server.close()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._server.wait_closed(), timeout=1)
+            self._server = None
+        if self.path:
+            with contextlib.suppress(OSError):
+                os.remove(self.path)
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> HttpRequest | None:
+        """Read request line, headers and body."""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        headers: dict[str, str] = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > HTTP_SERVER_MAX_BODY_SIZE:
+            raise ValueError("Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return HttpRequest(method.upper(), target, headers, body, writer)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Handle a single request per connection, always closing it afterwards."""
+        try:
+            response = await self._respond(reader, writer)
+            if response is not None:
+                writer.write(response.encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> HttpResponse | None:
+        """Read a request and return its response, None if there is nothing to answer."""
+        try:
+            async with asyncio.timeout(HTTP_SERVER_READ_TIMEOUT_IN_SECONDS):
+                request = await self._read_request(reader, writer)
+        except (TimeoutError, ValueError, asyncio.IncompleteReadError) as exc:
+            _LOGGER.debug("Invalid HTTP request: %s", exc)
+            return HttpResponse(HTTPStatus.BAD_REQUEST)
+        if request is None:
+            return None
+        handler = self._routes.get((request.method, request.path))
+        if handler is None:
+            known_path = any(path == request.path for _, path in self._routes)
+            return HttpResponse(
+                HTTPStatus.METHOD_NOT_ALLOWED if known_path else HTTPStatus.NOT_FOUND
+            )
+        return await handler(request)
@@ -0,0 +1,263 @@
+"""Append-only journal of meeting state transitions.
+
+Each record is a wall-clock timestamp plus the state bitmask, 16 bytes in total.
+Records are appended to segment files named after their first timestamp, and
+segments are memory-mapped for queries.
+
+Query with: python -m teams_connex.journal --since 2024-07-01 --daily
+"""
+
+import argparse
+from collections.abc import Iterator
+import datetime as dt
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Final
+
+from teams_connex.consts import (
+    JOURNAL_DIRECTORY_NAME,
+    JOURNAL_MAX_SEGMENTS,
+    JOURNAL_SEGMENT_MAX_RECORDS,
+    JOURNAL_SEGMENT_SUFFIX,
+)
+from teams_connex.meeting import MEETING_FIELDS, MeetingState
+
+_LOGGER = logging.getLogger(__name__)
+
+# Timestamp in seconds, values and known bitmasks.
+RECORD: Final = struct.Struct("<dII")
+SECONDS_PER_DAY: Final = 24 * 60 * 60
+
+
+class MeetingJournal:
+    """Record meeting state transitions and aggregate time spent per field."""
+
+    def __init__(
+        self,
+        directory: str,
+        segment_max_records: int = JOURNAL_SEGMENT_MAX_RECORDS,
+        max_segments: int = JOURNAL_MAX_SEGMENTS,
+    ):
+        """Initialise journal."""
+        self.directory: str = directory
+        self.segment_max_records: int = segment_max_records
+        self.max_segments: int = max_segments
+        self._file = None
+        self._records: int = 0
+        self._state: MeetingState | None = None
+        # Records are written from a worker thread, not from the event loop.
+        self._lock = threading.Lock()
+
+    def segments(self) -> list[tuple[float, str]]:
+        """Return start time and path of all segments, oldest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            (int(name.removesuffix(JOURNAL_SEGMENT_SUFFIX)) / 1000, name)
+            for name in names
+            if name.endswith(JOURNAL_SEGMENT_SUFFIX)
+        )
+
+    def append(self, meeting_state: MeetingState, timestamp: float | None = None):
+        """Record the meeting state if it changes anything that is known."""
+        with self._lock:
+            if self._state is None:
+                self._state = self._last_state()
+            state = self._state.merge(meeting_state)
+            if state == self._state:
+                return
+            self._write(state, time.time() if timestamp is None else timestamp)
+
+    def reset(self, timestamp: float | None = None):
+        """Record that the state is unknown from now on, for example without Teams."""
+        with self._lock:
+            if self._state is None:
+                self._state = self._last_state()
+            if self._state.known:
+                self._write(
+                    MeetingState(), time.time() if timestamp is None else timestamp
+                )
+
+    def close(self, reset: bool = True):
+        """Record that the state is unknown, unless told not to, and close the segment."""
+        if reset:
+            try:
+                self.reset()
+            except OSError as exc:
+                _LOGGER.warning("Unable to write journal: %s", exc)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _last_state(self) -> MeetingState:
+        """Return the last state recorded by a previous run."""
+        segments = self.segments()
+        if not segments:
+            return MeetingState()
+        path = os.path.join(self.directory, segments[-1][1])
+        size = os.path.getsize(path) // RECORD.size * RECORD.size
+        if not size:
+            return MeetingState()
+        with open(path, "rb") as stream:
+            stream.seek(size - RECORD.size)
+            _, values, known = RECORD.unpack(stream.read(RECORD.size))
+        return MeetingState(values, known)
+
+    def _write(self, state: MeetingState, timestamp: float):
+        """Append a record, rotating segments as required."""
+        if self._file is None:
+            self._open_latest()
+        if self._file is None or self._records >= self.segment_max_records:
+            self._rotate(timestamp)
+        self._file.write(RECORD.pack(timestamp, state.values, state.known))
+        self._file.flush()
+        self._records += 1
+        self._state = state
+
+    def _open_latest(self):
+        """Continue the newest segment of a previous run if it has room left."""
+        segments = self.segments()
+        if not segments:
+            return
+        path = os.path.join(self.directory, segments[-1][1])
+        records = os.path.getsize(path) // RECORD.size
+        if records >= self.segment_max_records:
+            return
+        self._file = open(path, "ab")  # noqa: SIM115
+        # Drop a partial record left behind by a crash.
+        self._file.truncate(records * RECORD.size)
+        self._records = records
+
+    def _rotate(self, timestamp: float):
+        """Start a new segment and delete the oldest ones beyond the limit."""
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{int(timestamp * 1000):015d}{JOURNAL_SEGMENT_SUFFIX}"
+        self._file = open(os.path.join(self.directory, name), "ab")  # noqa: SIM115
+        self._records = self._file.tell() // RECORD.size
+        for _, old in self.segments()[: -self.max_segments]:
+            os.remove(os.path.join(self.directory, old))
+
+    def records(self, start: float, end: float) -> Iterator[tuple[float, int, int]]:
+        """Yield the record in effect at the start and all records until the end."""
+        segments = [segment for segment in self.segments() if segment[0] < end]
+        # Only the last segment starting before the range can hold the state at its start.
+        first = max(
+            (index for index, (begin, _) in enumerate(segments) if begin <= start),
+            default=0,
+        )
+        for index, (_, name) in enumerate(segments[first:]):
+            with open(os.path.join(self.directory, name), "rb") as stream:
+                size = os.fstat(stream.fileno()).st_size // RECORD.size * RECORD.size
+                if not size:
+                    continue
+                with mmap.mmap(stream.fileno(), size, access=mmap.ACCESS_READ) as data:
+                    first_offset = _seek(data, size, start) if index == 0 else 0
+                    # Unpacked straight from the mapping, without copying the segment.
+                    for offset in range(first_offset, size, RECORD.size):
+                        record = RECORD.unpack_from(data, offset)
+                        if record[0] >= end:
+                            return
+                        yield record
+
+    def durations(
+        self, start: float, end: float, now: float | None = None
+    ) -> dict[str, float]:
+        """Return seconds each field was true within the time range."""
+        end = min(end, time.time() if now is None else now)
+        totals = dict.fromkeys((field for _, field in MEETING_FIELDS), 0.0)
+        previous: tuple[float, int, int] | None = None
+        for record in self.records(start, end):
+            if previous is not None:
+                _add(totals, previous, start, record[0])
+            previous = record
+        if previous is not None:
+            _add(totals, previous, start, end)
+        return {field: seconds for field, seconds in totals.items() if seconds}
+
+    def daily(self, start: float, end: float) -> dict[str, dict[str, float]]:
+        """Return durations per local calendar day within the time range."""
+        day = dt.datetime.fromtimestamp(start).date()
+        result = {}
+        while (begin := _midnight(day)) < end:
+            next_day = day + dt.timedelta(days=1)
+            result[day.isoformat()] = self.durations(
+                max(begin, start), min(_midnight(next_day), end)
+            )
+            day = next_day
+        return result
+
+
+def _seek(data: mmap.mmap, size: int, start: float) -> int:
+    """Return offset of the last record before the start, by binary search."""
+    low, high = 0, size // RECORD.size
+    while low < high:
+        middle = (low + high) // 2
+        if RECORD.unpack_from(data, middle * RECORD.size)[0] <= start:
+            low = middle + 1
+        else:
+            high = middle
+    return max(0, low - 1) * RECORD.size
+
+
+def _add(
+    totals: dict[str, float], record: tuple[float, int, int], start: float, end: float
+):
+    """Add the time the record was in effect within the range to its true fields."""
+    timestamp, values, known = record
+    seconds = end - max(timestamp, start)
+    if seconds <= 0:
+        return
+    mask = values & known
+    for index, (_, field) in enumerate(MEETING_FIELDS):
+        if mask >> index & 1:
+            totals[field] += seconds
+
+
+def _midnight(day: dt.date) -> float:
+    """Return timestamp of local midnight at the start of the day."""
+    return dt.datetime.combine(day, dt.time()).timestamp()
+
+
+def _timestamp(value: str) -> float:
+    """Return timestamp of a local ISO date or date and time."""
+    return dt.datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    """Print time spent per field from the command line."""
+    # Imported here, so that the pipeline does not depend on it.
+    from teams_connex.configuration import default_configuration_file  # noqa: PLC0415
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--directory",
+        default=os.path.join(
+            os.path.dirname(default_configuration_file()), JOURNAL_DIRECTORY_NAME
+        ),
+    )
+    parser.add_argument("--since", type=_timestamp, help="local ISO date or time")
+    parser.add_argument("--until", type=_timestamp, help="local ISO date or time")
+    parser.add_argument("--daily", action="store_true", help="break down per day")
+    args = parser.parse_args()
+    journal = MeetingJournal(args.directory)
+    until = time.time() if args.until is None else args.until
+    since = until - SECONDS_PER_DAY if args.since is None else args.since
+    if args.daily:
+        result = journal.daily(since, until)
+    else:
+        result = journal.durations(since, until)
+    print(json.dumps(result, indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,56 @@
 """Teams Connex application."""
 
+import argparse
 import importlib.metadata
 import logging
 import os
 
 import platformdirs
 
-from teams_connex.app import TeamsConnex
 from teams_connex.consts import APPLICATION_NAME, APPLICATION_SHORTENED_NAME
+from teams_connex.logs import set_up_logging
 
 
 def main():
     """Execute command line tool."""
-    # Set up logger.
-    logfile = os.path.join(
-        platformdirs.user_log_dir(appname=APPLICATION_NAME, ensure_exists=True),
-        f"{APPLICATION_SHORTENED_NAME}.log",
-    )
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s %(levelname)s:%(name)s:%(module)s:%(message)s",
-        filename=logfile,
+    parser = argparse.ArgumentParser(prog=APPLICATION_SHORTENED_NAME)
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run without status bar icon and log to standard error",
     )
+    parser.add_argument("--config", help="path to the configuration file")
+    # Unknown arguments, such as those macOS passes to app bundles, are ignored.
+    args, _ = parser.parse_known_args()
+    # Set up logger.
+    if args.headless:
+        logfile = None
+    else:
+        logfile = os.path.join(
+            platformdirs.user_log_dir(appname=APPLICATION_NAME, ensure_exists=True),
+            f"{APPLICATION_SHORTENED_NAME}.log",
+        )
+    # Written on a background thread, so that logging does not hold up the event loop.
+    listener = set_up_logging(logfile)
     logger = logging.getLogger(__name__)
     logger.info(
         "%s started (version %s)...",
         APPLICATION_NAME,
         importlib.metadata.version("teams_connex"),
     )
-    # Start application.
-    app = TeamsConnex()
-    app.run()
+    # Start application, the user interface is only loaded when needed.
+    try:
+        if args.headless:
+            from teams_connex.daemon import run_headless  # noqa: PLC0415
+
+            run_headless(args.config)
+        else:
+            from teams_connex.app import TeamsConnex  # noqa: PLC0415
+
+            app = TeamsConnex()
+            app.run()
+    finally:
+        listener.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+"""Logging set-up with a background writer, rotation and rate limiting."""
+
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+
+from teams_connex.consts import (
+    LOG_FILE_BACKUP_COUNT,
+    LOG_FILE_MAX_BYTES,
+    LOG_FILE_ROTATION_INTERVAL_IN_SECONDS,
+    LOG_FORMAT,
+    LOG_RATE_LIMIT_BURST,
+    LOG_RATE_LIMIT_PERIOD_IN_SECONDS,
+)
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotate by size or age, whichever comes first, and compress old files."""
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = LOG_FILE_MAX_BYTES,
+        backup_count: int = LOG_FILE_BACKUP_COUNT,
+        interval: float = LOG_FILE_ROTATION_INTERVAL_IN_SECONDS,
+    ):
+        """Initialise rotating file handler."""
+        super().__init__(
+            filename, maxBytes=max_bytes, backupCount=backup_count, delay=True
+        )
+        self.interval: float = interval
+        self.rollover_at: float = self._next_rollover()
+
+    def _next_rollover(self) -> float:
+        """Return when the current file is rotated at the latest."""
+        try:
+            started = os.path.getmtime(self.baseFilename)
+        except OSError:
+            started = time.time()
+        return min(started, time.time()) + self.interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:  # noqa: N802
+        """Return whether the file is too old or would grow too large."""
+        if self.interval and time.time() >= self.rollover_at:
+            return os.path.exists(self.baseFilename)
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):  # noqa: N802
+        """Rotate files and start the next interval."""
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+    def rotation_filename(self, default_name: str) -> str:
+        """Return the name of a rotated file."""
+        return f"{default_name}.gz"
+
+    def rotate(self, source: str, dest: str):
+        """Compress the current file into the first backup."""
+        with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+            shutil.copyfileobj(source_file, dest_file)
+        os.remove(source)
+
+
+class RateLimitFilter(logging.Filter):
+    """Limit how often the same message is logged below warning level."""
+
+    def __init__(
+        self,
+        burst: int = LOG_RATE_LIMIT_BURST,
+        period: float = LOG_RATE_LIMIT_PERIOD_IN_SECONDS,
+    ):
+        """Initialise rate limit filter."""
+        super().__init__()
+        self.burst: int = burst
+        self.period: float = period
+        self._lock = threading.Lock()
+        # Message template to start of the current period, records let through and suppressed.
+        self._windows: dict[tuple[str, object], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return whether to log the record, noting how many similar ones were dropped."""
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                suppressed = window[2] if window else 0
+                if len(self._windows) > self.burst * 100:
+                    # Templates are few, but do not grow without bounds either.
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                window[1] += 1
+                return True
+            else:
+                window[2] += 1
+                return False
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+def set_up_logging(
+    logfile: str | None = None, level: int = logging.INFO
+) -> logging.handlers.QueueListener:
+    """Log through a queue, so that files are written on a background thread."""
+    if logfile:
+        handler: logging.Handler = CompressingRotatingFileHandler(logfile)
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+    root = logging.getLogger()
+    root.setLevel(level)
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    return listener
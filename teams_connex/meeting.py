@@ -0,0 +1,295 @@
+"""Meeting update helpers."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+import math
+from typing import Final, Self
+
+from teams_connex.consts import (
+    TEAMS_MEETING_PERMISSIONS,
+    TEAMS_MEETING_STATE,
+    TEAMS_MESSAGE_MEETING_UPDATE,
+)
+
+# Tracked boolean fields in a fixed order; the index is the bit position.
+MEETING_FIELDS: Final = (
+    (TEAMS_MEETING_STATE, "isMuted"),
+    (TEAMS_MEETING_STATE, "isVideoOn"),
+    (TEAMS_MEETING_STATE, "isHandRaised"),
+    (TEAMS_MEETING_STATE, "isInMeeting"),
+    (TEAMS_MEETING_STATE, "isRecordingOn"),
+    (TEAMS_MEETING_STATE, "isBackgroundBlurred"),
+    (TEAMS_MEETING_STATE, "isSharing"),
+    (TEAMS_MEETING_STATE, "hasUnreadMessages"),
+    (TEAMS_MEETING_PERMISSIONS, "canToggleMute"),
+    (TEAMS_MEETING_PERMISSIONS, "canToggleVideo"),
+    (TEAMS_MEETING_PERMISSIONS, "canToggleHand"),
+    (TEAMS_MEETING_PERMISSIONS, "canToggleBlur"),
+    (TEAMS_MEETING_PERMISSIONS, "canLeave"),
+    (TEAMS_MEETING_PERMISSIONS, "canReact"),
+    (TEAMS_MEETING_PERMISSIONS, "canToggleShareTray"),
+    (TEAMS_MEETING_PERMISSIONS, "canToggleChat"),
+    (TEAMS_MEETING_PERMISSIONS, "canStopSharing"),
+    (TEAMS_MEETING_PERMISSIONS, "canPair"),
+)
+MEETING_FIELD_BITS: Final = {
+    section_and_field: 1 << index
+    for index, section_and_field in enumerate(MEETING_FIELDS)
+}
+MEETING_FIELD_NAME_BITS: Final = {
+    field: 1 << index for index, (_, field) in enumerate(MEETING_FIELDS)
+}
+# Fields that are true if they are true in any session.
+MEETING_PRESENCE_BITS: Final = MEETING_FIELD_NAME_BITS["isInMeeting"]
+
+
+class MeetingState:
+    """Compact meeting state with one bit per tracked boolean field."""
+
+    __slots__ = ("known", "received_at", "values")
+
+    def __init__(
+        self, values: int = 0, known: int = 0, received_at: float | None = None
+    ):
+        """Initialise meeting state."""
+        # Bit set if the field is true.
+        self.values: int = values & known
+        # Bit set if the field has been reported by Teams at all.
+        self.known: int = known
+        # Monotonic time the oldest update contained in this state was received.
+        self.received_at: float | None = received_at
+
+    @classmethod
+    def from_message(cls, meeting_update: dict) -> Self:
+        """Create meeting state from a decoded meeting update message."""
+        values = 0
+        known = 0
+        sections = meeting_update.get(TEAMS_MESSAGE_MEETING_UPDATE, {})
+        for section, fields in sections.items():
+            if not isinstance(fields, dict):
+                continue
+            for field, value in fields.items():
+                bit = MEETING_FIELD_BITS.get((section, field))
+                if bit is None:
+                    continue
+                known |= bit
+                if value:
+                    values |= bit
+        return cls(values, known)
+
+    def merge(self, newer: Self) -> Self:
+        """Return a new state with the newer known fields applied on top of this one."""
+        return type(self)(
+            (self.values & ~newer.known) | newer.values,
+            self.known | newer.known,
+            min(
+                (t for t in (self.received_at, newer.received_at) if t is not None),
+                default=None,
+            ),
+        )
+
+    def changed_fields(self, previous: Self) -> int:
+        """Return bitmask of fields that are new or different compared to previous state."""
+        return self.known & (~previous.known | (self.values ^ previous.values))
+
+    def get(self, field: str) -> bool | None:
+        """Return value of the named field, or None if it is unknown."""
+        bit = MEETING_FIELD_NAME_BITS[field]
+        if not self.known & bit:
+            return None
+        return bool(self.values & bit)
+
+    def to_message(self, mask: int = -1) -> dict:
+        """Return meeting update message for all known fields in the mask."""
+        sections: dict = {}
+        selected = self.known & mask
+        for index, (section, field) in enumerate(MEETING_FIELDS):
+            bit = 1 << index
+            if selected & bit:
+                sections.setdefault(section, {})[field] = bool(self.values & bit)
+        return {TEAMS_MESSAGE_MEETING_UPDATE: sections}
+
+    @property
+    def version(self) -> str:
+        """Return a compact tag that only changes when a known field changes."""
+        return f"{self.known:x}-{self.values:x}"
+
+    def __eq__(self, other: object) -> bool:
+        """Return if both states have the same known fields and values, regardless of when they were received."""
+        if not isinstance(other, MeetingState):
+            return NotImplemented
+        return self.values == other.values and self.known == other.known
+
+    def __hash__(self) -> int:
+        """Return hash of the state."""
+        return hash((self.values, self.known))
+
+    def __repr__(self) -> str:
+        """Return representation of the state."""
+        return f"MeetingState(values={self.values:#x}, known={self.known:#x})"
+
+
+class MeetingAggregate:
+    """Combined meeting state of several sessions.
+
+    Presence fields are true if they are true in any session, all other fields come
+    from the session that is in the meeting.
+    """
+
+    def __init__(self):
+        """Initialise aggregate."""
+        # Per field, number of sessions that have reported it and that report it as true.
+        self._known_counts: list[int] = [0] * len(MEETING_FIELDS)
+        self._true_counts: list[int] = [0] * len(MEETING_FIELDS)
+        # Current state of every session that has reported any field.
+        self._sessions: dict[Hashable, MeetingState] = {}
+        # Session the other fields are taken from.
+        self._active: Hashable | None = None
+        self.state: MeetingState = MeetingState()
+        # Fields touched by updates since the aggregate was last taken.
+        self._touched: int = 0
+
+    def update(
+        self, previous: MeetingState, current: MeetingState, session: Hashable = None
+    ):
+        """Replace the previous state of one session with its current state."""
+        known_changed = (previous.known ^ current.known) & MEETING_PRESENCE_BITS
+        values_changed = (previous.values ^ current.values) & MEETING_PRESENCE_BITS
+        values, known = self.state.values, self.state.known
+        # Only the fields that differ are visited, however many sessions there are.
+        remaining = known_changed | values_changed
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            index = bit.bit_length() - 1
+            if known_changed & bit:
+                self._known_counts[index] += 1 if current.known & bit else -1
+            if values_changed & bit:
+                self._true_counts[index] += 1 if current.values & bit else -1
+            known = known | bit if self._known_counts[index] else known & ~bit
+            values = values | bit if self._true_counts[index] else values & ~bit
+        if current.known:
+            self._sessions[session] = current
+        else:
+            self._sessions.pop(session, None)
+        active = self._select_active(session)
+        self._active = active
+        other = self._sessions.get(active, MeetingState())
+        previous_state = self.state
+        self.state = MeetingState(
+            values & MEETING_PRESENCE_BITS | other.values & ~MEETING_PRESENCE_BITS,
+            known & MEETING_PRESENCE_BITS | other.known & ~MEETING_PRESENCE_BITS,
+        )
+        reported = current.known
+        if session != active:
+            # Other fields of sessions not in the meeting are not delivered.
+            reported &= MEETING_PRESENCE_BITS
+        self._touched |= (
+            reported
+            | previous_state.known ^ self.state.known
+            | previous_state.values ^ self.state.values
+        )
+
+    def _in_meeting(self, session: Hashable) -> bool:
+        """Return if the session is known and in a meeting."""
+        meeting_state = self._sessions.get(session)
+        return meeting_state is not None and bool(meeting_state.get("isInMeeting"))
+
+    def _select_active(self, updated: Hashable) -> Hashable | None:
+        """Return the session to take the other fields from after an update."""
+        if self._active in self._sessions and (
+            self._in_meeting(self._active)
+            or not any(map(self._in_meeting, self._sessions))
+        ):
+            # Stay with the session until another one is in a meeting instead.
+            return self._active
+        if self._in_meeting(updated):
+            return updated
+        in_meeting = [
+            session for session in self._sessions if self._in_meeting(session)
+        ]
+        if in_meeting:
+            return in_meeting[0]
+        if updated in self._sessions:
+            return updated
+        return next(iter(self._sessions), None)
+
+    def take(self, received_at: float | None = None) -> MeetingState:
+        """Return the known fields touched since the last call, as a meeting update."""
+        touched, self._touched = self._touched, 0
+        return MeetingState(self.state.values, self.state.known & touched, received_at)
+
+
+class MeetingUpdateCoalescer:
+    """Send isolated meeting updates at once, collapse the rest of a burst into one snapshot."""
+
+    def __init__(
+        self,
+        flush: Callable[[MeetingState], Awaitable[None]],
+        quiet_window: float,
+        max_delay: float,
+    ):
+        """Initialise coalescer."""
+        self._flush = flush
+        self.quiet_window: float = quiet_window
+        self.max_delay: float = max(max_delay, quiet_window)
+        self.snapshot: MeetingState = MeetingState()
+        self._pending: bool = False
+        self._first_pending_at: float = 0.0
+        self._first_received_at: float | None = None
+        self._last_flushed_at: float = -math.inf
+        self._timer: asyncio.TimerHandle | None = None
+        self._flush_task: asyncio.Task | None = None
+        self.received: int = 0
+        self.flushed: int = 0
+
+    @property
+    def pending(self) -> bool:
+        """Return if there are changes that have not been flushed yet."""
+        return self._pending
+
+    async def submit(self, meeting_state: MeetingState):
+        """Merge meeting state into the snapshot and schedule a flush."""
+        self.snapshot = self.snapshot.merge(meeting_state)
+        self.received += 1
+        if not self._pending:
+            self._first_received_at = meeting_state.received_at
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self.quiet_window <= 0 or (
+            not self._pending and now - self._last_flushed_at >= self.quiet_window
+        ):
+            # Nothing was sent recently, so this is not part of a burst (yet).
+            self._pending = True
+            await self.flush()
+            return
+        if not self._pending:
+            self._pending = True
+            self._first_pending_at = now
+        # Flush after a quiet period, but never later than the maximum delay.
+        deadline = min(now + self.quiet_window, self._first_pending_at + self.max_delay)
+        if self._timer:
+            self._timer.cancel()
+        self._timer = loop.call_at(deadline, self._schedule_flush)
+
+    def _schedule_flush(self):
+        """Run the flush from the timer callback."""
+        self._timer = None
+        self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self):
+        """Flush the current snapshot immediately if changes are pending."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        self._pending = False
+        self._last_flushed_at = asyncio.get_running_loop().time()
+        self.flushed += 1
+        # The snapshot covers everything ever received, only the flushed updates count.
+        await self._flush(
+            MeetingState(
+                self.snapshot.values, self.snapshot.known, self._first_received_at
+            )
+        )
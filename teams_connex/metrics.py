@@ -0,0 +1,197 @@
+"""Metrics for the Teams to Home Assistant pipeline."""
+
+from bisect import bisect_left
+from collections.abc import Callable
+import math
+import threading
+import time
+from typing import Final
+
+# Latency buckets in seconds, from sub-millisecond to a slow Home Assistant.
+LATENCY_BUCKETS: Final = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...], extra: str = "") -> str:
+    """Format labels in OpenMetrics text notation."""
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    def __init__(self):
+        """Initialise counter."""
+        self.value: float = 0
+
+    def inc(self, amount: float = 1):
+        """Increase counter."""
+        self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down, optionally read from a function."""
+
+    def __init__(self, function: Callable[[], float | None] | None = None):
+        """Initialise gauge."""
+        self._function = function
+        self._value: float | None = 0
+
+    @property
+    def value(self) -> float | None:
+        """Return current value."""
+        return self._function() if self._function else self._value
+
+    def set(self, value: float | None):
+        """Set current value."""
+        self._value = value
+
+
+class Histogram:
+    """Distribution of observed values in fixed buckets."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        """Initialise histogram."""
+        self.buckets: tuple[float, ...] = buckets
+        # One extra bucket for values above the largest bound.
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, value: float):
+        """Record an observed value."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, quantile: float) -> float | None:
+        """Return upper bound of the bucket that contains the quantile."""
+        if not self.count:
+            return None
+        rank = math.ceil(quantile * self.count)
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else math.inf
+        return math.inf
+
+
+class MetricsRegistry:
+    """Collection of named metrics with optional labels."""
+
+    def __init__(self, prefix: str = "teams_connex"):
+        """Initialise metrics registry."""
+        self.prefix: str = prefix
+        self.started: float = time.monotonic()
+        self._lock = threading.Lock()
+        # Metric name to (type, help text, {labels: metric}).
+        self._families: dict[str, tuple[str, str, dict]] = {}
+
+    def _get(self, kind: str, name: str, help_text: str, labels: dict | None, factory):
+        """Return existing metric or register a new one."""
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            family = self._families.setdefault(
+                f"{self.prefix}_{name}", (kind, help_text, {})
+            )
+            if key not in family[2]:
+                family[2][key] = factory()
+            return family[2][key]
+
+    def counter(self, name: str, help_text: str, labels: dict | None = None) -> Counter:
+        """Return counter with the name and labels."""
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        labels: dict | None = None,
+        function: Callable[[], float | None] | None = None,
+    ) -> Gauge:
+        """Return gauge with the name and labels."""
+        return self._get("gauge", name, help_text, labels, lambda: Gauge(function))
+
+    def histogram(
+        self, name: str, help_text: str, labels: dict | None = None
+    ) -> Histogram:
+        """Return latency histogram with the name and labels."""
+        return self._get("histogram", name, help_text, labels, Histogram)
+
+    @property
+    def uptime(self) -> float:
+        """Return seconds since the registry was created."""
+        return time.monotonic() - self.started
+
+    def snapshot(self) -> dict:
+        """Return all metrics as JSON serialisable dictionary."""
+        result: dict = {"uptime_seconds": round(self.uptime, 3)}
+        with self._lock:
+            families = {
+                name: (kind, dict(metrics))
+                for name, (kind, _, metrics) in self._families.items()
+            }
+        for name, (kind, metrics) in sorted(families.items()):
+            for labels, metric in metrics.items():
+                key = name + _format_labels(labels)
+                if kind == "histogram":
+                    result[key] = {
+                        "count": metric.count,
+                        "sum": round(metric.sum, 6),
+                        "p50": metric.quantile(0.5),
+                        "p99": metric.quantile(0.99),
+                    }
+                else:
+                    result[key] = metric.value
+        return result
+
+    def render(self) -> str:
+        """Return all metrics in OpenMetrics text format."""
+        lines = [
+            f"# TYPE {self.prefix}_uptime_seconds gauge",
+            f"{self.prefix}_uptime_seconds {self.uptime:.3f}",
+        ]
+        with self._lock:
+            families = sorted(self._families.items())
+        for name, (kind, help_text, metrics) in families:
+            base = name.removesuffix("_total") if kind == "counter" else name
+            lines.extend((f"# TYPE {base} {kind}", f"# HELP {base} {help_text}"))
+            for labels, metric in list(metrics.items()):
+                if kind == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(
+                        (*metric.buckets, math.inf), metric.counts, strict=True
+                    ):
+                        cumulative += count
+                        bucket = _format_labels(
+                            labels, f'le="{"+Inf" if bound == math.inf else bound}"'
+                        )
+                        lines.append(f"{name}_bucket{bucket} {cumulative}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {metric.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {metric.sum}")
+                else:
+                    value = metric.value
+                    if value is not None:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,118 @@
+"""Bounded outbound queue between websocket and webhook delivery."""
+
+import asyncio
+from collections import deque
+from collections.abc import Callable
+from enum import StrEnum
+import logging
+import time
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OverflowPolicy(StrEnum):
+    """What to do with a new item when the queue is full."""
+
+    # Discard the oldest queued item to make room.
+    DROP_OLDEST = "drop_oldest"
+    # Merge the new item into the newest queued item.
+    COALESCE = "coalesce"
+    # Wait until a delivery worker has made room.
+    BLOCK = "block"
+
+
+class OutboundQueue:
+    """Bounded FIFO queue with a configurable overflow policy."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        policy: OverflowPolicy = OverflowPolicy.COALESCE,
+        coalesce: Callable[[Any, Any], Any] | None = None,
+    ):
+        """Initialise outbound queue."""
+        if maxsize < 1:
+            raise ValueError("Queue size must be at least 1")
+        if policy == OverflowPolicy.COALESCE and coalesce is None:
+            raise ValueError("Coalescing requires a merge function")
+        self.maxsize: int = maxsize
+        self.policy: OverflowPolicy = policy
+        self._coalesce = coalesce
+        # Entries are tuples of (time enqueued, item).
+        self._items: deque[tuple[float, Any]] = deque()
+        self._condition = asyncio.Condition()
+        self._unfinished: int = 0
+        self.enqueued: int = 0
+        self.dropped: int = 0
+        self.coalesced: int = 0
+        self.last_wait: float = 0.0
+        self.max_wait: float = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Return number of items currently waiting."""
+        return len(self._items)
+
+    @property
+    def full(self) -> bool:
+        """Return if the queue is full."""
+        return len(self._items) >= self.maxsize
+
+    @property
+    def stats(self) -> dict:
+        """Return queue statistics."""
+        return {
+            "depth": self.depth,
+            "maxsize": self.maxsize,
+            "policy": str(self.policy),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "last_wait": self.last_wait,
+            "max_wait": self.max_wait,
+        }
+
+    async def put(self, item: Any):
+        """Add item to the queue, applying the overflow policy if full."""
+        async with self._condition:
+            if self.full:
+                if self.policy == OverflowPolicy.BLOCK:
+                    await self._condition.wait_for(lambda: not self.full)
+                elif self.policy == OverflowPolicy.DROP_OLDEST:
+                    self._items.popleft()
+                    self._unfinished -= 1
+                    self.dropped += 1
+                    _LOGGER.debug("Outbound queue full, dropped oldest item")
+                else:
+                    # Keep the original enqueue time so that wait time stays honest.
+                    enqueued_at, newest = self._items.pop()
+                    self._items.append((enqueued_at, self._coalesce(newest, item)))
+                    self.coalesced += 1
+                    _LOGGER.debug("Outbound queue full, coalesced item")
+                    return
+            self._items.append((time.monotonic(), item))
+            self._unfinished += 1
+            self.enqueued += 1
+            self._condition.notify_all()
+
+    async def get(self) -> Any:
+        """Remove and return the oldest item, waiting if necessary."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._items)
+            enqueued_at, item = self._items.popleft()
+            self.last_wait = time.monotonic() - enqueued_at
+            self.max_wait = max(self.max_wait, self.last_wait)
+            self._condition.notify_all()
+            return item
+
+    async def task_done(self):
+        """Indicate that a previously retrieved item has been processed."""
+        async with self._condition:
+            self._unfinished -= 1
+            self._condition.notify_all()
+
+    async def join(self):
+        """Wait until all queued items have been processed."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._unfinished <= 0)
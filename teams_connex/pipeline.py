@@ -0,0 +1,858 @@
+"""Teams to Home Assistant pipeline, independent of the user interface."""
+
+import asyncio
+from http import HTTPStatus
+import json
+import logging
+import os
+import time
+
+from teams_connex.commands import COMMANDS, CommandError, build_command
+from teams_connex.configuration import ConfigurationStore
+from teams_connex.consts import (
+    COMMAND_SESSION_PARAMETER,
+    COMMANDS_PATH,
+    CONFIGURATION_COALESCE_MAX_DELAY,
+    CONFIGURATION_COALESCE_QUIET_WINDOW,
+    CONFIGURATION_CONTROL_PORT,
+    CONFIGURATION_CONTROL_SOCKET,
+    CONFIGURATION_DEBUG_MODE,
+    CONFIGURATION_HEALTH_PROBE_INTERVAL,
+    CONFIGURATION_HEARTBEAT_INTERVAL,
+    CONFIGURATION_JOURNAL,
+    CONFIGURATION_METRICS_PORT,
+    CONFIGURATION_OUTBOUND_QUEUE_POLICY,
+    CONFIGURATION_OUTBOUND_QUEUE_SIZE,
+    CONFIGURATION_SESSION_HOST,
+    CONFIGURATION_SESSION_NAME,
+    CONFIGURATION_SESSION_PORT,
+    CONFIGURATION_SESSION_SINKS,
+    CONFIGURATION_SESSIONS,
+    CONFIGURATION_SETTINGS,
+    CONFIGURATION_SINKS,
+    CONFIGURATION_STATE_PORT,
+    CONFIGURATION_STATE_SOCKET,
+    CONFIGURATION_TEAMS_TOKEN,
+    CONFIGURATION_TEAMS_TOKENS,
+    CONFIGURATION_WATCH_INTERVAL_IN_SECONDS,
+    CONFIGURATION_WEBHOOK_RETRY_ATTEMPTS,
+    CONFIGURATION_WEBHOOK_RULES,
+    CONFIGURATION_WEBHOOK_SEND_DELTA,
+    CONFIGURATION_WEBHOOK_TEMPLATE,
+    CONFIGURATION_WEBHOOK_TIMEOUT,
+    CONFIGURATION_WEBHOOK_URI,
+    CONFIGURATION_WEBSOCKET_IDLE_TIMEOUT,
+    CONFIGURATION_WEBSOCKET_PING_INTERVAL,
+    CONFIGURATION_WEBSOCKET_PING_TIMEOUT,
+    DELIVERY_RETRY_ATTEMPTS,
+    HEALTH_PROBE_INTERVAL_IN_SECONDS,
+    HEARTBEAT_INTERVAL_IN_SECONDS,
+    HTTP_SERVER_HOST,
+    JOURNAL_DIRECTORY_NAME,
+    MEETING_UPDATE_COALESCE_MAX_DELAY_IN_SECONDS,
+    MEETING_UPDATE_COALESCE_QUIET_WINDOW_IN_SECONDS,
+    METRICS_CONTENT_TYPE,
+    METRICS_PATH,
+    OUTBOUND_QUEUE_POLICY,
+    OUTBOUND_QUEUE_SIZE,
+    OUTBOX_FILE_NAME,
+    SHUTDOWN_DRAIN_TIMEOUT_IN_SECONDS,
+    STATE_EVENTS_PATH,
+    STATE_PATH,
+    WEBHOOK_SINK_NAME,
+    WEBHOOK_TIMEOUT_IN_SECONDS,
+    WEBHOOK_URI_SAMPLE,
+    WEBSOCKET_DEFAULT_SESSION_NAME,
+    WEBSOCKET_HOSTNAME,
+    WEBSOCKET_IDLE_TIMEOUT_IN_SECONDS,
+    WEBSOCKET_PING_INTERVAL_IN_SECONDS,
+    WEBSOCKET_PING_TIMEOUT_IN_SECONDS,
+    WEBSOCKET_PORT,
+)
+from teams_connex.decoder import MessageDecodeError
+from teams_connex.delivery import Outbox, RetryPolicy
+from teams_connex.feed import StateFeed
+from teams_connex.http_server import HttpRequest, HttpResponse, LocalHttpServer
+from teams_connex.journal import MeetingJournal
+from teams_connex.meeting import MeetingAggregate, MeetingState, MeetingUpdateCoalescer
+from teams_connex.metrics import MetricsRegistry
+from teams_connex.outbound import OutboundQueue, OverflowPolicy
+from teams_connex.rules import RuleError, compile_rules
+from teams_connex.session import TeamsSession
+from teams_connex.sinks import FanOut, WebhookSink, create_sink
+from teams_connex.status import ConnectionStatus, StatusChannel
+from teams_connex.templates import TemplateError, compile_template
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Pipeline:
+    """Receive meeting updates from Teams and deliver them to all sinks."""
+
+    def __init__(
+        self,
+        configuration_store: ConfigurationStore,
+        host: str = WEBSOCKET_HOSTNAME,
+        port: int = WEBSOCKET_PORT,
+    ):
+        """Initialise pipeline."""
+        self.host: str = host
+        self.port: int = port
+        self.status_channel = StatusChannel()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopping = asyncio.Event()
+        self._configuration_store = configuration_store
+        self._configuration: dict = {}
+        self.read_configuration()
+        self.metrics = MetricsRegistry()
+        self.update_log_level()
+        self.sessions: list[TeamsSession] = self.create_sessions()
+        # Any session in a meeting, updated from the changes of each session.
+        self._aggregate = MeetingAggregate()
+        # Last state handed over for delivery.
+        self._enqueued_meeting_state = MeetingState()
+        self._state_feed = StateFeed(self.metrics)
+        self._outbox = Outbox(
+            os.path.join(os.path.dirname(configuration_store.path), OUTBOX_FILE_NAME)
+        )
+        self._journal = MeetingJournal(
+            os.path.join(
+                os.path.dirname(configuration_store.path), JOURNAL_DIRECTORY_NAME
+            )
+        )
+        # Keeps journal writes in order while they run in a worker thread.
+        self._journal_lock = asyncio.Lock()
+        self._fan_out = self.create_fan_out()
+        self._outbound_queue = self.create_outbound_queue()
+        self._meeting_update_coalescer = MeetingUpdateCoalescer(
+            flush=self.enqueue_meeting_update,
+            quiet_window=self.coalesce_quiet_window,
+            max_delay=self.coalesce_max_delay,
+        )
+        self.set_up_metrics()
+
+    @property
+    def status(self) -> ConnectionStatus:
+        """Return the overall connection status."""
+        if self.webhook_uri and any(
+            session.connected and session.paired for session in self.sessions
+        ):
+            return ConnectionStatus.READY
+        if self.websocket_connected:
+            return ConnectionStatus.CONNECTED
+        return ConnectionStatus.DISCONNECTED
+
+    def status_changed(self):
+        """Publish the connection status, the user interface applies transitions."""
+        if self.status_channel.publish(self.status):
+            _LOGGER.debug("Connection status: %s", self.status_channel.status)
+
+    def _setting(self, key: str, default):
+        """Return a setting if configured, otherwise the provided default."""
+        return (
+            self._configuration[CONFIGURATION_SETTINGS][key]
+            if self._configuration
+            and CONFIGURATION_SETTINGS in self._configuration
+            and key in self._configuration[CONFIGURATION_SETTINGS]
+            else default
+        )
+
+    @property
+    def token(self) -> str:
+        """Return token if known, otherwise an empty string."""
+        return (
+            self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_TEAMS_TOKEN]
+            if self._configuration
+            and CONFIGURATION_SETTINGS in self._configuration
+            and CONFIGURATION_TEAMS_TOKEN in self._configuration[CONFIGURATION_SETTINGS]
+            else ""
+        )
+
+    @token.setter
+    def token(self, new_token: str):
+        """Set new token."""
+        if CONFIGURATION_SETTINGS not in self._configuration:
+            self._configuration[CONFIGURATION_SETTINGS] = {}
+        self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_TEAMS_TOKEN] = (
+            new_token
+        )
+        self.write_configuration()
+
+    def session_token(self, name: str) -> str:
+        """Return token of the named session if known, otherwise an empty string."""
+        if name == WEBSOCKET_DEFAULT_SESSION_NAME:
+            return self.token
+        tokens = self._setting(CONFIGURATION_TEAMS_TOKENS, None) or {}
+        return tokens.get(name, "")
+
+    def set_session_token(self, name: str, new_token: str):
+        """Set new token of the named session."""
+        if name == WEBSOCKET_DEFAULT_SESSION_NAME:
+            self.token = new_token
+            return
+        settings = self._configuration.setdefault(CONFIGURATION_SETTINGS, {})
+        settings.setdefault(CONFIGURATION_TEAMS_TOKENS, {})[name] = new_token
+        self.write_configuration()
+
+    @property
+    def webhook_uri(self) -> str:
+        """Return webhook uri if known, otherwise an empty string."""
+        return (
+            self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_WEBHOOK_URI]
+            if self._configuration
+            and CONFIGURATION_SETTINGS in self._configuration
+            and CONFIGURATION_WEBHOOK_URI in self._configuration[CONFIGURATION_SETTINGS]
+            else ""
+        )
+
+    @webhook_uri.setter
+    def webhook_uri(self, new_webhook_uri: str):
+        """Set new webhook uri."""
+        if new_webhook_uri and new_webhook_uri != WEBHOOK_URI_SAMPLE:
+            if CONFIGURATION_SETTINGS not in self._configuration:
+                self._configuration[CONFIGURATION_SETTINGS] = {}
+            self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_WEBHOOK_URI] = (
+                new_webhook_uri
+            )
+            self._webhook_sink.uri = new_webhook_uri
+            self.write_configuration()
+            self.status_changed()
+
+    @property
+    def webhook_timeout(self) -> float:
+        """Return webhook timeout in seconds."""
+        return float(
+            self._setting(CONFIGURATION_WEBHOOK_TIMEOUT, WEBHOOK_TIMEOUT_IN_SECONDS)
+        )
+
+    @property
+    def webhook_send_delta(self) -> bool:
+        """Return whether to send only changed fields to the webhook."""
+        return bool(self._setting(CONFIGURATION_WEBHOOK_SEND_DELTA, False))
+
+    @property
+    def coalesce_quiet_window(self) -> float:
+        """Return quiet period after which coalesced meeting updates are sent."""
+        return float(
+            self._setting(
+                CONFIGURATION_COALESCE_QUIET_WINDOW,
+                MEETING_UPDATE_COALESCE_QUIET_WINDOW_IN_SECONDS,
+            )
+        )
+
+    @property
+    def coalesce_max_delay(self) -> float:
+        """Return maximum time that coalesced meeting updates are held back."""
+        return float(
+            self._setting(
+                CONFIGURATION_COALESCE_MAX_DELAY,
+                MEETING_UPDATE_COALESCE_MAX_DELAY_IN_SECONDS,
+            )
+        )
+
+    @property
+    def websocket_ping_interval(self) -> float | None:
+        """Return interval of keepalive pings to Teams, or None if disabled."""
+        interval = float(
+            self._setting(
+                CONFIGURATION_WEBSOCKET_PING_INTERVAL,
+                WEBSOCKET_PING_INTERVAL_IN_SECONDS,
+            )
+        )
+        return interval or None
+
+    @property
+    def websocket_ping_timeout(self) -> float:
+        """Return time Teams has to answer a ping before the connection is dropped."""
+        return float(
+            self._setting(
+                CONFIGURATION_WEBSOCKET_PING_TIMEOUT, WEBSOCKET_PING_TIMEOUT_IN_SECONDS
+            )
+        )
+
+    @property
+    def websocket_idle_timeout(self) -> float | None:
+        """Return time without frames from Teams after which the connection is probed."""
+        timeout = float(
+            self._setting(
+                CONFIGURATION_WEBSOCKET_IDLE_TIMEOUT, WEBSOCKET_IDLE_TIMEOUT_IN_SECONDS
+            )
+        )
+        return timeout or None
+
+    @property
+    def heartbeat_interval(self) -> float:
+        """Return interval at which unchanged meeting state is re-sent, 0 if disabled."""
+        return float(
+            self._setting(
+                CONFIGURATION_HEARTBEAT_INTERVAL, HEARTBEAT_INTERVAL_IN_SECONDS
+            )
+        )
+
+    @property
+    def health_probe_interval(self) -> float:
+        """Return interval at which sinks are probed for restarts, 0 if disabled."""
+        return float(
+            self._setting(
+                CONFIGURATION_HEALTH_PROBE_INTERVAL, HEALTH_PROBE_INTERVAL_IN_SECONDS
+            )
+        )
+
+    @property
+    def journal_enabled(self) -> bool:
+        """Return whether meeting state transitions are recorded in the journal."""
+        return bool(self._setting(CONFIGURATION_JOURNAL, True))
+
+    @property
+    def metrics_port(self) -> int | None:
+        """Return local port to serve metrics on, or None if disabled."""
+        port = self._setting(CONFIGURATION_METRICS_PORT, None)
+        return int(port) if port else None
+
+    @property
+    def control_port(self) -> int | None:
+        """Return local port to accept commands on, or None if disabled."""
+        port = self._setting(CONFIGURATION_CONTROL_PORT, None)
+        return int(port) if port else None
+
+    @property
+    def control_socket(self) -> str | None:
+        """Return path of a Unix socket to accept commands on, or None if disabled."""
+        return self._setting(CONFIGURATION_CONTROL_SOCKET, None) or None
+
+    @property
+    def state_port(self) -> int | None:
+        """Return local port to serve meeting state on, or None if disabled."""
+        port = self._setting(CONFIGURATION_STATE_PORT, None)
+        return int(port) if port else None
+
+    @property
+    def state_socket(self) -> str | None:
+        """Return path of a Unix socket to serve meeting state on, or None if disabled."""
+        return self._setting(CONFIGURATION_STATE_SOCKET, None) or None
+
+    @property
+    def sink_configuration(self) -> tuple:
+        """Return all settings that sinks are created from."""
+        return (
+            self.webhook_uri,
+            self.webhook_timeout,
+            self.webhook_send_delta,
+            self._setting(
+                CONFIGURATION_WEBHOOK_RETRY_ATTEMPTS, DELIVERY_RETRY_ATTEMPTS
+            ),
+            self._setting(CONFIGURATION_WEBHOOK_TEMPLATE, None),
+            self._setting(CONFIGURATION_WEBHOOK_RULES, None),
+            self._configuration.get(CONFIGURATION_SINKS),
+        )
+
+    @property
+    def debug_mode(self) -> bool:
+        """Return whether the application is running in debug mode or not."""
+        return (
+            self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_DEBUG_MODE]
+            if self._configuration
+            and CONFIGURATION_SETTINGS in self._configuration
+            and CONFIGURATION_DEBUG_MODE in self._configuration[CONFIGURATION_SETTINGS]
+            else False
+        )
+
+    @debug_mode.setter
+    def debug_mode(self, new_value: bool):
+        """Set application's debug mode."""
+        if CONFIGURATION_SETTINGS not in self._configuration:
+            self._configuration[CONFIGURATION_SETTINGS] = {}
+        self._configuration[CONFIGURATION_SETTINGS][CONFIGURATION_DEBUG_MODE] = (
+            new_value
+        )
+        self.write_configuration()
+        self.update_log_level()
+
+    def update_log_level(self):
+        """Change log level."""
+        root = logging.getLogger()
+        root.setLevel(logging.DEBUG if self.debug_mode else logging.INFO)
+
+    def create_sessions(self) -> list[TeamsSession]:
+        """Create a session for each configured Teams instance, or the default one."""
+        sessions: dict[str, TeamsSession] = {}
+        for session_configuration in (
+            self._configuration.get(CONFIGURATION_SESSIONS) or []
+        ):
+            try:
+                host = session_configuration.get(
+                    CONFIGURATION_SESSION_HOST, WEBSOCKET_HOSTNAME
+                )
+                port = int(session_configuration[CONFIGURATION_SESSION_PORT])
+                name = str(
+                    session_configuration.get(CONFIGURATION_SESSION_NAME)
+                    or f"{host}:{port}"
+                )
+                sinks = session_configuration.get(CONFIGURATION_SESSION_SINKS)
+                sinks = [str(sink) for sink in sinks] if sinks else None
+            except (AttributeError, KeyError, TypeError, ValueError) as exc:
+                _LOGGER.warning(
+                    "Invalid session configuration %s: %s", session_configuration, exc
+                )
+                continue
+            if name in sessions:
+                _LOGGER.warning("Duplicate session name: %s", name)
+                continue
+            sessions[name] = TeamsSession(self, name, host, port, sinks)
+        if not sessions:
+            return [
+                TeamsSession(self, WEBSOCKET_DEFAULT_SESSION_NAME, self.host, self.port)
+            ]
+        return list(sessions.values())
+
+    def session(self, name: str | None = None) -> TeamsSession | None:
+        """Return the named session, or the first one if no name is given."""
+        if name is None:
+            return self.sessions[0]
+        return next((s for s in self.sessions if s.name == name), None)
+
+    @property
+    def aggregate_sinks(self) -> list[str] | None:
+        """Return names of sinks that receive the aggregate, None if all do."""
+        routed = {name for session in self.sessions for name in session.sinks or ()}
+        if not routed:
+            return None
+        return [name for name in self._fan_out.dispatchers if name not in routed]
+
+    def create_fan_out(self) -> FanOut:
+        """Create the fan-out to the webhook and all additionally configured sinks."""
+        self._webhook_sink = WebhookSink(
+            WEBHOOK_SINK_NAME,
+            self.webhook_uri,
+            timeout=self.webhook_timeout,
+            send_delta=self.webhook_send_delta,
+        )
+        template = self._setting(CONFIGURATION_WEBHOOK_TEMPLATE, None)
+        if template is not None:
+            # Compiled once here, not for every meeting update.
+            try:
+                self._webhook_sink.template = compile_template(template)
+            except TemplateError as exc:
+                _LOGGER.warning("Invalid webhook template: %s", exc)
+        rules = self._setting(CONFIGURATION_WEBHOOK_RULES, None)
+        if rules is not None:
+            try:
+                self._webhook_sink.rules = compile_rules(rules)
+            except RuleError as exc:
+                _LOGGER.warning("Invalid webhook rules: %s", exc)
+        fan_out = FanOut(self._outbox, self.metrics)
+        fan_out.add(
+            self._webhook_sink,
+            RetryPolicy(
+                attempts=int(
+                    self._setting(
+                        CONFIGURATION_WEBHOOK_RETRY_ATTEMPTS, DELIVERY_RETRY_ATTEMPTS
+                    )
+                )
+            ),
+        )
+        for sink_configuration in self._configuration.get(CONFIGURATION_SINKS) or []:
+            try:
+                fan_out.add(*create_sink(sink_configuration))
+            except (AttributeError, KeyError, TypeError, ValueError) as exc:
+                _LOGGER.warning(
+                    "Invalid sink configuration %s: %s", sink_configuration, exc
+                )
+        return fan_out
+
+    def create_outbound_queue(self) -> OutboundQueue:
+        """Create the queue between websocket and webhook delivery."""
+        maxsize = int(
+            self._setting(CONFIGURATION_OUTBOUND_QUEUE_SIZE, OUTBOUND_QUEUE_SIZE)
+        )
+        try:
+            policy = OverflowPolicy(
+                self._setting(
+                    CONFIGURATION_OUTBOUND_QUEUE_POLICY, OUTBOUND_QUEUE_POLICY
+                )
+            )
+        except ValueError as exc:
+            _LOGGER.warning("Invalid outbound queue policy: %s", exc)
+            policy = OverflowPolicy(OUTBOUND_QUEUE_POLICY)
+        return OutboundQueue(
+            maxsize=max(1, maxsize), policy=policy, coalesce=MeetingState.merge
+        )
+
+    def set_up_metrics(self):
+        """Register pipeline metrics."""
+        self._frames_received = self.metrics.counter(
+            "frames_received_total", "Websocket frames received from Teams"
+        )
+        self._frames_decoded = self.metrics.counter(
+            "frames_decoded_total", "Websocket frames decoded successfully"
+        )
+        self._decode_errors = self.metrics.counter(
+            "decode_errors_total", "Websocket frames that could not be decoded"
+        )
+        self._meeting_updates_deduped = self.metrics.counter(
+            "meeting_updates_deduped_total",
+            "Coalesced meeting updates dropped because nothing changed",
+        )
+        self._process_histogram = self.metrics.histogram(
+            "process_seconds", "Time to decode and process a websocket frame"
+        )
+        self._coalesce_histogram = self.metrics.histogram(
+            "coalesce_seconds", "Time meeting updates were held back by coalescing"
+        )
+        self._queue_wait_histogram = self.metrics.histogram(
+            "queue_wait_seconds", "Time meeting state spent in the outbound queue"
+        )
+        self.metrics.gauge(
+            "outbound_queue_depth",
+            "Meeting states waiting for delivery",
+            function=lambda: self._outbound_queue.depth,
+        )
+
+    async def serve_metrics(self, request: HttpRequest) -> HttpResponse:
+        """Return metrics in OpenMetrics text format."""
+        return HttpResponse(
+            body=self.metrics.render(), content_type=METRICS_CONTENT_TYPE
+        )
+
+    async def serve_command(self, request: HttpRequest) -> HttpResponse:
+        """Send the command in the request path to Teams and return its response."""
+        if request.from_browser:
+            # Commands act on the user's meeting, web pages must not send them.
+            return HttpResponse(HTTPStatus.FORBIDDEN, "Cross-site request refused")
+        name = request.path.removeprefix(f"{COMMANDS_PATH}/")
+        try:
+            parameters = json.loads(request.body) if request.body else {}
+        except ValueError as exc:
+            return HttpResponse(HTTPStatus.BAD_REQUEST, str(exc))
+        if not isinstance(parameters, dict):
+            return HttpResponse(
+                HTTPStatus.BAD_REQUEST, "Parameters must be a JSON object"
+            )
+        session = self.session(request.query.get(COMMAND_SESSION_PARAMETER))
+        if session is None:
+            return HttpResponse(HTTPStatus.NOT_FOUND, "Unknown session")
+        try:
+            action, teams_parameters = build_command(
+                name, session.meeting_state, parameters.get("type")
+            )
+            response = await session.commands.request(action, teams_parameters)
+        except CommandError as exc:
+            _LOGGER.info("Command %s failed: %s", name, exc)
+            return HttpResponse(exc.status, str(exc))
+        return HttpResponse(
+            body=json.dumps({"response": response}), content_type="application/json"
+        )
+
+    def create_http_servers(self) -> list[LocalHttpServer]:
+        """Return local servers for metrics, commands and meeting state, as configured."""
+        servers = []
+        if self.metrics_port:
+            server = LocalHttpServer(HTTP_SERVER_HOST, self.metrics_port)
+            server.route("GET", METRICS_PATH, self.serve_metrics)
+            servers.append(server)
+        if self.control_port or self.control_socket:
+            server = LocalHttpServer(
+                HTTP_SERVER_HOST, self.control_port or 0, self.control_socket
+            )
+            for name in COMMANDS:
+                server.route("POST", f"{COMMANDS_PATH}/{name}", self.serve_command)
+            servers.append(server)
+        if self.state_port or self.state_socket:
+            server = LocalHttpServer(
+                HTTP_SERVER_HOST, self.state_port or 0, self.state_socket
+            )
+            server.route("GET", STATE_PATH, self._state_feed.serve_state)
+            server.route("GET", STATE_EVENTS_PATH, self._state_feed.serve_events)
+            servers.append(server)
+        return servers
+
+    @property
+    def websocket_connected(self) -> bool:
+        """Return if the websocket of any session is connected."""
+        return any(session.connected for session in self.sessions)
+
+    @websocket_connected.setter
+    def websocket_connected(self, connected: bool):
+        """Set status if the websocket of the first session is connected or not."""
+        self.sessions[0].connected = connected
+
+    @property
+    def websocket_paired(self) -> bool:
+        """Return if the websocket of any session is paired."""
+        return any(session.paired for session in self.sessions)
+
+    @websocket_paired.setter
+    def websocket_paired(self, paired: bool):
+        """Set status if the websocket of the first session is paired or not."""
+        self.sessions[0].paired = paired
+
+    def wake_threadsafe(self, *args):
+        """Reconnect all sessions straight away, callable from any thread."""
+        for session in self.sessions:
+            session.reconnect_scheduler.wake_threadsafe()
+
+    def stop(self, *args):
+        """Stop receiving and shut down once delivery has drained, callable from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    async def run(self):
+        """Run the pipeline until stopped or cancelled."""
+        self._loop = asyncio.get_running_loop()
+        await self._fan_out.start()
+        # A single consumer keeps meeting states in order, sinks are served
+        # concurrently by their own dispatchers.
+        workers = [asyncio.create_task(self.delivery_worker())]
+        workers.append(asyncio.create_task(self.watch_configuration()))
+        workers.append(asyncio.create_task(self.heartbeat_worker()))
+        workers.append(asyncio.create_task(self.health_probe_worker()))
+        http_servers = []
+        for server in self.create_http_servers():
+            try:
+                await server.start()
+            except OSError as exc:
+                _LOGGER.warning("Unable to start local HTTP server: %s", exc)
+            else:
+                http_servers.append(server)
+        try:
+            receiver = asyncio.create_task(self.receive_messages())
+            stopping = asyncio.create_task(self._stopping.wait())
+            try:
+                await asyncio.wait(
+                    (receiver, stopping), return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                receiver.cancel()
+                stopping.cancel()
+                await asyncio.gather(receiver, stopping, return_exceptions=True)
+            if not receiver.cancelled():
+                # Receiving only ends on its own if it failed.
+                receiver.result()
+            _LOGGER.info("Stopping, delivering pending meeting updates")
+            try:
+                async with asyncio.timeout(SHUTDOWN_DRAIN_TIMEOUT_IN_SECONDS):
+                    await self.drain()
+            except TimeoutError:
+                # Undelivered state stays in the outbox and is sent on the next start.
+                _LOGGER.warning("Not all meeting updates delivered before shutdown")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Waiting clients would hold up closing the servers.
+            self._state_feed.close()
+            for server in http_servers:
+                await server.close()
+            await self._fan_out.close()
+            async with self._journal_lock:
+                await asyncio.to_thread(self._journal.close, reset=self.journal_enabled)
+            await asyncio.to_thread(self._outbox.close)
+
+    async def drain(self):
+        """Wait until all received meeting updates have been handed to the sinks."""
+        await self._meeting_update_coalescer.flush()
+        await self._outbound_queue.join()
+        await self._fan_out.join()
+
+    async def receive_messages(self):
+        """Receive messages from all sessions concurrently."""
+        await asyncio.gather(*(session.run() for session in self.sessions))
+
+    def redeliver_meeting_state(self):
+        """Deliver the complete state received next, even if unchanged."""
+        self._enqueued_meeting_state = MeetingState()
+        # Sinks would otherwise skip it as already acknowledged.
+        self._fan_out.forget()
+
+    async def process_message(
+        self,
+        message: str | bytes,
+        received_at: float | None = None,
+        session: TeamsSession | None = None,
+    ):
+        """Process an incoming text or binary message from Teams."""
+        if received_at is None:
+            received_at = time.monotonic()
+        self._frames_received.inc()
+        try:
+            await (session or self.sessions[0]).dispatcher.dispatch(
+                message, received_at
+            )
+            self._frames_decoded.inc()
+        except MessageDecodeError as exc:
+            self._decode_errors.inc()
+            _LOGGER.warning("Unable to decode message: %s", exc)
+        self._process_histogram.observe(time.monotonic() - received_at)
+
+    async def session_meeting_state_changed(
+        self,
+        session: TeamsSession,
+        previous: MeetingState,
+        received_at: float | None = None,
+    ):
+        """Hand over the changes of one session to its sinks and the aggregate."""
+        if session.sinks and session.meeting_state.changed_fields(previous):
+            await self._fan_out.publish(
+                MeetingState(
+                    session.meeting_state.values,
+                    session.meeting_state.known,
+                    received_at,
+                ),
+                session.sinks,
+            )
+        self._aggregate.update(previous, session.meeting_state, session)
+        await self.submit_aggregate(received_at)
+
+    async def session_disconnected(self, session: TeamsSession, previous: MeetingState):
+        """Remove the state of a disconnected session from the aggregate."""
+        self._aggregate.update(previous, session.meeting_state, session)
+        if not self.websocket_connected:
+            # Nothing is known about meetings while disconnected.
+            self._state_feed.publish(MeetingState())
+            await self.record_meeting_state(None)
+
+    async def submit_aggregate(self, received_at: float | None = None):
+        """Submit aggregate fields changed by any session for delivery."""
+        meeting_state = self._aggregate.take(received_at)
+        if meeting_state.known:
+            # Bursts of updates are merged into one snapshot before sending.
+            await self._meeting_update_coalescer.submit(meeting_state)
+
+    async def record_meeting_state(self, meeting_state: MeetingState | None):
+        """Record a state transition in the journal, None if the state is unknown."""
+        if not self.journal_enabled:
+            return
+        # Taken here, the write may have to wait for the previous one.
+        timestamp = time.time()
+        try:
+            async with self._journal_lock:
+                if meeting_state is None:
+                    await asyncio.to_thread(self._journal.reset, timestamp)
+                else:
+                    await asyncio.to_thread(
+                        self._journal.append, meeting_state, timestamp
+                    )
+        except OSError as exc:
+            _LOGGER.warning("Unable to write journal: %s", exc)
+
+    async def enqueue_meeting_update(self, meeting_state: MeetingState):
+        """Hand over a coalesced meeting state for delivery."""
+        self._state_feed.publish(meeting_state)
+        await self.record_meeting_state(meeting_state)
+        if meeting_state.received_at is not None:
+            self._coalesce_histogram.observe(
+                time.monotonic() - meeting_state.received_at
+            )
+        # Only send if at least one tracked field has changed.
+        if not meeting_state.changed_fields(self._enqueued_meeting_state):
+            self._meeting_updates_deduped.inc()
+            _LOGGER.debug(
+                "Ignoring meeting update because no tracked field has changed"
+            )
+        elif self._fan_out.enabled:
+            self._enqueued_meeting_state = meeting_state
+            await self._outbound_queue.put(meeting_state)
+            _LOGGER.debug("Outbound queue: %s", self._outbound_queue.stats)
+        else:
+            _LOGGER.warning("Webhook URI is not set and no other sink is configured.")
+
+    async def delivery_worker(self):
+        """Deliver queued meeting updates to the webhook."""
+        while True:
+            meeting_state = await self._outbound_queue.get()
+            self._queue_wait_histogram.observe(self._outbound_queue.last_wait)
+            try:
+                await self.send_meeting_update(meeting_state)
+            finally:
+                await self._outbound_queue.task_done()
+
+    async def heartbeat_worker(self):
+        """Re-send the last meeting state periodically, in case a sink has lost it."""
+        while True:
+            # Read on every iteration, so that configuration changes apply.
+            interval = self.heartbeat_interval
+            await asyncio.sleep(interval or CONFIGURATION_WATCH_INTERVAL_IN_SECONDS)
+            if interval:
+                await self.send_heartbeat()
+
+    async def health_probe_worker(self):
+        """Probe sinks and re-send the last meeting state to those that are back."""
+        reachable: dict[str, bool] = {}
+        while True:
+            interval = self.health_probe_interval
+            await asyncio.sleep(interval or CONFIGURATION_WATCH_INTERVAL_IN_SECONDS)
+            if not interval:
+                continue
+            previous, reachable = reachable, await self._fan_out.probe()
+            recovered = [
+                name
+                for name, up in reachable.items()
+                if up and previous.get(name) is False
+            ]
+            if recovered:
+                # Likely restarted and lost the state it had before.
+                _LOGGER.info("Reachable again, re-sending meeting state: %s", recovered)
+                await self.send_heartbeat(recovered)
+
+    async def send_heartbeat(self, names: list[str] | None = None):
+        """Re-send the last meeting state handed over for delivery, if idle."""
+        for session in self.sessions:
+            if session.sinks and session.meeting_state.known:
+                await self._fan_out.heartbeat(
+                    session.meeting_state,
+                    [name for name in session.sinks if names is None or name in names],
+                )
+        aggregate_sinks = self.aggregate_sinks
+        if aggregate_sinks is not None:
+            names = [name for name in aggregate_sinks if names is None or name in names]
+        if self._enqueued_meeting_state.known and not self._outbound_queue.depth:
+            await self._fan_out.heartbeat(self._enqueued_meeting_state, names)
+
+    async def send_meeting_update(self, meeting_state: MeetingState):
+        """Send meeting state to all sinks that receive the aggregate."""
+        await self._fan_out.publish(meeting_state, self.aggregate_sinks)
+
+    def read_configuration(self):
+        """Read application configuration from file."""
+        self._configuration = self._configuration_store.read()
+
+    def write_configuration(self):
+        """Write configuration to file in the background."""
+        self._configuration_store.save(self._configuration)
+
+    def flush_configuration(self):
+        """Write pending configuration changes to file now."""
+        self._configuration_store.flush()
+
+    async def watch_configuration(self):
+        """Apply changes made to the configuration file while running."""
+        while True:
+            await asyncio.sleep(CONFIGURATION_WATCH_INTERVAL_IN_SECONDS)
+            configuration = await asyncio.to_thread(self._configuration_store.reload)
+            if configuration is not None:
+                await self.apply_configuration(configuration)
+
+    async def apply_configuration(self, configuration: dict):
+        """Apply a changed configuration without dropping the websocket connection."""
+        previous_sink_configuration = self.sink_configuration
+        self._configuration = configuration
+        self.update_log_level()
+        self._meeting_update_coalescer.quiet_window = self.coalesce_quiet_window
+        self._meeting_update_coalescer.max_delay = max(
+            self.coalesce_max_delay, self.coalesce_quiet_window
+        )
+        if self.sink_configuration != previous_sink_configuration:
+            _LOGGER.info("Sink configuration changed, replacing sinks")
+            previous_fan_out = self._fan_out
+            self._fan_out = self.create_fan_out()
+            await self._fan_out.start()
+            await previous_fan_out.close()
+            # Bring new sinks up to date straight away.
+            if self._enqueued_meeting_state.known:
+                await self._fan_out.publish(
+                    self._enqueued_meeting_state, self.aggregate_sinks
+                )
+            for session in self.sessions:
+                if session.sinks and session.meeting_state.known:
+                    await self._fan_out.publish(session.meeting_state, session.sinks)
+            self.status_changed()
@@ -0,0 +1,135 @@
+"""Websocket reconnect scheduling."""
+
+import asyncio
+import contextlib
+import logging
+import time
+
+from teams_connex.consts import (
+    WEBSOCKET_RECONNECT_MAX_DELAY_IN_SECONDS,
+    WEBSOCKET_RECONNECT_MIN_DELAY_IN_SECONDS,
+    WEBSOCKET_RECONNECT_PROBE_INTERVAL_IN_SECONDS,
+    WEBSOCKET_RECONNECT_PROBE_TIMEOUT_IN_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ReconnectScheduler:
+    """Decide when to reconnect to Teams, using adaptive backoff and early wake-ups."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        min_delay: float = WEBSOCKET_RECONNECT_MIN_DELAY_IN_SECONDS,
+        max_delay: float = WEBSOCKET_RECONNECT_MAX_DELAY_IN_SECONDS,
+    ):
+        """Initialise reconnect scheduler."""
+        self.host: str = host
+        self.port: int = port
+        self.min_delay: float = min_delay
+        self.max_delay: float = max(max_delay, min_delay)
+        self.probe_interval: float = WEBSOCKET_RECONNECT_PROBE_INTERVAL_IN_SECONDS
+        self._delay: float = min_delay
+        self._wake = asyncio.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._disconnected_at: float | None = None
+        # Whether the port may be closed, so that probing it tells when Teams is back.
+        self._probe: bool = True
+        self.reconnects: int = 0
+        self.last_reconnect_duration: float | None = None
+
+    @property
+    def delay(self) -> float:
+        """Return delay before the next reconnect attempt."""
+        return self._delay
+
+    @property
+    def stats(self) -> dict:
+        """Return reconnect statistics."""
+        return {
+            "reconnects": self.reconnects,
+            "last_reconnect_duration": self.last_reconnect_duration,
+            "delay": self._delay,
+        }
+
+    def start(self):
+        """Bind to the running event loop, so that wake-ups from other threads arrive."""
+        self._loop = asyncio.get_running_loop()
+
+    def connected(self):
+        """Record a successful connection and reset the backoff."""
+        # A wake-up while connected must not skip the backoff after the next failure.
+        self._wake.clear()
+        if self._disconnected_at is not None:
+            self.last_reconnect_duration = time.monotonic() - self._disconnected_at
+            self.reconnects += 1
+            _LOGGER.info(
+                "Reconnected to Teams after %.1f seconds", self.last_reconnect_duration
+            )
+        self._disconnected_at = None
+        self._delay = self.min_delay
+
+    def disconnected(self, clean: bool = False, listening: bool = False):
+        """Record a lost connection or a failed connection attempt.
+
+        Listening means Teams accepted the connection, but closed it with an error or
+        rejected the handshake, so an open port does not end the backoff early.
+        """
+        if self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
+        self._probe = not listening
+        if clean:
+            # Teams closed the connection on purpose, it is likely to be back soon.
+            self._delay = self.min_delay
+
+    def wake(self):
+        """Reconnect immediately instead of waiting for the backoff to expire."""
+        self._wake.set()
+
+    def wake_threadsafe(self, *args):
+        """Reconnect immediately, callable from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def wait(self):
+        """Wait until the next reconnect attempt is due."""
+        delay = self._delay
+        _LOGGER.debug("Reconnecting in up to %.1f seconds", delay)
+        tasks = {asyncio.create_task(self._wake.wait())}
+        if self._probe:
+            tasks.add(asyncio.create_task(self._probe_until_available()))
+        done, pending = await asyncio.wait(
+            tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._wake.clear()
+        if done:
+            _LOGGER.debug("Reconnecting early")
+        else:
+            self._delay = min(self.max_delay, delay * 2)
+
+    async def probe(self) -> bool:
+        """Return if something is accepting connections on the Teams port."""
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port),
+                timeout=WEBSOCKET_RECONNECT_PROBE_TIMEOUT_IN_SECONDS,
+            )
+        except OSError:
+            return False
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+        return True
+
+    async def _probe_until_available(self):
+        """Probe the Teams port periodically until it accepts connections."""
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            if await self.probe():
+                _LOGGER.debug("Teams port %s is accepting connections", self.port)
+                return
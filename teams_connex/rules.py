@@ -0,0 +1,178 @@
+"""Rules that decide whether meeting state is delivered to a sink.
+
+Rules are configured per sink, all of them are optional:
+
+    include: [isInMeeting, isVideoOn]  # or exclude: [canReact, canToggleChat]
+    rate_limit: 0.5                    # deliveries per second
+    burst: 2                           # deliveries allowed at once
+    quiet_hours: ["22:00-07:00"]       # local time
+
+Rules are compiled once into bitmasks, checking them does not depend on how many
+fields, windows or sinks there are.
+"""
+
+from enum import StrEnum
+import time
+from typing import Final
+
+from teams_connex.consts import (
+    CONFIGURATION_RULE_BURST,
+    CONFIGURATION_RULE_EXCLUDE,
+    CONFIGURATION_RULE_INCLUDE,
+    CONFIGURATION_RULE_QUIET_HOURS,
+    CONFIGURATION_RULE_RATE_LIMIT,
+    DELIVERY_RATE_LIMIT_BURST,
+)
+from teams_connex.meeting import MEETING_FIELD_NAME_BITS
+
+MINUTES_PER_DAY: Final = 24 * 60
+
+
+class RuleError(ValueError):
+    """Rules cannot be compiled."""
+
+
+class RuleDecision(StrEnum):
+    """Outcome of checking meeting state against the rules of a sink."""
+
+    DELIVER = "deliver"
+    # None of the changed fields is of interest to the sink.
+    FILTERED = "filtered"
+    # Delivery is deferred until a token is available again.
+    RATE_LIMITED = "rate_limited"
+    # Delivery is deferred until the quiet hours are over.
+    QUIET_HOURS = "quiet_hours"
+
+
+class TokenBucket:
+    """Allow a number of events per second with bursts of up to a number of events."""
+
+    def __init__(self, rate: float, burst: int = DELIVERY_RATE_LIMIT_BURST):
+        """Initialise token bucket, starting full."""
+        self.rate: float = rate
+        self.burst: int = burst
+        self._tokens: float = burst
+        self._updated: float | None = None
+
+    def _refill(self, now: float):
+        """Add the tokens accumulated since the last refill."""
+        if self._updated is not None:
+            elapsed = max(now - self._updated, 0)
+            self._tokens = min(self._tokens + elapsed * self.rate, self.burst)
+        self._updated = now
+
+    def available(self, now: float) -> bool:
+        """Return whether a token can be taken now."""
+        self._refill(now)
+        return self._tokens >= 1
+
+    def take(self, now: float) -> bool:
+        """Take a token, return False if none is available."""
+        if not self.available(now):
+            return False
+        self._tokens -= 1
+        return True
+
+
+class DeliveryRules:
+    """Compiled rules of one sink."""
+
+    def __init__(
+        self,
+        fields: int = -1,
+        rate_limit: TokenBucket | None = None,
+        quiet_minutes: int = 0,
+    ):
+        """Initialise rules."""
+        # Bitmask of the fields whose changes are delivered.
+        self.fields: int = fields
+        self.rate_limit: TokenBucket | None = rate_limit
+        # Bit n is set if minute n of the day is quiet.
+        self.quiet_minutes: int = quiet_minutes
+
+    def quiet(self, minute: int | None = None) -> bool:
+        """Return whether the minute of the day, by default the current one, is quiet."""
+        if not self.quiet_minutes:
+            return False
+        if minute is None:
+            now = time.localtime()
+            minute = now.tm_hour * 60 + now.tm_min
+        return self.quiet_minutes >> minute & 1 == 1
+
+    def check(
+        self, changed_fields: int, now: float | None = None, minute: int | None = None
+    ) -> RuleDecision:
+        """Return whether changed fields are delivered, taking a token if they are."""
+        if not changed_fields & self.fields:
+            return RuleDecision.FILTERED
+        if self.quiet(minute):
+            return RuleDecision.QUIET_HOURS
+        if self.rate_limit is not None and not self.rate_limit.take(
+            time.monotonic() if now is None else now
+        ):
+            return RuleDecision.RATE_LIMITED
+        return RuleDecision.DELIVER
+
+
+def compile_rules(configuration: dict) -> DeliveryRules:
+    """Compile a rules mapping into delivery rules."""
+    if not isinstance(configuration, dict):
+        raise RuleError(f"Rules must be a mapping: {configuration!r}")
+    include = configuration.get(CONFIGURATION_RULE_INCLUDE)
+    exclude = configuration.get(CONFIGURATION_RULE_EXCLUDE)
+    fields = -1 if include is None else _field_bits(include)
+    if exclude is not None:
+        fields &= ~_field_bits(exclude)
+    rate_limit = None
+    rate = configuration.get(CONFIGURATION_RULE_RATE_LIMIT)
+    if rate is not None:
+        try:
+            rate = float(rate)
+            burst = int(
+                configuration.get(CONFIGURATION_RULE_BURST, DELIVERY_RATE_LIMIT_BURST)
+            )
+        except (TypeError, ValueError) as exc:
+            raise RuleError(f"Invalid rate limit: {exc}") from exc
+        if rate <= 0 or burst < 1:
+            raise RuleError(f"Rate limit and burst must be positive: {rate}, {burst}")
+        rate_limit = TokenBucket(rate, burst)
+    quiet_minutes = 0
+    for window in configuration.get(CONFIGURATION_RULE_QUIET_HOURS) or []:
+        quiet_minutes |= _window_bits(window)
+    return DeliveryRules(fields, rate_limit, quiet_minutes)
+
+
+def _field_bits(names: list) -> int:
+    """Return bitmask of the named meeting fields."""
+    if isinstance(names, str):
+        names = [names]
+    bits = 0
+    for name in names:
+        if name not in MEETING_FIELD_NAME_BITS:
+            raise RuleError(f"Unknown field {name!r}")
+        bits |= MEETING_FIELD_NAME_BITS[name]
+    return bits
+
+
+def _minute(value: str) -> int:
+    """Return minute of the day of a HH:MM time, 24:00 being the end of the day."""
+    hours, separator, minutes = value.strip().partition(":")
+    if not separator or not hours.isdigit() or not minutes.isdigit():
+        raise RuleError(f"Invalid time {value!r}, expected HH:MM")
+    minute = int(hours) * 60 + int(minutes)
+    if int(minutes) >= 60 or minute > MINUTES_PER_DAY:  # noqa: PLR2004
+        raise RuleError(f"Invalid time {value!r}")
+    return minute
+
+
+def _window_bits(window: str) -> int:
+    """Return bitmask of the minutes in a HH:MM-HH:MM window, wrapping at midnight."""
+    if not isinstance(window, str) or "-" not in window:
+        raise RuleError(f"Invalid quiet hours {window!r}, expected HH:MM-HH:MM")
+    start, _, end = window.partition("-")
+    first = _minute(start)
+    last = _minute(end)
+    if first <= last:
+        return (1 << last) - (1 << first)
+    # Wraps around midnight.
+    return (1 << MINUTES_PER_DAY) - (1 << first) | (1 << last) - 1
@@ -0,0 +1,321 @@
+"""Websocket sessions with Teams instances, several of which share one event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from teams_connex.commands import CommandChannel, CommandError
+from teams_connex.consts import (
+    WEBSOCKET_APPLICATION_NAME,
+    WEBSOCKET_APPLICATION_VERSION,
+    WEBSOCKET_DEFAULT_SESSION_NAME,
+    WEBSOCKET_MANUFACTURER,
+    WEBSOCKET_PAIRING_REQUEST_TIMEOUT_IN_SECONDS,
+    WEBSOCKET_PAIRING_TOKEN_TIMEOUT_IN_SECONDS,
+)
+from teams_connex.decoder import (
+    MeetingUpdate,
+    MessageDispatcher,
+    Response,
+    TokenRefresh,
+)
+from teams_connex.meeting import MeetingState
+from teams_connex.reconnect import ReconnectScheduler
+
+if TYPE_CHECKING:
+    from teams_connex.pipeline import Pipeline
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TeamsSession:
+    """Connection to one Teams instance, with its own token, pairing state and commands."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        pipeline: Pipeline,
+        name: str,
+        host: str,
+        port: int,
+        sinks: list[str] | None = None,
+    ):
+        """Initialise session."""
+        self.name: str = name
+        self.host: str = host
+        self.port: int = port
+        # Sinks that receive the state of this session only, instead of the aggregate.
+        self.sinks: list[str] | None = sinks
+        self._pipeline = pipeline
+        # The only session is reported without labels, like before sessions existed.
+        labels = None if name == WEBSOCKET_DEFAULT_SESSION_NAME else {"session": name}
+        self.commands = CommandChannel(pipeline.metrics, labels=labels)
+        # Latest meeting state and permissions reported by Teams, before coalescing.
+        self.meeting_state = MeetingState()
+        self._connected: bool = False
+        self._paired: bool = False
+        self._can_pair: bool = False
+        self._pairing_request: asyncio.Task | None = None
+        self._token_refreshed = asyncio.Event()
+        self.reconnect_scheduler = ReconnectScheduler(host, port)
+        self.dispatcher = MessageDispatcher()
+        self.dispatcher.register(TokenRefresh, self.process_token_refresh)
+        self.dispatcher.register(MeetingUpdate, self.process_meeting_update)
+        self.dispatcher.register(Response, self.process_response)
+        self.set_up_metrics(labels)
+
+    def set_up_metrics(self, labels: dict | None):
+        """Register session metrics."""
+        metrics = self._pipeline.metrics
+        self._stale_connections = metrics.counter(
+            "stale_connections_total",
+            "Websocket connections dropped because Teams stopped responding",
+            labels,
+        )
+        metrics.gauge(
+            "reconnects",
+            "Reconnects to Teams",
+            labels,
+            function=lambda: self.reconnect_scheduler.reconnects,
+        )
+        metrics.gauge(
+            "last_reconnect_seconds",
+            "Duration of the last reconnect to Teams",
+            labels,
+            function=lambda: self.reconnect_scheduler.last_reconnect_duration,
+        )
+        metrics.gauge(
+            "websocket_connected",
+            "Whether the websocket is connected",
+            labels,
+            function=lambda: int(self.connected),
+        )
+
+    @property
+    def uri(self) -> str:
+        """Return websocket URI including the current token."""
+        return f"ws://{self.host}:{self.port}?token={self.token}&protocol-version=2.0.0&manufacturer={WEBSOCKET_MANUFACTURER}&device=Mac&app={WEBSOCKET_APPLICATION_NAME}&app-version={WEBSOCKET_APPLICATION_VERSION}"
+
+    @property
+    def token(self) -> str:
+        """Return token if known, otherwise an empty string."""
+        return self._pipeline.session_token(self.name)
+
+    @token.setter
+    def token(self, new_token: str):
+        """Set new token."""
+        self._pipeline.set_session_token(self.name, new_token)
+
+    @property
+    def connected(self) -> bool:
+        """Return if websocket is connected."""
+        return self._connected
+
+    @connected.setter
+    def connected(self, connected: bool):
+        """Set status if websocket is connected or not."""
+        self._connected = connected
+        self._pipeline.status_changed()
+
+    @property
+    def paired(self) -> bool:
+        """Return if websocket is paired."""
+        return self._paired
+
+    @paired.setter
+    def paired(self, paired: bool):
+        """Set status if websocket is paired or not."""
+        self._paired = paired
+        self._pipeline.status_changed()
+
+    @property
+    def pairing_request_pending(self) -> bool:
+        """Return if websocket pairing request is currently pending."""
+        return self._pairing_request is not None and not self._pairing_request.done()
+
+    async def pair(self):
+        """Ask Teams to pair until it has issued a token."""
+        while self._can_pair and not self.token:
+            self._token_refreshed.clear()
+            try:
+                response = await self.commands.request(
+                    "pair", timeout=WEBSOCKET_PAIRING_REQUEST_TIMEOUT_IN_SECONDS
+                )
+            except CommandError as exc:
+                # Sent again with the next message that allows pairing.
+                _LOGGER.info("Pairing request to %s failed: %s", self.name, exc)
+                return
+            _LOGGER.debug("Pairing request answered by %s: %s", self.name, response)
+            # The token follows once pairing has been allowed in Teams.
+            try:
+                async with asyncio.timeout(WEBSOCKET_PAIRING_TOKEN_TIMEOUT_IN_SECONDS):
+                    await self._token_refreshed.wait()
+            except TimeoutError:
+                # The prompt in Teams may have been dismissed.
+                _LOGGER.info("No token from %s, asking to pair again", self.name)
+
+    def cancel_pairing_request(self):
+        """Stop waiting for a pairing request, for example after disconnecting."""
+        if self._pairing_request is not None:
+            self._pairing_request.cancel()
+            self._pairing_request = None
+
+    async def run(self):
+        """Receive messages from the websocket and hand them over for processing."""
+        # Loaded on first use, so that it does not delay showing the user interface.
+        import websockets  # noqa: PLC0415
+
+        # Outer loop is ensuring that the application is reconnecting to Teams if the connection is completely lost.
+        self.reconnect_scheduler.start()
+        while True:
+            uri = self.uri
+            # Reconnect at once after a clean close or a stale connection.
+            backoff = False
+            try:
+                async with websockets.connect(
+                    uri,
+                    ping_interval=self._pipeline.websocket_ping_interval,
+                    ping_timeout=self._pipeline.websocket_ping_timeout,
+                    # Do not hold up reconnecting or shutting down if Teams hangs.
+                    close_timeout=self._pipeline.websocket_ping_timeout,
+                ) as websocket:
+                    _LOGGER.debug("Websocket connection opened: %s", uri)
+                    # Inner loop is ensuring that the websocket connection is opened once and kept open.
+                    self.connected = True
+                    self.reconnect_scheduler.connected()
+                    self.commands.open(websocket.send)
+                    try:
+                        while True:
+                            if (
+                                not self.token
+                                and self._can_pair
+                                and not self.pairing_request_pending
+                            ):
+                                _LOGGER.debug(
+                                    "Sending pairing request to %s", self.name
+                                )
+                                self._pairing_request = asyncio.create_task(self.pair())
+                            # Reading messages from websocket.
+                            message = await self.receive_frame(websocket)
+                            if message is None:
+                                self.connection_stale(websocket)
+                                break
+                            received_at = time.monotonic()
+                            _LOGGER.debug("Received message: %s", message)
+                            await self._pipeline.process_message(
+                                message, received_at, self
+                            )
+                    except websockets.exceptions.ConnectionClosedOK as exc:
+                        _LOGGER.debug("Websocket connection closed ok: %s", exc)
+                        # Reconnect straight away after a clean close.
+                        self.reconnect_scheduler.disconnected(clean=True)
+                    except websockets.exceptions.ConnectionClosedError as exc:
+                        _LOGGER.debug("Websocket connection closed error: %s", exc)
+                        if (
+                            exc.rcvd is None
+                            and exc.sent is not None
+                            and exc.sent.code
+                            == websockets.frames.CloseCode.INTERNAL_ERROR
+                        ):
+                            # The keepalive ping timed out before the idle watchdog.
+                            self.connection_stale(websocket)
+                        else:
+                            self.reconnect_scheduler.disconnected(listening=True)
+                            backoff = True
+                    finally:
+                        self.cancel_pairing_request()
+                        self.commands.close()
+                        self.connected = False
+                        # Nothing is known about meetings in this session while disconnected.
+                        previous, self.meeting_state = (
+                            self.meeting_state,
+                            MeetingState(),
+                        )
+                        await self._pipeline.session_disconnected(self, previous)
+                # Other sessions may still report what this one did.
+                await self._pipeline.submit_aggregate()
+                if backoff:
+                    # Teams may close every connection, for example for a rejected token.
+                    await self.reconnect_scheduler.wait()
+            except (OSError, websockets.exceptions.InvalidHandshake) as exc:  # noqa: PERF203
+                _LOGGER.debug("Websocket connection failed: %s", exc)
+                self.connected = False
+                self.reconnect_scheduler.disconnected(
+                    listening=isinstance(exc, websockets.exceptions.InvalidHandshake)
+                )
+                # Back off before reconnecting, unless Teams is back earlier.
+                await self.reconnect_scheduler.wait()
+
+    async def receive_frame(self, websocket) -> str | bytes | None:
+        """Return the next frame, or None if Teams has stopped responding."""
+        while True:
+            try:
+                async with asyncio.timeout(self._pipeline.websocket_idle_timeout):
+                    return await websocket.recv()
+            except TimeoutError:
+                _LOGGER.debug("No frame from %s, checking the connection", self.name)
+            # Quiet is fine as long as Teams still answers pings.
+            pong = await websocket.ping()
+            try:
+                async with asyncio.timeout(self._pipeline.websocket_ping_timeout):
+                    await pong
+            except TimeoutError:
+                return None
+
+    def connection_stale(self, websocket):
+        """Tear down a connection that Teams stopped responding on."""
+        _LOGGER.warning("Teams session %s stopped responding, reconnecting", self.name)
+        self._stale_connections.inc()
+        # Closing gracefully would wait for Teams as well.
+        websocket.transport.abort()
+        self._pipeline.redeliver_meeting_state()
+        self.reconnect_scheduler.disconnected(clean=True)
+
+    async def process_token_refresh(self, token_refresh: TokenRefresh):
+        """Process a token refresh message."""
+        _LOGGER.info(
+            "Processing token refresh for %s: %s", self.name, token_refresh.token
+        )
+        self.token = token_refresh.token
+        self._token_refreshed.set()
+
+    async def process_response(self, response: Response):
+        """Process a response to a request sent to Teams."""
+        # Completes the waiting command, the receive loop is not held up.
+        if self.commands.resolve(response):
+            return
+        _LOGGER.debug(
+            "Received response to request %s: %s %s",
+            response.request_id,
+            response.response,
+            response.error or "",
+        )
+
+    async def process_meeting_update(self, meeting_update: MeetingUpdate):
+        """Process a meeting update message."""
+        # Example: {"meetingUpdate":{"meetingPermissions":{"canToggleMute":false,"canToggleVideo":false,"canToggleHand":false,"canToggleBlur":false,"canLeave":false,"canReact":false,"canToggleShareTray":false,"canToggleChat":false,"canStopSharing":false,"canPair":false}}}
+        # Example: {"meetingUpdate":{"meetingState":{"isMuted":false,"isVideoOn":false,"isHandRaised":false,"isInMeeting":false,"isRecordingOn":false,"isBackgroundBlurred":false,"isSharing":false,"hasUnreadMessages":false},"meetingPermissions":{"canToggleMute":false,"canToggleVideo":false,"canToggleHand":false,"canToggleBlur":false,"canLeave":false,"canReact":false,"canToggleShareTray":false,"canToggleChat":false,"canStopSharing":false,"canPair":false}}}
+        meeting_state = meeting_update.meeting_state
+        _LOGGER.debug("Processing meeting update from %s: %s", self.name, meeting_state)
+        # Commands are checked against the latest permissions, not the coalesced ones.
+        previous, self.meeting_state = (
+            self.meeting_state,
+            self.meeting_state.merge(meeting_state),
+        )
+        # Check if re-pairing information is available.
+        can_pair = meeting_update.can_pair
+        if can_pair is not None:
+            if can_pair:
+                self._can_pair = True
+                _LOGGER.info("Re-pairing required for %s", self.name)
+                self.token = ""
+                self.paired = False
+            else:
+                self._can_pair = False
+                # Assume we are paired if the meeting permissions say that we can't pair AND we have a token.
+                self.paired = bool(self.token)
+        await self._pipeline.session_meeting_state_changed(
+            self, previous, meeting_state.received_at
+        )
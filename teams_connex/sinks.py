@@ -0,0 +1,498 @@
+"""Sinks that meeting state is delivered to."""
+
+from abc import ABC, abstractmethod
+import asyncio
+from collections.abc import Iterable
+import contextlib
+import json
+import logging
+import os
+import stat
+from typing import Any
+
+from teams_connex.consts import (
+    CONFIGURATION_SINK_HOST,
+    CONFIGURATION_SINK_NAME,
+    CONFIGURATION_SINK_PASSWORD,
+    CONFIGURATION_SINK_PATH,
+    CONFIGURATION_SINK_PORT,
+    CONFIGURATION_SINK_RETRY_ATTEMPTS,
+    CONFIGURATION_SINK_RULES,
+    CONFIGURATION_SINK_SEND_DELTA,
+    CONFIGURATION_SINK_TEMPLATE,
+    CONFIGURATION_SINK_TIMEOUT,
+    CONFIGURATION_SINK_TOPIC,
+    CONFIGURATION_SINK_TYPE,
+    CONFIGURATION_SINK_URI,
+    CONFIGURATION_SINK_USERNAME,
+    DELIVERY_RECOVERY_INTERVAL_IN_SECONDS,
+    DELIVERY_RETRY_ATTEMPTS,
+    HEARTBEAT_KEY,
+    HEARTBEAT_VERSION,
+    MQTT_DEFAULT_PORT,
+    MQTT_DEFAULT_TOPIC,
+    SINK_TIMEOUT_IN_SECONDS,
+    WEBHOOK_TIMEOUT_IN_SECONDS,
+)
+from teams_connex.delivery import Delivery, DeliveryError, Outbox, RetryPolicy
+from teams_connex.meeting import MeetingState
+from teams_connex.metrics import MetricsRegistry
+from teams_connex.outbound import OutboundQueue, OverflowPolicy
+from teams_connex.rules import DeliveryRules, compile_rules
+from teams_connex.templates import PayloadTemplate, compile_template
+from teams_connex.webhook import WebhookClient
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Sink(ABC):
+    """Target that meeting state is delivered to."""
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float = SINK_TIMEOUT_IN_SECONDS,
+        send_delta: bool = False,
+    ):
+        """Initialise sink."""
+        self.name: str = name
+        self.timeout: float = timeout
+        self.send_delta: bool = send_delta
+        # Shape of the payload, the Teams message format if not set.
+        self.template: PayloadTemplate | None = None
+        self.rules: DeliveryRules | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Return if the sink is configured well enough to receive meeting state."""
+        return True
+
+    def render(self, meeting_state: MeetingState, mask: int = -1) -> dict:
+        """Return the known fields in the mask, shaped by the template if there is one."""
+        if self.template is None:
+            return meeting_state.to_message(mask)
+        return self.template.render(meeting_state, mask)
+
+    def payload(self, meeting_state: MeetingState, changed_fields: int) -> dict:
+        """Return the message to send for the meeting state."""
+        if not changed_fields:
+            # Heartbeat of unchanged state, receivers compare the version to skip it.
+            return {
+                **self.render(meeting_state),
+                HEARTBEAT_KEY: {HEARTBEAT_VERSION: meeting_state.version},
+            }
+        return self.render(meeting_state, changed_fields if self.send_delta else -1)
+
+    async def start(self):
+        """Start the sink."""
+
+    async def close(self):
+        """Release all resources held by the sink."""
+
+    async def probe(self) -> bool:
+        """Return whether the target is reachable."""
+        return True
+
+    async def deliver(self, meeting_state: MeetingState, changed_fields: int):
+        """Send meeting state, failing if it takes longer than the sink's timeout."""
+        try:
+            async with asyncio.timeout(self.timeout):
+                await self.send(meeting_state, changed_fields)
+        except TimeoutError as exc:
+            raise DeliveryError(f"Timed out after {self.timeout} seconds") from exc
+
+    @abstractmethod
+    async def send(self, meeting_state: MeetingState, changed_fields: int):
+        """Send meeting state, raise DeliveryError if that fails."""
+
+
+class WebhookSink(Sink):
+    """Home Assistant webhook."""
+
+    def __init__(
+        self,
+        name: str,
+        uri: str,
+        timeout: float = WEBHOOK_TIMEOUT_IN_SECONDS,
+        send_delta: bool = False,
+    ):
+        """Initialise webhook sink."""
+        super().__init__(name, timeout, send_delta)
+        self.uri: str = uri
+        self.client = WebhookClient(timeout=timeout)
+
+    @property
+    def enabled(self) -> bool:
+        """Return if the webhook URI is set."""
+        return bool(self.uri)
+
+    async def send(self, meeting_state: MeetingState, changed_fields: int):
+        """Send meeting state to the webhook."""
+        if not self.uri:
+            raise DeliveryError("Webhook URI is not set", retryable=False)
+        # Already loaded by the client, importing it at startup would slow it down.
+        import httpx  # noqa: PLC0415
+
+        try:
+            response = await self.client.put(
+                self.uri, self.payload(meeting_state, changed_fields)
+            )
+        except httpx.RequestError as exc:
+            raise DeliveryError(f"Webhook error: {exc}") from exc
+        _LOGGER.debug("Webhook response from %s: %s", self.name, response)
+        if not response.is_success:
+            raise DeliveryError(
+                f"Unexpected webhook response: {response.status_code}",
+                retryable=response.is_server_error
+                or response.status_code == httpx.codes.TOO_MANY_REQUESTS,
+            )
+
+    async def probe(self) -> bool:
+        """Return whether Home Assistant answers at all, using the pooled connection."""
+        if not self.uri:
+            return False
+        import httpx  # noqa: PLC0415
+
+        try:
+            await self.client.probe(self.uri)
+        except httpx.RequestError as exc:
+            _LOGGER.debug("Health probe of %s failed: %s", self.name, exc)
+            return False
+        return True
+
+    async def close(self):
+        """Close pooled connections."""
+        await self.client.close()
+
+
+class MqttSink(Sink):
+    """MQTT broker, requires the optional aiomqtt package."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        host: str,
+        *,
+        port: int = MQTT_DEFAULT_PORT,
+        topic: str = MQTT_DEFAULT_TOPIC,
+        username: str | None = None,
+        password: str | None = None,
+        timeout: float = SINK_TIMEOUT_IN_SECONDS,
+        send_delta: bool = False,
+    ):
+        """Initialise MQTT sink."""
+        super().__init__(name, timeout, send_delta)
+        self.host: str = host
+        self.port: int = port
+        self.topic: str = topic
+        self.username: str | None = username
+        self.password: str | None = password
+        self._stack: contextlib.AsyncExitStack | None = None
+        self._client: Any = None
+        self._error: type[Exception] = Exception
+
+    async def _connect(self):
+        """Connect to the broker unless already connected."""
+        if self._client is not None:
+            return
+        try:
+            import aiomqtt  # noqa: PLC0415
+        except ImportError as exc:
+            raise DeliveryError(
+                "MQTT support requires the aiomqtt package", retryable=False
+            ) from exc
+        self._error = aiomqtt.MqttError
+        self._stack = contextlib.AsyncExitStack()
+        try:
+            self._client = await self._stack.enter_async_context(
+                aiomqtt.Client(
+                    hostname=self.host,
+                    port=self.port,
+                    username=self.username,
+                    password=self.password,
+                )
+            )
+        except aiomqtt.MqttError as exc:
+            self._stack = None
+            raise DeliveryError(f"MQTT connection error: {exc}") from exc
+
+    async def send(self, meeting_state: MeetingState, changed_fields: int):
+        """Publish meeting state as retained message."""
+        await self._connect()
+        try:
+            await self._client.publish(
+                self.topic,
+                payload=json.dumps(self.payload(meeting_state, changed_fields)),
+                qos=1,
+                retain=True,
+            )
+        except self._error as exc:
+            await self.close()
+            raise DeliveryError(f"MQTT publish error: {exc}") from exc
+
+    async def close(self):
+        """Disconnect from the broker."""
+        stack, self._stack, self._client = self._stack, None, None
+        if stack is not None:
+            with contextlib.suppress(Exception):
+                await stack.aclose()
+
+
+class UnixSocketSink(Sink):
+    """Broadcast meeting state as JSON lines to all clients of a Unix domain socket."""
+
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        timeout: float = SINK_TIMEOUT_IN_SECONDS,
+        send_delta: bool = False,
+    ):
+        """Initialise Unix socket sink."""
+        super().__init__(name, timeout, send_delta)
+        self.path: str = path
+        self._server: asyncio.Server | None = None
+        self._clients: set[asyncio.StreamWriter] = set()
+        self._last_line: bytes | None = None
+        # Socket file created by this sink, a replacement may bind the same path.
+        self._inode: int | None = None
+
+    @property
+    def clients(self) -> int:
+        """Return number of connected clients."""
+        return len(self._clients)
+
+    async def start(self):
+        """Start listening for clients."""
+        with contextlib.suppress(FileNotFoundError):
+            # Never delete anything but a socket left behind, the path may be a typo.
+            if not stat.S_ISSOCK(os.lstat(self.path).st_mode):
+                raise FileExistsError(f"Not a socket: {self.path}")
+            os.remove(self.path)
+        self._server = await asyncio.start_unix_server(self._accept, path=self.path)
+        self._inode = os.stat(self.path).st_ino
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Register a new client and send it the latest state straight away."""
+        self._clients.add(writer)
+        if self._last_line:
+            writer.write(self._last_line)
+        # Wait until the client disconnects, anything it sends is ignored.
+        with contextlib.suppress(OSError):
+            while await reader.read(1024):
+                pass
+        self._clients.discard(writer)
+        writer.close()
+
+    async def send(self, meeting_state: MeetingState, changed_fields: int):
+        """Send meeting state to all connected clients."""
+        # New clients always get the full state, only broadcasts may be deltas.
+        self._last_line = (json.dumps(self.render(meeting_state)) + "\n").encode()
+        line = (json.dumps(self.payload(meeting_state, changed_fields)) + "\n").encode()
+        clients = list(self._clients)
+        for writer in clients:
+            writer.write(line)
+        results = await asyncio.gather(
+            *(writer.drain() for writer in clients), return_exceptions=True
+        )
+        for writer, result in zip(clients, results, strict=True):
+            if isinstance(result, Exception):
+                _LOGGER.debug("Dropping client of %s: %s", self.name, result)
+                self._clients.discard(writer)
+                writer.close()
+
+    async def close(self):
+        """Stop listening and disconnect all clients."""
+        for writer in self._clients:
+            writer.close()
+        self._clients.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        with contextlib.suppress(OSError):
+            if os.stat(self.path).st_ino == self._inode:
+                os.remove(self.path)
+        self._inode = None
+
+
+class SinkDispatcher:
+    """Deliver meeting state to one sink independently of all other sinks."""
+
+    def __init__(self, sink: Sink, delivery: Delivery):
+        """Initialise dispatcher."""
+        self.sink: Sink = sink
+        self.delivery: Delivery = delivery
+        # Only the latest state matters, so a single slot is enough.
+        self.queue = OutboundQueue(
+            maxsize=1, policy=OverflowPolicy.COALESCE, coalesce=MeetingState.merge
+        )
+
+    async def submit(self, meeting_state: MeetingState):
+        """Hand over meeting state for delivery to the sink."""
+        await self.queue.put(meeting_state)
+
+    async def run(self):
+        """Deliver queued meeting state and replay undelivered state."""
+        await self.delivery.load_pending()
+        while True:
+            try:
+                async with asyncio.timeout(
+                    DELIVERY_RECOVERY_INTERVAL_IN_SECONDS
+                    if self.delivery.pending
+                    else None
+                ):
+                    meeting_state = await self.queue.get()
+            except TimeoutError:
+                await self.delivery.recover()
+                continue
+            try:
+                await self.delivery.deliver(meeting_state)
+            finally:
+                await self.queue.task_done()
+
+
+class FanOut:
+    """Deliver meeting state to several sinks concurrently."""
+
+    def __init__(
+        self, outbox: Outbox | None = None, metrics: MetricsRegistry | None = None
+    ):
+        """Initialise fan-out."""
+        self.outbox: Outbox | None = outbox
+        self.metrics: MetricsRegistry | None = metrics
+        self.dispatchers: dict[str, SinkDispatcher] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def add(self, sink: Sink, retry_policy: RetryPolicy | None = None):
+        """Add a sink with its own delivery state."""
+        if sink.name in self.dispatchers:
+            raise ValueError(f"Duplicate sink name: {sink.name}")
+        delivery = Delivery(
+            sink.name,
+            sink.deliver,
+            retry_policy=retry_policy,
+            outbox=self.outbox,
+            metrics=self.metrics,
+            rules=sink.rules,
+        )
+        self.dispatchers[sink.name] = SinkDispatcher(sink, delivery)
+
+    @property
+    def sinks(self) -> list[Sink]:
+        """Return all sinks."""
+        return [dispatcher.sink for dispatcher in self.dispatchers.values()]
+
+    @property
+    def enabled(self) -> bool:
+        """Return if at least one sink can receive meeting state."""
+        return any(sink.enabled for sink in self.sinks)
+
+    async def start(self):
+        """Start all sinks and their delivery tasks."""
+        for dispatcher in self.dispatchers.values():
+            try:
+                await dispatcher.sink.start()
+            except OSError as exc:
+                _LOGGER.warning(
+                    "Unable to start sink %s: %s", dispatcher.sink.name, exc
+                )
+            self._tasks.append(asyncio.create_task(dispatcher.run()))
+
+    async def publish(
+        self, meeting_state: MeetingState, names: Iterable[str] | None = None
+    ):
+        """Hand over meeting state to all sinks, or only the named ones."""
+        await asyncio.gather(
+            *(
+                dispatcher.submit(meeting_state)
+                for name, dispatcher in self.dispatchers.items()
+                if dispatcher.sink.enabled and (names is None or name in names)
+            )
+        )
+
+    def forget(self):
+        """Send the next meeting state to all sinks in full, even if unchanged."""
+        for dispatcher in self.dispatchers.values():
+            dispatcher.delivery.forget()
+
+    async def heartbeat(
+        self, meeting_state: MeetingState, names: Iterable[str] | None = None
+    ):
+        """Re-send unchanged meeting state to all sinks, or only the named ones."""
+        await asyncio.gather(
+            *(
+                dispatcher.delivery.heartbeat(meeting_state)
+                for name, dispatcher in self.dispatchers.items()
+                if dispatcher.sink.enabled and (names is None or name in names)
+            )
+        )
+
+    async def probe(self) -> dict[str, bool]:
+        """Return for each enabled sink whether it is reachable."""
+        names = [name for name, d in self.dispatchers.items() if d.sink.enabled]
+        results = await asyncio.gather(
+            *(self.dispatchers[name].sink.probe() for name in names)
+        )
+        return dict(zip(names, results, strict=True))
+
+    async def join(self):
+        """Wait until all sinks have processed the meeting state handed to them."""
+        await asyncio.gather(
+            *(dispatcher.queue.join() for dispatcher in self.dispatchers.values())
+        )
+
+    async def close(self):
+        """Stop delivery tasks and close all sinks."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await asyncio.gather(
+            *(sink.close() for sink in self.sinks), return_exceptions=True
+        )
+
+
+def create_sink(configuration: dict) -> tuple[Sink, RetryPolicy]:
+    """Create a sink and its retry policy from its configuration."""
+    sink_type = configuration.get(CONFIGURATION_SINK_TYPE)
+    name = configuration.get(CONFIGURATION_SINK_NAME) or str(sink_type)
+    timeout = float(
+        configuration.get(CONFIGURATION_SINK_TIMEOUT, SINK_TIMEOUT_IN_SECONDS)
+    )
+    send_delta = bool(configuration.get(CONFIGURATION_SINK_SEND_DELTA, False))
+    retry_policy = RetryPolicy(
+        attempts=int(
+            configuration.get(
+                CONFIGURATION_SINK_RETRY_ATTEMPTS, DELIVERY_RETRY_ATTEMPTS
+            )
+        )
+    )
+    if sink_type == "webhook":
+        sink: Sink = WebhookSink(
+            name, configuration[CONFIGURATION_SINK_URI], timeout, send_delta
+        )
+    elif sink_type == "mqtt":
+        sink = MqttSink(
+            name,
+            configuration[CONFIGURATION_SINK_HOST],
+            port=int(configuration.get(CONFIGURATION_SINK_PORT, MQTT_DEFAULT_PORT)),
+            topic=configuration.get(CONFIGURATION_SINK_TOPIC, MQTT_DEFAULT_TOPIC),
+            username=configuration.get(CONFIGURATION_SINK_USERNAME),
+            password=configuration.get(CONFIGURATION_SINK_PASSWORD),
+            timeout=timeout,
+            send_delta=send_delta,
+        )
+    elif sink_type == "unix_socket":
+        sink = UnixSocketSink(
+            name, configuration[CONFIGURATION_SINK_PATH], timeout, send_delta
+        )
+    else:
+        raise ValueError(f"Unknown sink type: {sink_type}")
+    template = configuration.get(CONFIGURATION_SINK_TEMPLATE)
+    if template is not None:
+        sink.template = compile_template(template)
+    rules = configuration.get(CONFIGURATION_SINK_RULES)
+    if rules is not None:
+        sink.rules = compile_rules(rules)
+    return sink, retry_policy
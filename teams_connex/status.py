@@ -0,0 +1,46 @@
+"""Connection status handed over from the pipeline to the user interface."""
+
+from enum import StrEnum
+import threading
+
+
+class ConnectionStatus(StrEnum):
+    """Overall status shown in the status bar."""
+
+    DISCONNECTED = "disconnected"
+    # Connected to Teams, but not paired or no webhook configured.
+    CONNECTED = "connected"
+    READY = "ready"
+
+
+class StatusChannel:
+    """Publish status transitions from any thread, consume them on the user interface thread."""
+
+    def __init__(self):
+        """Initialise status channel."""
+        self._lock = threading.Lock()
+        self._status: ConnectionStatus = ConnectionStatus.DISCONNECTED
+        self._version: int = 0
+        self._consumed_version: int = 0
+
+    @property
+    def status(self) -> ConnectionStatus:
+        """Return the latest status."""
+        return self._status
+
+    def publish(self, status: ConnectionStatus) -> bool:
+        """Record the status, return whether it is a transition."""
+        with self._lock:
+            if status == self._status:
+                return False
+            self._status = status
+            self._version += 1
+            return True
+
+    def consume(self) -> ConnectionStatus | None:
+        """Return the latest status if it changed since it was last consumed."""
+        with self._lock:
+            if self._version == self._consumed_version:
+                return None
+            self._consumed_version = self._version
+            return self._status
@@ -0,0 +1,234 @@
+"""Payload templates that reshape meeting state for a sink.
+
+A template maps payload keys to meeting fields or boolean expressions of them,
+nested mappings produce nested objects, other values are sent as they are:
+
+    muted: isMuted
+    busy: isInMeeting and not isMuted
+    call:
+      video: isVideoOn
+      presenting: isSharing or isRecordingOn
+
+Templates are compiled once into bitmask checks, rendering does not parse them.
+"""
+
+from collections.abc import Callable
+import re
+from typing import Any, Final
+
+from teams_connex.meeting import MEETING_FIELD_NAME_BITS, MeetingState
+
+# Returns the value of an entry from the values, known fields and changed fields mask.
+Renderer = Callable[[int, int, int], Any]
+# Returns the result of an expression from the values of all fields.
+Predicate = Callable[[int], bool]
+
+TOKEN_PATTERN: Final = re.compile(r"\s*(?:(\()|(\))|([A-Za-z_]\w*))")
+CONSTANTS: Final = {"true": True, "false": False}
+
+
+class TemplateError(ValueError):
+    """Template cannot be compiled."""
+
+
+class PayloadTemplate:
+    """Compiled template that renders meeting state into the configured shape."""
+
+    def __init__(self, entries: list[tuple[str, int, Renderer]]):
+        """Initialise template."""
+        # Payload key, bitmask of the fields it depends on and its renderer.
+        self._entries: list[tuple[str, int, Renderer]] = entries
+        self.fields: int = 0
+        for _, required, _ in entries:
+            self.fields |= required
+
+    def render(self, meeting_state: MeetingState, mask: int = -1) -> dict:
+        """Return payload for the meeting state, only with entries depending on the mask."""
+        return self.render_bits(meeting_state.values, meeting_state.known, mask)
+
+    def render_bits(self, values: int, known: int, mask: int) -> dict:
+        """Return payload from bitmasks, entries without any fields are always included."""
+        return {
+            key: render(values, known, mask)
+            for key, required, render in self._entries
+            if required & mask or not required
+        }
+
+
+def compile_template(template: dict) -> PayloadTemplate:
+    """Compile a template mapping into a payload template."""
+    if not isinstance(template, dict):
+        raise TemplateError(f"Template must be a mapping: {template!r}")
+    entries: list[tuple[str, int, Renderer]] = []
+    for key, value in template.items():
+        if isinstance(value, dict):
+            nested = compile_template(value)
+            entries.append((str(key), nested.fields, nested.render_bits))
+        elif isinstance(value, str):
+            entries.append((str(key), *_compile_entry(value)))
+        elif value is None or isinstance(value, bool | int | float):
+            entries.append((str(key), 0, lambda values, known, mask, v=value: v))
+        else:
+            raise TemplateError(f"Unsupported template value for {key}: {value!r}")
+    return PayloadTemplate(entries)
+
+
+def _compile_entry(expression: str) -> tuple[int, Renderer]:
+    """Return fields the expression depends on and a renderer, None if one is unknown."""
+    node = _Parser(expression).parse()
+    required = _fields(node)
+    predicate = _compile(node)
+    if not required:
+        constant = predicate(0)
+        return 0, lambda values, known, mask: constant
+
+    def render(values: int, known: int, mask: int) -> bool | None:
+        if known & required != required:
+            return None
+        return predicate(values)
+
+    return required, render
+
+
+class _Parser:
+    """Recursive descent parser for boolean expressions of meeting fields."""
+
+    def __init__(self, expression: str):
+        """Initialise parser."""
+        self.expression: str = expression
+        self.tokens: list[str] = self._tokenize(expression)
+        self.position: int = 0
+
+    def _tokenize(self, expression: str) -> list[str]:
+        """Split the expression into parentheses and words."""
+        tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = TOKEN_PATTERN.match(expression, position)
+            if match is None:
+                raise TemplateError(
+                    f"Unexpected character at {position} in: {expression}"
+                )
+            tokens.append(match.group(match.lastindex))
+            position = match.end()
+        return tokens
+
+    def parse(self) -> tuple:
+        """Return the syntax tree of the whole expression."""
+        node = self._or()
+        if self.position != len(self.tokens):
+            raise TemplateError(
+                f"Unexpected {self.tokens[self.position]!r} in: {self.expression}"
+            )
+        return node
+
+    def _peek(self) -> str | None:
+        """Return the next token without consuming it."""
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self) -> str:
+        """Consume and return the next token."""
+        token = self._peek()
+        if token is None:
+            raise TemplateError(f"Unexpected end of: {self.expression}")
+        self.position += 1
+        return token
+
+    def _or(self) -> tuple:
+        """Parse a disjunction."""
+        operands = [self._and()]
+        while self._peek() == "or":
+            self._next()
+            operands.append(self._and())
+        return operands[0] if len(operands) == 1 else ("or", operands)
+
+    def _and(self) -> tuple:
+        """Parse a conjunction."""
+        operands = [self._not()]
+        while self._peek() == "and":
+            self._next()
+            operands.append(self._not())
+        return operands[0] if len(operands) == 1 else ("and", operands)
+
+    def _not(self) -> tuple:
+        """Parse a negation."""
+        if self._peek() == "not":
+            self._next()
+            return ("not", self._not())
+        return self._atom()
+
+    def _atom(self) -> tuple:
+        """Parse a field, constant or parenthesised expression."""
+        token = self._next()
+        if token == "(":
+            node = self._or()
+            if self._next() != ")":
+                raise TemplateError(f"Missing ')' in: {self.expression}")
+            return node
+        if token in CONSTANTS:
+            return ("constant", CONSTANTS[token])
+        if token in MEETING_FIELD_NAME_BITS:
+            return ("field", MEETING_FIELD_NAME_BITS[token])
+        raise TemplateError(f"Unknown field {token!r} in: {self.expression}")
+
+
+def _fields(node: tuple) -> int:
+    """Return bitmask of all fields in the syntax tree."""
+    kind, argument = node
+    if kind == "field":
+        return argument
+    if kind == "not":
+        return _fields(argument)
+    if kind in ("and", "or"):
+        fields = 0
+        for operand in argument:
+            fields |= _fields(operand)
+        return fields
+    return 0
+
+
+def _literal(node: tuple) -> tuple[int, bool] | None:
+    """Return bit and polarity if the node is a field or a negated field."""
+    kind, argument = node
+    if kind == "field":
+        return argument, True
+    if kind == "not" and argument[0] == "field":
+        return argument[1], False
+    return None
+
+
+def _compile(node: tuple) -> Predicate:
+    """Return a predicate, collapsing plain combinations of fields into one bitmask test."""
+    kind, argument = node
+    if kind == "constant":
+        return lambda values: argument
+    if kind == "field":
+        return lambda values: values & argument != 0
+    if kind == "not":
+        operand = _compile(argument)
+        return lambda values: not operand(values)
+    literals = [_literal(operand) for operand in argument]
+    if all(literal is not None for literal in literals):
+        return _compile_literals(kind, literals)
+    operands = [_compile(operand) for operand in argument]
+    if kind == "and":
+        return lambda values: all(operand(values) for operand in operands)
+    return lambda values: any(operand(values) for operand in operands)
+
+
+def _compile_literals(kind: str, literals: list[tuple[int, bool]]) -> Predicate:
+    """Return a single bitmask test for a conjunction or disjunction of fields."""
+    mask = 0
+    expected = 0
+    for bit, positive in literals:
+        mask |= bit
+        if positive:
+            expected |= bit
+    if any(bool(expected & bit) != positive for bit, positive in literals):
+        # A field and its negation, always false in a conjunction and true otherwise.
+        return lambda values: kind == "or"
+    if kind == "and":
+        return lambda values: values & mask == expected
+    # At least one field differs from the value that would make all of them false.
+    return lambda values: (values ^ ~expected) & mask != 0
@@ -0,0 +1,87 @@
+"""Webhook client."""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+from typing import TYPE_CHECKING
+
+from teams_connex.consts import (
+    WEBHOOK_CONNECT_TIMEOUT_IN_SECONDS,
+    WEBHOOK_KEEPALIVE_EXPIRY_IN_SECONDS,
+    WEBHOOK_MAX_CONNECTIONS,
+    WEBHOOK_MAX_KEEPALIVE_CONNECTIONS,
+    WEBHOOK_TIMEOUT_IN_SECONDS,
+)
+
+if TYPE_CHECKING:
+    # Imported on first use, it takes long to load and isn't needed at startup.
+    import httpx
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WebhookClient:
+    """Long-lived HTTP client with connection pooling for webhook calls."""
+
+    def __init__(
+        self,
+        timeout: float = WEBHOOK_TIMEOUT_IN_SECONDS,
+        connect_timeout: float = WEBHOOK_CONNECT_TIMEOUT_IN_SECONDS,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        """Initialise webhook client."""
+        self.timeout: float = timeout
+        self.connect_timeout: float = connect_timeout
+        self._transport: httpx.AsyncBaseTransport | None = transport
+        self._client: httpx.AsyncClient | None = None
+
+    @staticmethod
+    def http2_available() -> bool:
+        """Return if HTTP/2 support is installed."""
+        return importlib.util.find_spec("h2") is not None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the pooled client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            import httpx  # noqa: PLC0415
+
+            http2 = self.http2_available()
+            _LOGGER.debug(
+                "Creating webhook client (http2: %s, timeout: %s)", http2, self.timeout
+            )
+            self._client = httpx.AsyncClient(
+                http2=http2,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=WEBHOOK_MAX_CONNECTIONS,
+                    max_keepalive_connections=WEBHOOK_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=WEBHOOK_KEEPALIVE_EXPIRY_IN_SECONDS,
+                ),
+                headers={"Content-Type": "application/json"},
+                transport=self._transport,
+            )
+        return self._client
+
+    async def put(self, uri: str, payload: dict) -> httpx.Response:
+        """Send JSON encoded payload to the webhook."""
+        # Home Assistant expects:
+        # * Method: PUT
+        # * Content-Type: application/json
+        # * JSON encoded payload
+        return await self.client.put(uri, json=payload)
+
+    async def probe(self, uri: str) -> httpx.Response:
+        """Send a bodiless request to the server root, any response means it is up."""
+        import httpx  # noqa: PLC0415
+
+        return await self.client.head(
+            str(httpx.URL(uri).copy_with(path="/", query=None))
+        )
+
+    async def close(self):
+        """Close all pooled connections."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
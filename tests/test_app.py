@@ -38,8 +38,10 @@ def test_app_configuration_read_custom_values(mock_isfile):
         assert app.debug_mode
 
 
+@mock.patch("os.replace")
+@mock.patch("os.fsync")
 @mock.patch("os.path.isdir")
-def test_app_configuration_write_token(mock_isdir):
+def test_app_configuration_write_token(mock_isdir, mock_fsync, mock_replace):
     """Test write to app configuration file."""
     mock_isdir.return_value = True
     m = mock_open(read_data="")
@@ -47,14 +49,20 @@ def test_app_configuration_write_token(mock_isdir):
         app = TeamsConnex()
         # Token
         app.token = "test-token-2"
-        m.assert_called_with(app.configuration_file, mode="w")
+        app.flush_configuration()
+        m.assert_called_with(f"{app.configuration_file}.tmp", mode="w")
+        mock_replace.assert_called_with(
+            f"{app.configuration_file}.tmp", app.configuration_file
+        )
         writes = m.return_value.write.mock_calls
         result = concatenate_writes(writes)
         assert result == ("settings:\n" "  teams_token: test-token-2\n")
 
 
+@mock.patch("os.replace")
+@mock.patch("os.fsync")
 @mock.patch("os.path.isdir")
-def test_app_configuration_write_webhook_url(mock_isdir):
+def test_app_configuration_write_webhook_url(mock_isdir, mock_fsync, mock_replace):
     """Test write to app configuration file."""
     mock_isdir.return_value = True
     m = mock_open(read_data="")
@@ -62,13 +70,16 @@ def test_app_configuration_write_webhook_url(mock_isdir):
         app = TeamsConnex()
         # Webhook URL
         app.webhook_uri = "https://your.webhook.url/"
+        app.flush_configuration()
         writes = m.return_value.write.mock_calls
         result = concatenate_writes(writes)
         assert result == ("settings:\n" "  webhook_uri: https://your.webhook.url/\n")
 
 
+@mock.patch("os.replace")
+@mock.patch("os.fsync")
 @mock.patch("os.path.isdir")
-def test_app_configuration_write_debug_mode(mock_isdir):
+def test_app_configuration_write_debug_mode(mock_isdir, mock_fsync, mock_replace):
     """Test write to app configuration file."""
     mock_isdir.return_value = True
     m = mock_open(read_data="")
@@ -77,13 +88,16 @@ def test_app_configuration_write_debug_mode(mock_isdir):
         # Debug mode
         m.reset_mock()
         app.debug_mode = True
+        app.flush_configuration()
         writes = m.return_value.write.mock_calls
         result = concatenate_writes(writes)
         assert result == ("settings:\n" "  debug_mode: true\n")
 
 
+@mock.patch("os.replace")
+@mock.patch("os.fsync")
 @mock.patch("os.path.isdir")
-def test_app_configuration_write_values(mock_isdir):
+def test_app_configuration_write_values(mock_isdir, mock_fsync, mock_replace):
     """Test write to app configuration file."""
     mock_isdir.return_value = True
     m = mock_open(read_data="")
@@ -91,13 +105,18 @@ def test_app_configuration_write_values(mock_isdir):
         app = TeamsConnex()
         # Token
         app.token = "test-token-2"
-        m.assert_called_with(app.configuration_file, mode="w")
+        app.flush_configuration()
+        m.assert_called_with(f"{app.configuration_file}.tmp", mode="w")
+        mock_replace.assert_called_with(
+            f"{app.configuration_file}.tmp", app.configuration_file
+        )
         writes = m.return_value.write.mock_calls
         result = concatenate_writes(writes)
         assert result == ("settings:\n" "  teams_token: test-token-2\n")
         # Webhook URL
         m.reset_mock()
         app.webhook_uri = "https://your.webhook.url/"
+        app.flush_configuration()
         writes = m.return_value.write.mock_calls
         result = concatenate_writes(writes)
         assert result == (
@@ -108,6 +127,7 @@ def test_app_configuration_write_values(mock_isdir):
         # Debug mode
         m.reset_mock()
         app.debug_mode = True
+        app.flush_configuration()
         writes = m.return_value.write.mock_calls
         result = concatenate_writes(writes)
         assert result == (
@@ -160,4 +180,5 @@ def test_app_configuration_write_error(mock_isfile, mock_isdir, mock_logger):
         m.side_effect = error
         # Token
         app.token = "test-token-3"
+        app.flush_configuration()
         mock_logger.assert_called_with(ANY, error)
@@ -0,0 +1,94 @@
+"""Tests for commands sent to Teams."""
+
+import asyncio
+from http import HTTPStatus
+import json
+
+import pytest
+
+from teams_connex.commands import CommandChannel, CommandError, build_command
+from teams_connex.decoder import Response
+from teams_connex.meeting import MeetingState
+from teams_connex.metrics import MetricsRegistry
+
+PERMISSIONS = MeetingState.from_message(
+    {"meetingUpdate": {"meetingPermissions": {"canToggleMute": True, "canReact": True}}}
+)
+
+
+def test_build_command():
+    """Test commands are mapped to Teams actions and checked against permissions."""
+    assert build_command("toggle-mute", PERMISSIONS) == ("toggle-mute", {})
+    assert build_command("react", PERMISSIONS, "like") == (
+        "send-reaction",
+        {"type": "like"},
+    )
+    with pytest.raises(CommandError) as error:
+        build_command("raise-hand", PERMISSIONS)
+    assert error.value.status == HTTPStatus.CONFLICT
+    with pytest.raises(CommandError) as error:
+        build_command("react", PERMISSIONS, "dance")
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+    with pytest.raises(CommandError) as error:
+        build_command("self-destruct", PERMISSIONS)
+    assert error.value.status == HTTPStatus.NOT_FOUND
+
+
+def test_command_channel_round_trip():
+    """Test responses are matched to requests by request ID."""
+    metrics = MetricsRegistry()
+    channel = CommandChannel(metrics)
+    sent = []
+
+    async def send(message: str):
+        sent.append(json.loads(message))
+
+    async def run():
+        channel.open(send)
+        first = asyncio.create_task(channel.request("toggle-mute"))
+        second = asyncio.create_task(channel.request("toggle-video"))
+        await asyncio.sleep(0)
+        # Answered out of order.
+        assert channel.resolve(Response(sent[1]["requestId"], "Video"))
+        assert channel.resolve(Response(sent[0]["requestId"], "Mute"))
+        assert not channel.resolve(Response(sent[0]["requestId"], "Duplicate"))
+        return await first, await second
+
+    assert asyncio.run(run()) == ("Mute", "Video")
+    assert sent[0] == {"action": "toggle-mute", "parameters": {}, "requestId": 1}
+    snapshot = metrics.snapshot()
+    assert snapshot['teams_connex_command_seconds{action="toggle-mute"}']["count"] == 1
+
+
+def test_command_channel_failures():
+    """Test errors, timeouts and lost connections are reported."""
+    channel = CommandChannel(timeout=0.01)
+
+    async def send(message: str):
+        request_id = json.loads(message)["requestId"]
+        if request_id == 1:
+            channel.resolve(Response(request_id, None, "Not in a meeting"))
+
+    async def request() -> HTTPStatus:
+        try:
+            await channel.request("toggle-mute")
+        except CommandError as exc:
+            return exc.status
+        return HTTPStatus.OK
+
+    async def run():
+        not_connected = await request()
+        channel.open(send)
+        rejected = await request()
+        timed_out = await request()
+        lost = asyncio.create_task(request())
+        await asyncio.sleep(0)
+        channel.close()
+        return not_connected, rejected, timed_out, await lost
+
+    assert asyncio.run(run()) == (
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.GATEWAY_TIMEOUT,
+        HTTPStatus.BAD_GATEWAY,
+    )
@@ -0,0 +1,92 @@
+"""Tests for configuration storage."""
+
+import os
+import threading
+import time
+from unittest import mock
+
+from teams_connex.configuration import ConfigurationStore
+
+
+def test_configuration_store_debounced_write(tmp_path):
+    """Test that several saves in a row result in one atomic write."""
+    path = os.path.join(tmp_path, "teams_connex.yaml")
+    store = ConfigurationStore(path, write_delay=0.05)
+    configuration: dict = {"settings": {"teams_token": ""}}
+    with mock.patch("os.replace", wraps=os.replace) as mock_replace:
+        for token in ("", "token-1", "token-2"):
+            configuration["settings"]["teams_token"] = token
+            store.save(configuration)
+        # Later changes to the dictionary don't leak into the scheduled write.
+        configuration["settings"]["teams_token"] = "not-saved"
+        time.sleep(0.2)
+        mock_replace.assert_called_once_with(f"{path}.tmp", path)
+    assert not os.path.exists(f"{path}.tmp")
+    assert store.read() == {"settings": {"teams_token": "token-2"}}
+
+
+def test_configuration_store_skips_unchanged(tmp_path):
+    """Test that unchanged configuration is not written again."""
+    path = os.path.join(tmp_path, "teams_connex.yaml")
+    store = ConfigurationStore(path)
+    store.save({"settings": {"debug_mode": True}})
+    store.flush()
+    with mock.patch("os.replace") as mock_replace:
+        store.save({"settings": {"debug_mode": True}})
+        store.flush()
+        mock_replace.assert_not_called()
+
+
+def test_configuration_store_read_missing(tmp_path):
+    """Test reading a configuration file that doesn't exist."""
+    store = ConfigurationStore(os.path.join(tmp_path, "missing.yaml"))
+    assert store.read() == {}
+
+
+def test_configuration_store_reload(tmp_path):
+    """Test that only external changes cause a reload."""
+    path = os.path.join(tmp_path, "teams_connex.yaml")
+    store = ConfigurationStore(path)
+    assert store.read() == {}
+    assert store.reload() is None
+    store.save({"settings": {"debug_mode": False}})
+    store.flush()
+    # Own writes are not reported as changes.
+    assert store.reload() is None
+    with open(path, mode="w") as stream:
+        stream.write("settings:\n  debug_mode: true\n  webhook_uri: http://new/\n")
+    assert store.changed_on_disk
+    assert store.reload() == {
+        "settings": {"debug_mode": True, "webhook_uri": "http://new/"}
+    }
+    assert store.reload() is None
+    # Writing the previously written content again is not skipped after a reload.
+    store.save({"settings": {"debug_mode": False}})
+    store.flush()
+    assert store.read() == {"settings": {"debug_mode": False}}
+
+
+def test_configuration_store_save_during_write(tmp_path):
+    """Test that saving does not wait for a write that is still syncing to disk."""
+    path = os.path.join(tmp_path, "teams_connex.yaml")
+    store = ConfigurationStore(path, write_delay=60)
+    syncing = threading.Event()
+    release = threading.Event()
+
+    def slow_fsync(fileno: int):
+        syncing.set()
+        release.wait(1)
+
+    with mock.patch("os.fsync", side_effect=slow_fsync):
+        store.save({"settings": {"teams_token": "token-1"}})
+        writer = threading.Thread(target=store.flush)
+        writer.start()
+        assert syncing.wait(1)
+        started = time.monotonic()
+        store.save({"settings": {"teams_token": "token-2"}})
+        blocked = time.monotonic() - started
+        release.set()
+        writer.join()
+        store.flush()
+    assert blocked < 0.5  # noqa: PLR2004
+    assert store.read() == {"settings": {"teams_token": "token-2"}}
@@ -0,0 +1,63 @@
+"""Tests for request correlation."""
+
+import asyncio
+
+import pytest
+
+from teams_connex.correlation import RequestTracker
+from teams_connex.decoder import Response
+from teams_connex.metrics import MetricsRegistry
+
+
+def test_request_tracker_resolve():
+    """Test responses complete their request and IDs increase."""
+    metrics = MetricsRegistry()
+    tracker = RequestTracker(metrics)
+
+    async def run():
+        first_id, first = tracker.create(1.0)
+        second_id, second = tracker.create(1.0)
+        assert (first_id, second_id) == (1, 2)
+        assert metrics.snapshot()["teams_connex_outstanding_requests"] == 2  # noqa: PLR2004
+        assert tracker.resolve(Response(second_id, "Success"))
+        assert not tracker.resolve(Response(second_id, "Success"))
+        assert not tracker.resolve(Response(99, "Success"))
+        assert (await second).response == "Success"
+        first.cancel()
+        await asyncio.sleep(0)
+        return tracker.outstanding
+
+    assert asyncio.run(run()) == 0
+
+
+def test_request_tracker_expiry():
+    """Test requests expire at their own deadline, in any order of creation."""
+    metrics = MetricsRegistry()
+    tracker = RequestTracker(metrics)
+
+    async def run():
+        _, slow = tracker.create(0.2)
+        _, fast = tracker.create(0.01)
+        with pytest.raises(TimeoutError):
+            await fast
+        assert not slow.done()
+        with pytest.raises(TimeoutError):
+            await slow
+
+    asyncio.run(run())
+    assert tracker.outstanding == 0
+    assert metrics.snapshot()["teams_connex_expired_requests_total"] == 2  # noqa: PLR2004
+
+
+def test_request_tracker_fail_all():
+    """Test pending requests fail when the connection is lost."""
+    tracker = RequestTracker()
+
+    async def run():
+        _, future = tracker.create(1.0)
+        tracker.fail_all(ConnectionError("lost"))
+        with pytest.raises(ConnectionError):
+            await future
+
+    asyncio.run(run())
+    assert tracker.outstanding == 0
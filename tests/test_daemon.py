@@ -0,0 +1,68 @@
+"""Tests for the headless daemon."""
+
+import asyncio
+import os
+import signal
+
+from benchmarks.fakes import TOKEN, FakeHomeAssistant, FakeTeams, load_trace
+from benchmarks.pipeline import DEFAULT_TRACE
+from benchmarks.startup import import_times
+from teams_connex.configuration import ConfigurationStore
+from teams_connex.daemon import Daemon
+
+FRAME_RATE = 1000
+
+
+def test_daemon_stops_gracefully_on_sigterm(tmp_path):
+    """Test that SIGTERM drains pending updates and saves the configuration."""
+    trace = load_trace(DEFAULT_TRACE)
+    configuration_file = os.path.join(tmp_path, "teams_connex.yaml")
+
+    async def run():
+        home_assistant = FakeHomeAssistant()
+        await home_assistant.start()
+        teams = FakeTeams(trace, len(trace), rate=FRAME_RATE)
+        await teams.start()
+        with open(configuration_file, "w") as stream:
+            stream.write(f"settings:\n  webhook_uri: {home_assistant.uri}\n")
+        daemon = Daemon(configuration_file, host=teams.host, port=teams.port)
+        task = asyncio.create_task(daemon.run())
+        try:
+            async with asyncio.timeout(10):
+                await teams.done.wait()
+                received = daemon.pipeline.metrics.counter("frames_received_total", "")
+                while received.value < teams.frames_sent:
+                    await asyncio.sleep(0.01)
+                os.kill(os.getpid(), signal.SIGTERM)
+                await task
+        finally:
+            task.cancel()
+            await teams.close()
+            await home_assistant.close()
+        return home_assistant
+
+    home_assistant = asyncio.run(run())
+    # Updates still held back by coalescing were delivered before stopping.
+    _, last_payload = home_assistant.received[-1]
+    assert not last_payload["meetingUpdate"]["meetingState"]["isInMeeting"]
+    configuration = ConfigurationStore(configuration_file).read()
+    assert configuration["settings"]["teams_token"] == TOKEN
+
+
+def test_daemon_does_not_import_user_interface():
+    """Test that the daemon runs without the status bar app and rumps."""
+    # Checked in a fresh interpreter, other tests may have imported the app already.
+    times = import_times("teams_connex.daemon")
+    assert "teams_connex.app" not in times
+    assert "rumps" not in times
+
+
+def test_daemon_reload_keeps_unsaved_changes(tmp_path):
+    """Test that reloading does not discard changes that are not written yet."""
+    configuration_file = os.path.join(tmp_path, "teams_connex.yaml")
+    daemon = Daemon(configuration_file)
+    daemon.pipeline.token = TOKEN
+    asyncio.run(daemon.reload())
+    assert daemon.pipeline.token == TOKEN
+    configuration = ConfigurationStore(configuration_file).read()
+    assert configuration["settings"]["teams_token"] == TOKEN
@@ -0,0 +1,65 @@
+"""Tests for decoding and dispatching messages."""
+
+import asyncio
+
+import pytest
+
+from teams_connex.decoder import (
+    MeetingUpdate,
+    MessageDecodeError,
+    MessageDispatcher,
+    Response,
+    TokenRefresh,
+    decode_messages,
+)
+
+MEETING_UPDATE = (
+    '{"meetingUpdate":{"meetingState":{"isMuted":true},'
+    '"meetingPermissions":{"canPair":false}}}'
+)
+RECEIVED_AT = 12.5
+
+
+def test_decode_messages():
+    """Test text and binary frames are decoded into typed messages."""
+    for frame in (MEETING_UPDATE, MEETING_UPDATE.encode()):
+        (message,) = decode_messages(frame, RECEIVED_AT)
+        assert isinstance(message, MeetingUpdate)
+        assert message.meeting_state.get("isMuted")
+        assert message.can_pair is False
+        assert message.meeting_state.received_at == RECEIVED_AT
+    (token_refresh,) = decode_messages('{"tokenRefresh":"abc"}')
+    assert isinstance(token_refresh, TokenRefresh)
+    assert token_refresh.token == "abc"  # noqa: S105
+    (response,) = decode_messages('{"requestId":1,"response":"Success"}')
+    assert isinstance(response, Response)
+    assert response.request_id == 1
+    assert response.response == "Success"
+    assert decode_messages('{"somethingNew":{}}') == []
+
+
+@pytest.mark.parametrize(
+    "frame",
+    ["not json", "[1, 2]", b"\xff\xfe", '{"meetingUpdate":[]}'],
+)
+def test_decode_messages_invalid(frame):
+    """Test invalid frames raise a decode error."""
+    with pytest.raises(MessageDecodeError):
+        decode_messages(frame)
+
+
+def test_message_dispatcher():
+    """Test messages are routed to the handler for their type."""
+    received: list = []
+
+    async def handle(message):
+        received.append(message)
+
+    async def run():
+        dispatcher = MessageDispatcher()
+        dispatcher.register(TokenRefresh, handle)
+        assert await dispatcher.dispatch('{"tokenRefresh":"abc"}') == 1
+        assert await dispatcher.dispatch(MEETING_UPDATE) == 0
+
+    asyncio.run(run())
+    assert len(received) == 1
@@ -0,0 +1,168 @@
+"""Tests for reliable delivery."""
+
+import asyncio
+import os
+import time
+from unittest import mock
+
+from teams_connex.delivery import (
+    CircuitBreaker,
+    CircuitState,
+    Delivery,
+    DeliveryError,
+    Outbox,
+    RetryPolicy,
+)
+from teams_connex.meeting import MeetingState
+from teams_connex.metrics import MetricsRegistry
+
+MUTED = MeetingState.from_message(
+    {"meetingUpdate": {"meetingState": {"isMuted": True}}}
+)
+UNMUTED = MeetingState.from_message(
+    {"meetingUpdate": {"meetingState": {"isMuted": False}}}
+)
+
+
+def test_retry_policy_delay():
+    """Test exponential backoff is capped and jittered."""
+    policy = RetryPolicy(attempts=5, base_delay=1.0, max_delay=3.0)
+    for attempt in range(10):
+        assert 0 <= policy.delay(attempt) <= min(3.0, 2**attempt)
+
+
+@mock.patch("time.monotonic")
+def test_circuit_breaker(mock_monotonic):
+    """Test circuit breaker opens, half-opens and closes."""
+    mock_monotonic.return_value = 100.0
+    breaker = CircuitBreaker(threshold=2, reset_timeout=10.0)
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow()
+    mock_monotonic.return_value = 110.0
+    assert breaker.state == CircuitState.HALF_OPEN
+    # A failed trial call re-opens the circuit immediately.
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    mock_monotonic.return_value = 120.0
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_outbox(tmp_path):
+    """Test outbox keeps only the latest state per target."""
+    outbox = Outbox(os.path.join(tmp_path, "outbox.sqlite3"))
+    assert outbox.load("webhook") is None
+    outbox.store("webhook", MUTED)
+    outbox.store("webhook", UNMUTED)
+    outbox.close()
+    outbox = Outbox(os.path.join(tmp_path, "outbox.sqlite3"))
+    assert outbox.load("webhook") == UNMUTED
+    outbox.clear("webhook")
+    assert outbox.load("webhook") is None
+    outbox.close()
+
+
+def test_delivery_retry_and_recover(tmp_path):
+    """Test failed deliveries are retried, persisted and replayed."""
+    sent: list[tuple[MeetingState, int]] = []
+    available = False
+
+    async def send(meeting_state: MeetingState, changed_fields: int):
+        if not available:
+            raise DeliveryError("unavailable")
+        sent.append((meeting_state, changed_fields))
+
+    async def run():
+        nonlocal available
+        outbox = Outbox(os.path.join(tmp_path, "outbox.sqlite3"))
+        delivery = Delivery(
+            "webhook",
+            send,
+            retry_policy=RetryPolicy(attempts=2, base_delay=0),
+            circuit_breaker=CircuitBreaker(threshold=2, reset_timeout=0.05),
+            outbox=outbox,
+        )
+        assert not await delivery.deliver(MUTED)
+        assert delivery.circuit_breaker.state == CircuitState.OPEN
+        assert delivery.pending == MUTED
+        # Recovery is skipped while the circuit is open.
+        assert not await delivery.recover()
+        # A newer state replaces the pending one.
+        assert not await delivery.deliver(UNMUTED)
+        assert outbox.load("webhook") == UNMUTED
+        available = True
+        await asyncio.sleep(0.06)
+        assert await delivery.recover()
+        assert delivery.pending is None
+        assert outbox.load("webhook") is None
+        # Nothing changed since the acknowledged state.
+        assert await delivery.deliver(UNMUTED)
+        outbox.close()
+
+    asyncio.run(run())
+    assert sent == [(UNMUTED, UNMUTED.known)]
+
+
+def test_delivery_not_retryable():
+    """Test that non-retryable errors are not retried and not kept."""
+    calls: list[MeetingState] = []
+
+    async def send(meeting_state: MeetingState, changed_fields: int):
+        calls.append(meeting_state)
+        raise DeliveryError("bad request", retryable=False)
+
+    async def run():
+        delivery = Delivery("webhook", send, retry_policy=RetryPolicy(attempts=3))
+        assert not await delivery.deliver(MUTED)
+        assert delivery.pending is None
+        assert delivery.circuit_breaker.state == CircuitState.CLOSED
+
+    asyncio.run(run())
+    assert len(calls) == 1
+
+
+def test_delivery_metrics():
+    """Test that deliveries are counted and their latency recorded."""
+
+    async def send(meeting_state: MeetingState, changed_fields: int):
+        pass
+
+    metrics = MetricsRegistry()
+
+    async def run():
+        delivery = Delivery("webhook", send, metrics=metrics)
+        received = MeetingState(MUTED.values, MUTED.known, time.monotonic())
+        assert await delivery.deliver(received)
+
+    asyncio.run(run())
+    snapshot = metrics.snapshot()
+    assert snapshot['teams_connex_sent_total{sink="webhook"}'] == 1
+    assert snapshot['teams_connex_failed_total{sink="webhook"}'] == 0
+    assert snapshot['teams_connex_send_seconds{sink="webhook"}']["count"] == 1
+    assert snapshot['teams_connex_end_to_end_seconds{sink="webhook"}']["count"] == 1
+
+
+def test_delivery_heartbeat():
+    """Test unchanged state is re-sent as heartbeat, but not while state is pending."""
+    sent = []
+
+    async def send(meeting_state: MeetingState, changed_fields: int):
+        sent.append(changed_fields)
+
+    metrics = MetricsRegistry()
+
+    async def run():
+        delivery = Delivery("webhook", send, metrics=metrics)
+        assert await delivery.deliver(MUTED)
+        # Unchanged state is not sent again, unless as heartbeat.
+        assert await delivery.deliver(MUTED)
+        assert await delivery.heartbeat(MUTED)
+        delivery.pending = UNMUTED
+        assert not await delivery.heartbeat(MUTED)
+
+    asyncio.run(run())
+    assert sent == [MUTED.known, 0]
+    assert metrics.snapshot()['teams_connex_heartbeats_total{sink="webhook"}'] == 1
@@ -0,0 +1,93 @@
+"""Tests for the local meeting state feed."""
+
+import asyncio
+import json
+
+from teams_connex.feed import StateFeed
+from teams_connex.http_server import LocalHttpServer
+from teams_connex.meeting import MeetingState
+
+MUTED = MeetingState.from_message(
+    {"meetingUpdate": {"meetingState": {"isMuted": True}}}
+)
+UNMUTED = MeetingState.from_message(
+    {"meetingUpdate": {"meetingState": {"isMuted": False}}}
+)
+
+
+async def _get(port: int, target: str) -> dict:
+    """Send a GET request and return the decoded JSON body."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.partition(b"\r\n\r\n")[2])
+
+
+def test_state_feed_long_poll():
+    """Test the state is returned at once, or after it has changed from the version."""
+
+    async def run():
+        feed = StateFeed()
+        feed.publish(MUTED)
+        server = LocalHttpServer(port=0)
+        server.route("GET", "/state", feed.serve_state)
+        await server.start()
+        try:
+            current = await _get(server.bound_port, "/state")
+            poll = asyncio.create_task(
+                _get(server.bound_port, f"/state?version={current['version']}")
+            )
+            await asyncio.sleep(0.05)
+            assert not poll.done()
+            # Publishing the same state again does not wake anyone up.
+            assert not feed.publish(MUTED)
+            assert feed.publish(UNMUTED)
+            changed = await poll
+        finally:
+            feed.close()
+            await server.close()
+        return current, changed
+
+    current, changed = asyncio.run(run())
+    assert current == {**MUTED.to_message(), "version": MUTED.version}
+    assert changed == {**UNMUTED.to_message(), "version": UNMUTED.version}
+
+
+def test_state_feed_events():
+    """Test every change is streamed as server-sent event."""
+
+    async def run():
+        feed = StateFeed(keepalive=0.01)
+        feed.publish(MUTED)
+        server = LocalHttpServer(port=0)
+        server.route("GET", "/events", feed.serve_events)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", server.bound_port
+            )
+            writer.write(b"GET /events HTTP/1.1\r\n\r\n")
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            first = await reader.readuntil(b"\n\n")
+            assert feed.subscribers == 1
+            keepalive = await reader.readuntil(b"\n\n")
+            feed.publish(UNMUTED)
+            second = await reader.readuntil(b"\n\n")
+            while second.startswith(b":"):
+                second = await reader.readuntil(b"\n\n")
+            writer.close()
+        finally:
+            feed.close()
+            await server.close()
+        return head, first, keepalive, second, feed.subscribers
+
+    head, first, keepalive, second, subscribers = asyncio.run(run())
+    assert b"Content-Type: text/event-stream" in head
+    assert first.startswith(f"id: {MUTED.version}\nevent: meetingUpdate\n".encode())
+    assert keepalive == b": keepalive\n\n"
+    data = second.decode().splitlines()[2].removeprefix("data: ")
+    assert json.loads(data) == {**UNMUTED.to_message(), "version": UNMUTED.version}
+    assert subscribers == 0
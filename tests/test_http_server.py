@@ -0,0 +1,93 @@
+"""Tests for the local HTTP server."""
+
+import asyncio
+from http import HTTPStatus
+import os
+
+import pytest
+
+from teams_connex.http_server import HttpRequest, HttpResponse, LocalHttpServer
+
+
+async def _request(port: int, request: bytes) -> bytes:
+    """Send a raw request and return the raw response."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def test_local_http_server_routes():
+    """Test requests are routed by method and path."""
+
+    async def echo(request: HttpRequest) -> HttpResponse:
+        return HttpResponse(body=f"{request.query.get('name')}:{request.body.decode()}")
+
+    async def run():
+        server = LocalHttpServer(port=0)
+        server.route("POST", "/echo", echo)
+        await server.start()
+        try:
+            port = server.bound_port
+            ok = await _request(
+                port,
+                b"POST /echo?name=test HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello",
+            )
+            wrong_method = await _request(port, b"GET /echo HTTP/1.1\r\n\r\n")
+            missing = await _request(port, b"GET /missing HTTP/1.1\r\n\r\n")
+        finally:
+            await server.close()
+        return ok, wrong_method, missing
+
+    ok, wrong_method, missing = asyncio.run(run())
+    assert ok.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert ok.endswith(b"\r\n\r\ntest:hello")
+    assert wrong_method.startswith(
+        f"HTTP/1.1 {HTTPStatus.METHOD_NOT_ALLOWED.value}".encode()
+    )
+    assert missing.startswith(f"HTTP/1.1 {HTTPStatus.NOT_FOUND.value}".encode())
+
+
+def test_local_http_server_closes_connections():
+    """Test connections are closed after empty requests and failing handlers."""
+
+    async def fail(request: HttpRequest) -> HttpResponse:
+        raise TimeoutError("upstream")
+
+    async def run():
+        server = LocalHttpServer(port=0)
+        server.route("GET", "/fail", fail)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", server.bound_port
+            )
+            writer.write_eof()
+            async with asyncio.timeout(1):
+                empty = await reader.read()
+                failed = await _request(
+                    server.bound_port, b"GET /fail HTTP/1.1\r\n\r\n"
+                )
+            writer.close()
+        finally:
+            await server.close()
+        return empty, failed
+
+    empty, failed = asyncio.run(run())
+    assert empty == b""
+    # Not mistaken for a request that timed out while being read.
+    assert failed == b""
+
+
+def test_local_http_server_keeps_other_files(tmp_path):
+    """Test a socket path that is not a socket is neither replaced nor deleted."""
+    path = os.path.join(tmp_path, "notes.txt")
+    with open(path, "w") as stream:
+        stream.write("keep")
+    server = LocalHttpServer(path=path)
+    with pytest.raises(OSError, match="Not a socket"):
+        asyncio.run(server.start())
+    with open(path) as stream:
+        assert stream.read() == "keep"
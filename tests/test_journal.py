@@ -0,0 +1,86 @@
+"""Tests for the meeting state journal."""
+
+import os
+
+from teams_connex.journal import RECORD, MeetingJournal
+from teams_connex.meeting import MeetingState
+
+START = 1_700_000_000.0
+
+
+def _state(muted: bool, in_meeting: bool) -> MeetingState:
+    """Return meeting state with the two fields."""
+    return MeetingState.from_message(
+        {
+            "meetingUpdate": {
+                "meetingState": {"isMuted": muted, "isInMeeting": in_meeting}
+            }
+        }
+    )
+
+
+def test_journal_records_transitions_only(tmp_path):
+    """Test unchanged states are not recorded and records are compact."""
+    journal = MeetingJournal(os.path.join(tmp_path, "journal"))
+    journal.append(_state(False, True), START)
+    journal.append(_state(False, True), START + 1)
+    journal.append(_state(True, True), START + 2)
+    journal.reset(START + 3)
+    journal.close()
+    ((_, name),) = journal.segments()
+    assert os.path.getsize(os.path.join(tmp_path, "journal", name)) == 3 * RECORD.size
+    # A new run continues from the last recorded state, which is already unknown.
+    journal = MeetingJournal(os.path.join(tmp_path, "journal"))
+    journal.reset(START + 4)
+    assert [known for _, _, known in journal.records(START, START + 5)] == [
+        _state(False, True).known,
+        _state(True, True).known,
+        0,
+    ]
+
+
+def test_journal_durations(tmp_path):
+    """Test time per field is aggregated over a range, across segments."""
+    journal = MeetingJournal(os.path.join(tmp_path, "journal"), segment_max_records=2)
+    journal.append(_state(False, True), START)
+    journal.append(_state(True, True), START + 60)
+    journal.append(_state(False, True), START + 90)
+    journal.append(_state(False, False), START + 300)
+    journal.reset(START + 400)
+    journal.close()
+    assert len(journal.segments()) == 3  # noqa: PLR2004
+    assert journal.durations(START, START + 1000, now=START + 1000) == {
+        "isMuted": 30.0,
+        "isInMeeting": 300.0,
+    }
+    # The state in effect at the start of the range counts from the start.
+    assert journal.durations(START + 70, START + 100, now=START + 1000) == {
+        "isMuted": 20.0,
+        "isInMeeting": 30.0,
+    }
+    assert journal.durations(START - 100, START, now=START + 1000) == {}
+
+
+def test_journal_retention(tmp_path):
+    """Test the oldest segments are deleted beyond the limit."""
+    journal = MeetingJournal(
+        os.path.join(tmp_path, "journal"), segment_max_records=1, max_segments=2
+    )
+    for index in range(5):
+        journal.append(_state(bool(index % 2), True), START + index)
+    journal.reset(START + 5)
+    journal.close()
+    assert [begin for begin, _ in journal.segments()] == [START + 4, START + 5]
+
+
+def test_journal_continues_latest_segment(tmp_path):
+    """Test a new run appends to the newest segment while it has room left."""
+    directory = os.path.join(tmp_path, "journal")
+    for index in range(4):
+        journal = MeetingJournal(directory, segment_max_records=3)
+        journal.append(_state(bool(index % 2), True), START + index)
+        journal.close(reset=False)
+    assert [begin for begin, _ in journal.segments()] == [START, START + 3]
+    assert [timestamp for timestamp, _, _ in journal.records(START, START + 4)] == [
+        START + index for index in range(4)
+    ]
@@ -0,0 +1,84 @@
+"""Tests for the logging set-up."""
+
+import gzip
+import logging
+import os
+from unittest import mock
+
+from teams_connex.logs import (
+    CompressingRotatingFileHandler,
+    RateLimitFilter,
+    set_up_logging,
+)
+
+
+def _record(message: str, level: int = logging.DEBUG) -> logging.LogRecord:
+    """Return log record with the message template."""
+    return logging.LogRecord("test", level, __file__, 1, message, ("frame",), None)
+
+
+def test_rotating_file_handler_compresses_backups(tmp_path):
+    """Test files are rotated by size and old files are compressed."""
+    logfile = os.path.join(tmp_path, "test.log")
+    handler = CompressingRotatingFileHandler(logfile, max_bytes=100, backup_count=2)
+    for index in range(20):
+        handler.emit(_record(f"message {index:02d} %s " + "x" * 40))
+    handler.close()
+    assert sorted(os.listdir(tmp_path)) == [
+        "test.log",
+        "test.log.1.gz",
+        "test.log.2.gz",
+    ]
+    with gzip.open(f"{logfile}.1.gz", "rt") as backup:
+        assert "message" in backup.read()
+
+
+def test_rotating_file_handler_rotates_by_age(tmp_path):
+    """Test files are rotated once the interval has passed, even if small."""
+    logfile = os.path.join(tmp_path, "test.log")
+    handler = CompressingRotatingFileHandler(logfile, interval=60)
+    handler.emit(_record("first"))
+    with mock.patch("time.time", return_value=handler.rollover_at):
+        handler.emit(_record("second"))
+    handler.close()
+    assert sorted(os.listdir(tmp_path)) == ["test.log", "test.log.1.gz"]
+
+
+@mock.patch("time.monotonic")
+def test_rate_limit_filter(mock_monotonic):
+    """Test repetitive messages are suppressed and counted, warnings never."""
+    mock_monotonic.return_value = 100.0
+    rate_limit = RateLimitFilter(burst=2, period=10.0)
+    assert [rate_limit.filter(_record("Received %s")) for _ in range(4)] == [
+        True,
+        True,
+        False,
+        False,
+    ]
+    assert rate_limit.filter(_record("Other %s"))
+    assert rate_limit.filter(_record("Received %s", logging.WARNING))
+    mock_monotonic.return_value = 110.0
+    record = _record("Received %s")
+    assert rate_limit.filter(record)
+    assert record.getMessage() == "Received frame (2 similar messages suppressed)"
+
+
+def test_set_up_logging(tmp_path):
+    """Test records are written to the file by the background listener."""
+    logfile = os.path.join(tmp_path, "test.log")
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    listener = set_up_logging(logfile)
+    try:
+        logging.getLogger("teams_connex.test").info("Hello %s", "world")
+    finally:
+        listener.stop()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+        for handler in listener.handlers:
+            handler.close()
+    with open(logfile) as stream:
+        assert "INFO:teams_connex.test:test_logs:Hello world" in stream.read()
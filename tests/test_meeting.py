@@ -0,0 +1,233 @@
+"""Tests for meeting update helpers."""
+
+import asyncio
+import time
+
+import pytest
+
+from teams_connex.meeting import MeetingAggregate, MeetingState, MeetingUpdateCoalescer
+
+MEETING_UPDATE = {
+    "meetingUpdate": {
+        "meetingState": {
+            "isMuted": True,
+            "isVideoOn": False,
+            "isHandRaised": False,
+            "isInMeeting": True,
+            "isRecordingOn": False,
+            "isBackgroundBlurred": False,
+            "isSharing": False,
+            "hasUnreadMessages": False,
+        },
+        "meetingPermissions": {
+            "canToggleMute": True,
+            "canToggleVideo": True,
+            "canToggleHand": True,
+            "canToggleBlur": False,
+            "canLeave": True,
+            "canReact": True,
+            "canToggleShareTray": True,
+            "canToggleChat": True,
+            "canStopSharing": False,
+            "canPair": False,
+        },
+    }
+}
+
+
+def test_meeting_state_round_trip():
+    """Test that a full meeting update survives conversion to and from the bitmask."""
+    state = MeetingState.from_message(MEETING_UPDATE)
+    assert state.to_message() == MEETING_UPDATE
+    assert state.get("isMuted")
+    assert not state.get("isVideoOn")
+    assert state == MeetingState.from_message(MEETING_UPDATE)
+    assert MeetingState().get("isMuted") is None
+    with pytest.raises(KeyError):
+        state.get("unknownField")
+
+
+def test_meeting_state_merge_and_changed_fields():
+    """Test merging partial updates and computing field level deltas."""
+    state = MeetingState.from_message(MEETING_UPDATE)
+    unmuted = state.merge(
+        MeetingState.from_message(
+            {"meetingUpdate": {"meetingState": {"isMuted": False, "unknown": True}}}
+        )
+    )
+    changed = unmuted.changed_fields(state)
+    assert unmuted.to_message(changed) == {
+        "meetingUpdate": {"meetingState": {"isMuted": False}}
+    }
+    # Reverting the change results in no delta against the original state.
+    muted_again = unmuted.merge(
+        MeetingState.from_message(
+            {"meetingUpdate": {"meetingState": {"isMuted": True}}}
+        )
+    )
+    assert not muted_again.changed_fields(state)
+    assert muted_again.changed_fields(unmuted)
+    # Fields becoming known count as changed.
+    assert state.changed_fields(MeetingState()) == state.known
+
+
+def test_meeting_update_coalescer_burst():
+    """Test that the rest of a burst is flushed once after the quiet window."""
+    flushed: list[MeetingState] = []
+
+    async def flush(meeting_state: MeetingState):
+        flushed.append(meeting_state)
+
+    async def run():
+        coalescer = MeetingUpdateCoalescer(flush, quiet_window=0.02, max_delay=1.0)
+        await coalescer.submit(
+            MeetingState.from_message(
+                {"meetingUpdate": {"meetingState": {"isMuted": True}}}
+            )
+        )
+        await coalescer.submit(
+            MeetingState.from_message(
+                {"meetingUpdate": {"meetingPermissions": {"canToggleMute": True}}}
+            )
+        )
+        await coalescer.submit(
+            MeetingState.from_message(
+                {"meetingUpdate": {"meetingState": {"isMuted": False}}}
+            )
+        )
+        assert coalescer.pending
+        assert len(flushed) == 1
+        await asyncio.sleep(0.1)
+        assert not coalescer.pending
+        assert coalescer.received == 3  # noqa: PLR2004
+        assert coalescer.flushed == 2  # noqa: PLR2004
+
+    asyncio.run(run())
+    assert [state.to_message() for state in flushed] == [
+        {"meetingUpdate": {"meetingState": {"isMuted": True}}},
+        {
+            "meetingUpdate": {
+                "meetingState": {"isMuted": False},
+                "meetingPermissions": {"canToggleMute": True},
+            }
+        },
+    ]
+
+
+def test_meeting_update_coalescer_isolated():
+    """Test that an isolated update is flushed without waiting for the quiet window."""
+    flushed: list[float] = []
+
+    async def flush(meeting_state: MeetingState):
+        flushed.append(time.monotonic() - meeting_state.received_at)
+
+    async def run():
+        coalescer = MeetingUpdateCoalescer(flush, quiet_window=0.05, max_delay=1.0)
+        for muted in (True, False):
+            await coalescer.submit(MeetingState(int(muted), 1, time.monotonic()))
+            assert not coalescer.pending
+            # Long enough apart not to be a burst.
+            await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert len(flushed) == 2  # noqa: PLR2004
+    assert max(flushed) < 0.02  # noqa: PLR2004
+
+
+def test_meeting_update_coalescer_max_delay():
+    """Test that a continuous stream of updates is flushed after the maximum delay."""
+    flushed: list[MeetingState] = []
+
+    async def flush(meeting_state: MeetingState):
+        flushed.append(meeting_state)
+
+    async def run():
+        coalescer = MeetingUpdateCoalescer(flush, quiet_window=0.05, max_delay=0.1)
+        for index in range(10):
+            await coalescer.submit(
+                MeetingState.from_message(
+                    {"meetingUpdate": {"meetingState": {"isMuted": index % 2 == 0}}}
+                )
+            )
+            await asyncio.sleep(0.02)
+        await coalescer.flush()
+
+    asyncio.run(run())
+    assert len(flushed) >= 2  # noqa: PLR2004
+
+
+def test_meeting_update_coalescer_disabled():
+    """Test that a zero quiet window flushes every update immediately."""
+    flushed: list[MeetingState] = []
+
+    async def flush(meeting_state: MeetingState):
+        flushed.append(meeting_state)
+
+    async def run():
+        coalescer = MeetingUpdateCoalescer(flush, quiet_window=0, max_delay=0)
+        await coalescer.submit(
+            MeetingState.from_message(
+                {"meetingUpdate": {"meetingState": {"isMuted": True}}}
+            )
+        )
+
+    asyncio.run(run())
+    assert [state.to_message() for state in flushed] == [
+        {"meetingUpdate": {"meetingState": {"isMuted": True}}}
+    ]
+
+
+def test_meeting_update_coalescer_received_at():
+    """Test that flushed state carries the receive time of its oldest update."""
+    flushed: list[MeetingState] = []
+
+    async def flush(meeting_state: MeetingState):
+        flushed.append(meeting_state)
+
+    async def run():
+        coalescer = MeetingUpdateCoalescer(flush, quiet_window=0, max_delay=0)
+        for received_at in (1.0, 2.0):
+            await coalescer.submit(MeetingState(1, 1, received_at))
+
+    asyncio.run(run())
+    assert [state.received_at for state in flushed] == [1.0, 2.0]
+    assert MeetingState(1, 1, 1.0) == MeetingState(1, 1, 2.0)
+    assert MeetingState(1, 1, 2.0).merge(MeetingState(0, 1, 1.0)).received_at == 1.0
+    assert MeetingState(1, 1).merge(MeetingState(0, 1)).received_at is None
+
+
+def test_meeting_aggregate():
+    """Test presence from any session, other fields from the session in the meeting."""
+    aggregate = MeetingAggregate()
+    in_meeting = MeetingState.from_message(
+        {"meetingUpdate": {"meetingState": {"isInMeeting": True, "isMuted": False}}}
+    )
+    not_in_meeting = MeetingState.from_message(
+        {"meetingUpdate": {"meetingState": {"isInMeeting": False, "isMuted": True}}}
+    )
+    aggregate.update(MeetingState(), not_in_meeting, "vm")
+    assert aggregate.take().to_message() == {
+        "meetingUpdate": {"meetingState": {"isMuted": True, "isInMeeting": False}}
+    }
+    aggregate.update(MeetingState(), in_meeting, "work")
+    # Muted in the other session, but not in the meeting.
+    assert aggregate.take().to_message() == {
+        "meetingUpdate": {"meetingState": {"isMuted": False, "isInMeeting": True}}
+    }
+    assert aggregate.take().known == 0
+    # Only presence is taken from the session that is not in the meeting.
+    aggregate.update(not_in_meeting, not_in_meeting.merge(MeetingState(0, 1)), "vm")
+    assert aggregate.take().to_message() == {
+        "meetingUpdate": {"meetingState": {"isInMeeting": True}}
+    }
+    aggregate.update(in_meeting, in_meeting.merge(MeetingState(1, 1)), "work")
+    assert aggregate.take().to_message() == {
+        "meetingUpdate": {"meetingState": {"isMuted": True, "isInMeeting": True}}
+    }
+    # Fields of a disconnected session no longer count.
+    aggregate.update(in_meeting.merge(MeetingState(1, 1)), MeetingState(), "work")
+    assert aggregate.state.get("isInMeeting") is False
+    assert aggregate.state.get("isMuted") is False
+    assert aggregate.take(1.0).received_at == 1.0
+    aggregate.update(not_in_meeting.merge(MeetingState(0, 1)), MeetingState(), "vm")
+    assert aggregate.state == MeetingState()
@@ -0,0 +1,55 @@
+"""Tests for metrics."""
+
+import math
+
+from teams_connex.metrics import Histogram, MetricsRegistry
+
+EXPECTED_COUNT = 3
+
+
+def test_histogram_quantiles():
+    """Test observations are counted in the right buckets."""
+    histogram = Histogram(buckets=(0.1, 1.0))
+    assert histogram.quantile(0.5) is None
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5.0)
+    assert histogram.counts == [1, 1, 1]
+    assert histogram.count == EXPECTED_COUNT
+    assert histogram.quantile(0.3) == 0.1  # noqa: PLR2004
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(0.99) == math.inf
+
+
+def test_registry_reuses_metrics():
+    """Test metrics with the same name and labels are shared."""
+    metrics = MetricsRegistry()
+    counter = metrics.counter("sent_total", "Sent", {"sink": "webhook"})
+    counter.inc()
+    metrics.counter("sent_total", "Sent", {"sink": "webhook"}).inc()
+    metrics.counter("sent_total", "Sent", {"sink": "mqtt"}).inc()
+    assert counter.value == 2  # noqa: PLR2004
+    snapshot = metrics.snapshot()
+    assert snapshot['teams_connex_sent_total{sink="webhook"}'] == 2  # noqa: PLR2004
+    assert snapshot['teams_connex_sent_total{sink="mqtt"}'] == 1
+
+
+def test_registry_render():
+    """Test rendering in OpenMetrics text format."""
+    metrics = MetricsRegistry()
+    metrics.counter("frames_received_total", "Frames").inc(EXPECTED_COUNT)
+    metrics.gauge("depth", "Depth", function=lambda: 4)
+    metrics.gauge("unknown", "Not known yet", function=lambda: None)
+    metrics.histogram("send_seconds", "Send", {"sink": "webhook"}).observe(0.002)
+    text = metrics.render()
+    assert "# TYPE teams_connex_frames_received counter\n" in text
+    assert "teams_connex_frames_received_total 3\n" in text
+    assert "teams_connex_depth 4\n" in text
+    assert "\nteams_connex_unknown " not in text
+    assert 'teams_connex_send_seconds_bucket{sink="webhook",le="0.001"} 0\n' in text
+    assert 'teams_connex_send_seconds_bucket{sink="webhook",le="0.0025"} 1\n' in text
+    assert 'teams_connex_send_seconds_bucket{sink="webhook",le="+Inf"} 1\n' in text
+    assert 'teams_connex_send_seconds_count{sink="webhook"} 1\n' in text
+    assert text.endswith("# EOF\n")
+    snapshot = metrics.snapshot()
+    assert snapshot['teams_connex_send_seconds{sink="webhook"}']["p99"] == 0.0025  # noqa: PLR2004
@@ -0,0 +1,76 @@
+"""Tests for the outbound queue."""
+
+import asyncio
+
+import pytest
+
+from teams_connex.meeting import MeetingState
+from teams_connex.outbound import OutboundQueue, OverflowPolicy
+
+
+def test_outbound_queue_drop_oldest():
+    """Test that the oldest item is discarded when the queue is full."""
+
+    async def run():
+        queue = OutboundQueue(maxsize=2, policy=OverflowPolicy.DROP_OLDEST)
+        for item in (1, 2, 3):
+            await queue.put(item)
+        assert queue.depth == queue.maxsize
+        assert queue.dropped == 1
+        assert [await queue.get(), await queue.get()] == [2, 3]
+
+    asyncio.run(run())
+
+
+def test_outbound_queue_coalesce():
+    """Test that a new item is merged into the newest item when the queue is full."""
+
+    async def run():
+        queue = OutboundQueue(
+            maxsize=1, policy=OverflowPolicy.COALESCE, coalesce=MeetingState.merge
+        )
+        await queue.put(
+            MeetingState.from_message(
+                {"meetingUpdate": {"meetingState": {"isMuted": True}}}
+            )
+        )
+        await queue.put(
+            MeetingState.from_message(
+                {"meetingUpdate": {"meetingState": {"isVideoOn": True}}}
+            )
+        )
+        assert queue.coalesced == 1
+        assert (await queue.get()).to_message() == {
+            "meetingUpdate": {"meetingState": {"isMuted": True, "isVideoOn": True}}
+        }
+        assert queue.stats["depth"] == 0
+
+    asyncio.run(run())
+
+
+def test_outbound_queue_block():
+    """Test that producers wait until a consumer has made room."""
+
+    async def run():
+        queue = OutboundQueue(maxsize=1, policy=OverflowPolicy.BLOCK)
+        await queue.put(1)
+        producer = asyncio.create_task(queue.put(2))
+        await asyncio.sleep(0)
+        assert not producer.done()
+        assert await queue.get() == 1
+        await queue.task_done()
+        await producer
+        assert await queue.get() == 2  # noqa: PLR2004
+        await queue.task_done()
+        await asyncio.wait_for(queue.join(), timeout=1)
+        assert queue.max_wait >= queue.last_wait >= 0
+
+    asyncio.run(run())
+
+
+def test_outbound_queue_invalid():
+    """Test invalid queue configuration."""
+    with pytest.raises(ValueError, match="at least 1"):
+        OutboundQueue(maxsize=0)
+    with pytest.raises(ValueError, match="merge function"):
+        OutboundQueue(maxsize=1, policy=OverflowPolicy.COALESCE)
@@ -0,0 +1,285 @@
+"""Tests for the pipeline, end to end against fake Teams and Home Assistant."""
+
+import asyncio
+from http import HTTPStatus
+import json
+import os
+from unittest import mock
+
+import pytest
+
+from benchmarks.fakes import TOKEN, FakeHomeAssistant, FakeTeams, load_trace
+from benchmarks.pipeline import DEFAULT_TRACE
+from teams_connex.configuration import ConfigurationStore
+from teams_connex.pipeline import Pipeline
+from teams_connex.status import ConnectionStatus
+
+FRAME_RATE = 1000
+
+
+def test_pipeline_end_to_end(tmp_path):
+    """Test pairing and delivery of a replayed trace."""
+    trace = load_trace(DEFAULT_TRACE)
+    configuration_file = os.path.join(tmp_path, "teams_connex.yaml")
+
+    async def run():
+        home_assistant = FakeHomeAssistant()
+        await home_assistant.start()
+        teams = FakeTeams(trace, len(trace), rate=FRAME_RATE)
+        await teams.start()
+        with open(configuration_file, "w") as stream:
+            stream.write(
+                "settings:\n"
+                f"  webhook_uri: {home_assistant.uri}\n"
+                "  coalesce_quiet_window: 0\n"
+            )
+        store = ConfigurationStore(configuration_file, write_delay=0)
+        pipeline = Pipeline(store, host=teams.host, port=teams.port)
+        task = asyncio.create_task(pipeline.run())
+        try:
+            async with asyncio.timeout(10):
+                await teams.done.wait()
+                received = pipeline.metrics.counter("frames_received_total", "")
+                while received.value < teams.frames_sent:
+                    await asyncio.sleep(0.01)
+                await pipeline.drain()
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await teams.close()
+            await home_assistant.close()
+        store.flush()
+        return pipeline, home_assistant
+
+    pipeline, home_assistant = asyncio.run(run())
+    assert pipeline.token == TOKEN
+    assert pipeline.websocket_paired
+    assert home_assistant.received
+    # The last update delivered is the last state of the trace.
+    _, last_payload = home_assistant.received[-1]
+    _, last_frame = trace[-1]
+    assert (
+        last_payload["meetingUpdate"]["meetingState"]
+        == (json.loads(last_frame)["meetingUpdate"]["meetingState"])
+    )
+    assert (
+        ConfigurationStore(configuration_file).read()["settings"]["teams_token"]
+        == TOKEN
+    )
+
+
+def test_pipeline_status(tmp_path):
+    """Test that connection state changes are published as status transitions."""
+    store = ConfigurationStore(os.path.join(tmp_path, "teams_connex.yaml"))
+    pipeline = Pipeline(store)
+    pipeline.websocket_connected = True
+    assert pipeline.status_channel.consume() == ConnectionStatus.CONNECTED
+    pipeline.websocket_paired = True
+    # Not ready until a webhook is configured.
+    assert pipeline.status_channel.consume() is None
+    pipeline.webhook_uri = "http://localhost/api/webhook/test"
+    assert pipeline.status_channel.consume() == ConnectionStatus.READY
+    pipeline.websocket_connected = False
+    assert pipeline.status_channel.consume() == ConnectionStatus.DISCONNECTED
+
+
+def test_pipeline_commands(tmp_path):
+    """Test commands are forwarded to Teams and answered through the control socket."""
+    permissions = {"meetingUpdate": {"meetingPermissions": {"canToggleMute": True}}}
+    trace = [(0.0, json.dumps(permissions))]
+    configuration_file = os.path.join(tmp_path, "teams_connex.yaml")
+    control_socket = os.path.join(tmp_path, "control.sock")
+
+    async def command(name: str, headers: str = "Host: localhost\r\n") -> bytes:
+        reader, writer = await asyncio.open_unix_connection(control_socket)
+        writer.write(f"POST /commands/{name} HTTP/1.1\r\n{headers}\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def run():
+        teams = FakeTeams(trace, len(trace))
+        await teams.start()
+        with open(configuration_file, "w") as stream:
+            stream.write(
+                f"settings:\n  teams_token: {TOKEN}\n  control_socket: {control_socket}\n"
+            )
+        pipeline = Pipeline(
+            ConfigurationStore(configuration_file), host=teams.host, port=teams.port
+        )
+        task = asyncio.create_task(pipeline.run())
+        try:
+            async with asyncio.timeout(10):
+                await teams.done.wait()
+                received = pipeline.metrics.counter("frames_received_total", "")
+                while received.value < teams.frames_sent:
+                    await asyncio.sleep(0.01)
+                cross_site = [
+                    await command("leave-call", "Origin: http://example.com\r\n"),
+                    await command("leave-call", "Host: example.com:8000\r\n"),
+                ]
+                toggled = await command("toggle-mute")
+                return teams, toggled, await command("leave-call"), cross_site
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await teams.close()
+
+    teams, toggled, refused, cross_site = asyncio.run(run())
+    for response in cross_site:
+        assert response.startswith(f"HTTP/1.1 {HTTPStatus.FORBIDDEN.value}".encode())
+    assert toggled.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert toggled.endswith(b'{"response": "Success"}')
+    assert refused.startswith(f"HTTP/1.1 {HTTPStatus.CONFLICT.value}".encode())
+    assert [request["action"] for request in teams.requests] == ["toggle-mute"]
+
+
+@pytest.mark.parametrize(
+    "timeouts",
+    [
+        # Detected by the idle watchdog.
+        "  websocket_idle_timeout: 0.05\n  websocket_ping_timeout: 0.05\n",
+        # Detected by the websockets keepalive.
+        "  websocket_ping_interval: 0.05\n  websocket_ping_timeout: 0.05\n",
+    ],
+)
+def test_pipeline_reconnects_stale_connection(tmp_path, timeouts):
+    """Test a connection Teams stopped responding on is replaced and state re-sent."""
+    trace = load_trace(DEFAULT_TRACE)[:1]
+    configuration_file = os.path.join(tmp_path, "teams_connex.yaml")
+
+    async def run():
+        home_assistant = FakeHomeAssistant()
+        await home_assistant.start()
+        teams = FakeTeams(trace, len(trace), hang=True)
+        await teams.start()
+        with open(configuration_file, "w") as stream:
+            stream.write(
+                "settings:\n"
+                f"  teams_token: {TOKEN}\n"
+                f"  webhook_uri: {home_assistant.uri}\n"
+                f"{timeouts}"
+            )
+        pipeline = Pipeline(
+            ConfigurationStore(configuration_file), host=teams.host, port=teams.port
+        )
+        task = asyncio.create_task(pipeline.run())
+        try:
+            async with asyncio.timeout(10):
+                # The unchanged state is pushed again after reconnecting.
+                while len(_meeting_states(home_assistant)) < 2:  # noqa: PLR2004
+                    await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await teams.close()
+            await home_assistant.close()
+        return pipeline, teams, home_assistant
+
+    pipeline, teams, home_assistant = asyncio.run(run())
+    assert pipeline.metrics.snapshot()["teams_connex_stale_connections_total"] >= 1
+    assert teams.connections >= 2  # noqa: PLR2004
+    first, second = _meeting_states(home_assistant)[:2]
+    assert first == second
+
+
+def _meeting_states(home_assistant: FakeHomeAssistant) -> list[dict]:
+    """Return the payloads received that include the meeting state."""
+    return [
+        payload
+        for _, payload in home_assistant.received
+        if "meetingState" in payload["meetingUpdate"]
+    ]
+
+
+def test_pipeline_sessions(tmp_path):
+    """Test several Teams sessions with their own tokens, aggregate and sink routing."""
+    work = {"meetingUpdate": {"meetingState": {"isInMeeting": True, "isMuted": False}}}
+    vm = {"meetingUpdate": {"meetingState": {"isInMeeting": False, "isMuted": True}}}
+    configuration_file = os.path.join(tmp_path, "teams_connex.yaml")
+
+    async def run():
+        home_assistant = FakeHomeAssistant()
+        await home_assistant.start()
+        vm_home_assistant = FakeHomeAssistant()
+        await vm_home_assistant.start()
+        work_teams = FakeTeams([(0.0, json.dumps(work))], 1)
+        await work_teams.start()
+        vm_teams = FakeTeams([(0.0, json.dumps(vm))], 1)
+        await vm_teams.start()
+        with open(configuration_file, "w") as stream:
+            stream.write(
+                "settings:\n"
+                f"  webhook_uri: {home_assistant.uri}\n"
+                "  coalesce_quiet_window: 0\n"
+                "sinks:\n"
+                f"  - {{type: webhook, name: vm, uri: '{vm_home_assistant.uri}'}}\n"
+                "sessions:\n"
+                f"  - {{name: work, host: {work_teams.host}, port: {work_teams.port}}}\n"
+                f"  - {{name: vm, host: {vm_teams.host}, port: {vm_teams.port}, sinks: [vm]}}\n"
+            )
+        store = ConfigurationStore(configuration_file, write_delay=0)
+        pipeline = Pipeline(store)
+        task = asyncio.create_task(pipeline.run())
+        try:
+            async with asyncio.timeout(10):
+                await work_teams.done.wait()
+                await vm_teams.done.wait()
+                received = pipeline.metrics.counter("frames_received_total", "")
+                while received.value < work_teams.frames_sent + vm_teams.frames_sent:
+                    await asyncio.sleep(0.01)
+                await pipeline.drain()
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            for server in (work_teams, vm_teams, home_assistant, vm_home_assistant):
+                await server.close()
+        store.flush()
+        return pipeline, home_assistant, vm_home_assistant
+
+    pipeline, home_assistant, vm_home_assistant = asyncio.run(run())
+    assert [session.name for session in pipeline.sessions] == ["work", "vm"]
+    # Any session in a meeting, muted as in the session that is in the meeting.
+    _, last_payload = home_assistant.received[-1]
+    assert last_payload["meetingUpdate"]["meetingState"] == {
+        "isMuted": False,
+        "isInMeeting": True,
+    }
+    # Routed sinks only receive the state of their session.
+    _, last_payload = vm_home_assistant.received[-1]
+    assert (
+        last_payload["meetingUpdate"]["meetingState"]
+        == vm["meetingUpdate"]["meetingState"]
+    )
+    settings = ConfigurationStore(configuration_file).read()["settings"]
+    assert settings["teams_tokens"] == {"work": TOKEN, "vm": TOKEN}
+    assert "teams_token" not in settings
+
+
+@mock.patch("teams_connex.session.WEBSOCKET_PAIRING_TOKEN_TIMEOUT_IN_SECONDS", 0.1)
+def test_pipeline_pairs_again_after_dismissed_prompt(tmp_path):
+    """Test the pairing request is sent again if no token follows."""
+    trace = load_trace(DEFAULT_TRACE)[:1]
+    configuration_file = os.path.join(tmp_path, "teams_connex.yaml")
+
+    async def run():
+        teams = FakeTeams(trace, len(trace), dismissed_pairings=1)
+        await teams.start()
+        pipeline = Pipeline(
+            ConfigurationStore(configuration_file), host=teams.host, port=teams.port
+        )
+        task = asyncio.create_task(pipeline.run())
+        try:
+            async with asyncio.timeout(10):
+                await teams.done.wait()
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await teams.close()
+        return teams, pipeline
+
+    teams, pipeline = asyncio.run(run())
+    assert teams.pairing_requests == 2  # noqa: PLR2004
+    assert teams.connections == 1
+    assert pipeline.token == TOKEN
@@ -0,0 +1,127 @@
+"""Tests for the reconnect scheduler."""
+
+import asyncio
+import time
+
+from teams_connex.reconnect import ReconnectScheduler
+
+UNUSED_PORT = 9
+
+
+def test_reconnect_backoff():
+    """Test that the delay doubles up to the cap and resets after connecting."""
+
+    async def run():
+        scheduler = ReconnectScheduler(
+            "127.0.0.1", UNUSED_PORT, min_delay=0.01, max_delay=0.03
+        )
+        scheduler.disconnected()
+        delays = []
+        for _ in range(4):
+            delays.append(scheduler.delay)
+            await scheduler.wait()
+        assert delays == [0.01, 0.02, 0.03, 0.03]
+        scheduler.connected()
+        assert scheduler.delay == scheduler.min_delay
+        assert scheduler.reconnects == 1
+        assert scheduler.last_reconnect_duration > 0
+
+    asyncio.run(run())
+
+
+def test_reconnect_clean_close():
+    """Test that a clean close resets the backoff."""
+
+    async def run():
+        scheduler = ReconnectScheduler(
+            "127.0.0.1", UNUSED_PORT, min_delay=0.01, max_delay=1
+        )
+        scheduler.disconnected()
+        await scheduler.wait()
+        assert scheduler.delay > scheduler.min_delay
+        scheduler.disconnected(clean=True)
+        assert scheduler.delay == scheduler.min_delay
+
+    asyncio.run(run())
+
+
+def test_reconnect_wake():
+    """Test that a wake-up ends the wait early without increasing the delay."""
+
+    async def run():
+        scheduler = ReconnectScheduler(
+            "127.0.0.1", UNUSED_PORT, min_delay=10, max_delay=10
+        )
+        asyncio.get_running_loop().call_later(0.01, scheduler.wake)
+        start = time.monotonic()
+        await scheduler.wait()
+        assert time.monotonic() - start < 1
+
+    asyncio.run(run())
+
+
+def test_reconnect_probe():
+    """Test that the port probe ends the wait early once Teams is listening."""
+
+    async def run():
+        server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        scheduler = ReconnectScheduler("127.0.0.1", port, min_delay=10, max_delay=10)
+        scheduler.probe_interval = 0.01
+        assert await scheduler.probe()
+        start = time.monotonic()
+        await scheduler.wait()
+        assert time.monotonic() - start < 1
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_reconnect_wake_threadsafe():
+    """Test that wake-ups from other threads arrive, but not across a connection."""
+
+    async def run():
+        scheduler = ReconnectScheduler(
+            "127.0.0.1", UNUSED_PORT, min_delay=0.2, max_delay=0.2
+        )
+        scheduler.start()
+        # Sent before the first wait.
+        await asyncio.to_thread(scheduler.wake_threadsafe)
+        await asyncio.sleep(0)
+        start = time.monotonic()
+        await scheduler.wait()
+        woken = time.monotonic() - start
+        # Sent while connected, the backoff after the next failure still applies.
+        scheduler.wake()
+        scheduler.connected()
+        scheduler.disconnected()
+        start = time.monotonic()
+        await scheduler.wait()
+        return woken, time.monotonic() - start
+
+    woken, waited = asyncio.run(run())
+    assert woken < 0.1  # noqa: PLR2004
+    assert waited >= 0.1  # noqa: PLR2004
+
+
+def test_reconnect_backoff_while_listening():
+    """Test the delay grows to the cap if Teams is listening but closes with errors."""
+
+    async def run():
+        server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        scheduler = ReconnectScheduler(
+            "127.0.0.1", port, min_delay=0.01, max_delay=0.04
+        )
+        scheduler.probe_interval = 0.001
+        delays = []
+        for _ in range(4):
+            scheduler.disconnected(listening=True)
+            delays.append(scheduler.delay)
+            await scheduler.wait()
+        server.close()
+        await server.wait_closed()
+        return delays
+
+    assert asyncio.run(run()) == [0.01, 0.02, 0.04, 0.04]
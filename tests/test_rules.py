@@ -0,0 +1,123 @@
+"""Tests for delivery rules."""
+
+import asyncio
+
+import pytest
+
+from teams_connex.delivery import Delivery
+from teams_connex.meeting import MEETING_FIELD_NAME_BITS, MeetingState
+from teams_connex.metrics import MetricsRegistry
+from teams_connex.rules import RuleDecision, RuleError, TokenBucket, compile_rules
+from teams_connex.sinks import create_sink
+
+MUTED = MEETING_FIELD_NAME_BITS["isMuted"]
+VIDEO = MEETING_FIELD_NAME_BITS["isVideoOn"]
+REACT = MEETING_FIELD_NAME_BITS["canReact"]
+
+
+def _state(muted: bool, react: bool) -> MeetingState:
+    """Return meeting state with the mute state and reaction permission."""
+    return MeetingState.from_message(
+        {
+            "meetingUpdate": {
+                "meetingState": {"isMuted": muted},
+                "meetingPermissions": {"canReact": react},
+            }
+        }
+    )
+
+
+def test_rules_fields():
+    """Test changes are filtered by included and excluded fields."""
+    rules = compile_rules({"include": ["isMuted", "isVideoOn"]})
+    assert rules.check(MUTED | REACT) == RuleDecision.DELIVER
+    assert rules.check(REACT) == RuleDecision.FILTERED
+    rules = compile_rules({"exclude": "canReact"})
+    assert rules.check(VIDEO) == RuleDecision.DELIVER
+    assert rules.check(REACT) == RuleDecision.FILTERED
+    assert compile_rules({}).check(REACT) == RuleDecision.DELIVER
+
+
+def test_rules_quiet_hours():
+    """Test quiet hours, including windows that wrap around midnight."""
+    rules = compile_rules({"quiet_hours": ["12:00-13:00", "22:30-07:00"]})
+    for minute in (12 * 60, 12 * 60 + 59, 22 * 60 + 30, 0, 6 * 60 + 59):
+        assert rules.quiet(minute)
+        assert rules.check(MUTED, minute=minute) == RuleDecision.QUIET_HOURS
+    for minute in (11 * 60 + 59, 13 * 60, 22 * 60 + 29, 7 * 60):
+        assert not rules.quiet(minute)
+    rules = compile_rules({"quiet_hours": ["00:00-24:00"]})
+    assert all(rules.quiet(minute) for minute in range(24 * 60))
+
+
+def test_rules_rate_limit():
+    """Test the token bucket allows bursts and refills over time."""
+    bucket = TokenBucket(rate=0.5, burst=2)
+    assert bucket.take(100.0)
+    assert bucket.take(100.0)
+    assert not bucket.take(100.0)
+    assert not bucket.take(101.0)
+    assert bucket.take(102.0)
+    # The bucket never holds more than the burst.
+    assert bucket.take(200.0)
+    assert bucket.take(200.0)
+    assert not bucket.take(200.0)
+    rules = compile_rules({"include": ["isMuted"], "rate_limit": 1})
+    assert rules.check(MUTED, now=100.0) == RuleDecision.DELIVER
+    # Filtered changes don't take a token.
+    assert rules.check(REACT, now=100.0) == RuleDecision.FILTERED
+    assert rules.check(MUTED, now=100.5) == RuleDecision.RATE_LIMITED
+    assert rules.check(MUTED, now=101.0) == RuleDecision.DELIVER
+
+
+@pytest.mark.parametrize(
+    "rules",
+    [
+        {"include": ["isMute"]},
+        {"rate_limit": 0},
+        {"rate_limit": "fast"},
+        {"rate_limit": 1, "burst": 0},
+        {"quiet_hours": ["22:00"]},
+        {"quiet_hours": ["22:00-25:00"]},
+        {"quiet_hours": ["22:60-23:00"]},
+        ["isMuted"],
+    ],
+)
+def test_rules_errors(rules):
+    """Test invalid rules are rejected when compiled."""
+    with pytest.raises(RuleError):
+        compile_rules(rules)
+
+
+def test_delivery_rules():
+    """Test filtered state is dropped and rate limited state is deferred."""
+    sent = []
+
+    async def send(meeting_state: MeetingState, changed_fields: int):
+        sent.append(changed_fields)
+
+    sink, _ = create_sink(
+        {
+            "type": "webhook",
+            "uri": "http://localhost/api/webhook/test",
+            "rules": {"exclude": ["canReact"], "rate_limit": 0.001},
+        }
+    )
+    metrics = MetricsRegistry()
+
+    async def run():
+        delivery = Delivery(sink.name, send, metrics=metrics, rules=sink.rules)
+        assert await delivery.deliver(_state(muted=True, react=True))
+        assert await delivery.deliver(_state(muted=True, react=False))
+        assert delivery.pending is None
+        assert not await delivery.deliver(_state(muted=False, react=True))
+        assert delivery.pending == _state(muted=False, react=True)
+        assert not await delivery.recover()
+
+    asyncio.run(run())
+    # Excluded fields are not part of deltas either.
+    assert sent == [MUTED]
+    snapshot = metrics.snapshot()
+    suppressed = "teams_connex_suppressed_total"
+    assert snapshot[f'{suppressed}{{reason="filtered",sink="webhook"}}'] == 1
+    assert snapshot[f'{suppressed}{{reason="rate_limited",sink="webhook"}}'] == 1
@@ -0,0 +1,210 @@
+"""Tests for sinks."""
+
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+from teams_connex.delivery import DeliveryError, RetryPolicy
+from teams_connex.meeting import MeetingState
+from teams_connex.sinks import (
+    FanOut,
+    MqttSink,
+    Sink,
+    UnixSocketSink,
+    WebhookSink,
+    create_sink,
+)
+from teams_connex.webhook import WebhookClient
+
+MUTED = MeetingState.from_message(
+    {"meetingUpdate": {"meetingState": {"isMuted": True}}}
+)
+
+
+class RecordingSink(Sink):
+    """Sink that records meeting states after an optional delay."""
+
+    def __init__(self, name: str, delay: float = 0, timeout: float = 1):
+        """Initialise recording sink."""
+        super().__init__(name, timeout)
+        self.delay = delay
+        self.received: list[MeetingState] = []
+
+    async def send(self, meeting_state: MeetingState, changed_fields: int):
+        """Record meeting state."""
+        await asyncio.sleep(self.delay)
+        self.received.append(meeting_state)
+
+
+def webhook_sink(status_code: int) -> WebhookSink:
+    """Return webhook sink answering every request with the status code."""
+    sink = WebhookSink("webhook", "http://test/hook")
+    sink.client = WebhookClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(status_code))
+    )
+    return sink
+
+
+def test_webhook_sink():
+    """Test webhook responses are mapped to delivery errors."""
+
+    async def run():
+        await webhook_sink(200).send(MUTED, MUTED.known)
+        with pytest.raises(DeliveryError) as error:
+            await webhook_sink(503).send(MUTED, MUTED.known)
+        assert error.value.retryable
+        with pytest.raises(DeliveryError) as error:
+            await webhook_sink(404).send(MUTED, MUTED.known)
+        assert not error.value.retryable
+        assert not WebhookSink("webhook", "").enabled
+
+    asyncio.run(run())
+
+
+def test_sink_timeout():
+    """Test that a slow sink fails with a delivery error."""
+
+    async def run():
+        sink = RecordingSink("slow", delay=1, timeout=0.01)
+        with pytest.raises(DeliveryError, match="Timed out"):
+            await sink.deliver(MUTED, MUTED.known)
+
+    asyncio.run(run())
+
+
+def test_fan_out_isolates_slow_sinks():
+    """Test that a slow sink does not delay delivery to other sinks."""
+    fast = RecordingSink("fast")
+    slow = RecordingSink("slow", delay=0.5)
+
+    async def run():
+        fan_out = FanOut()
+        fan_out.add(fast)
+        fan_out.add(slow, RetryPolicy(attempts=1))
+        with pytest.raises(ValueError, match="Duplicate"):
+            fan_out.add(RecordingSink("fast"))
+        await fan_out.start()
+        await fan_out.publish(MUTED)
+        await asyncio.sleep(0.05)
+        assert fast.received == [MUTED]
+        assert not slow.received
+        await fan_out.close()
+
+    asyncio.run(run())
+
+
+def test_unix_socket_sink(tmp_path):
+    """Test meeting state is broadcast to connected clients."""
+    path = os.path.join(tmp_path, "sink.sock")
+
+    async def run():
+        sink = UnixSocketSink("dashboard", path)
+        await sink.start()
+        await sink.send(MUTED, MUTED.known)
+        # A client connecting late gets the latest state immediately.
+        reader, writer = await asyncio.open_unix_connection(path)
+        line = await asyncio.wait_for(reader.readline(), timeout=1)
+        assert json.loads(line) == MUTED.to_message()
+        await asyncio.sleep(0.01)
+        assert sink.clients == 1
+        await sink.send(MUTED, MUTED.known)
+        line = await asyncio.wait_for(reader.readline(), timeout=1)
+        assert json.loads(line) == MUTED.to_message()
+        writer.close()
+        await sink.close()
+        assert not os.path.exists(path)
+
+    asyncio.run(run())
+
+
+def test_create_sink():
+    """Test sinks are created from configuration."""
+    sink, retry_policy = create_sink(
+        {"type": "webhook", "name": "standby", "uri": "http://b/", "retry_attempts": 5}
+    )
+    assert isinstance(sink, WebhookSink)
+    assert sink.name == "standby"
+    assert retry_policy.attempts == 5  # noqa: PLR2004
+    sink, _ = create_sink({"type": "mqtt", "host": "broker", "send_delta": True})
+    assert isinstance(sink, MqttSink)
+    assert sink.name == "mqtt"
+    assert sink.send_delta
+    sink, _ = create_sink({"type": "unix_socket", "path": "/tmp/test.sock"})  # noqa: S108
+    assert isinstance(sink, UnixSocketSink)
+    with pytest.raises(ValueError, match="Unknown sink type"):
+        create_sink({"type": "carrier_pigeon"})
+    with pytest.raises(KeyError):
+        create_sink({"type": "webhook"})
+
+
+def test_heartbeat_payload():
+    """Test heartbeats carry the complete state and its version."""
+    sink = RecordingSink("recording")
+    sink.send_delta = True
+    assert sink.payload(MUTED, 0) == {
+        **MUTED.to_message(),
+        "heartbeat": {"version": MUTED.version},
+    }
+    assert sink.payload(MUTED, MUTED.known) == MUTED.to_message()
+
+
+def test_fan_out_probe():
+    """Test sinks are probed through the pooled webhook client."""
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.host == "down":
+            raise httpx.ConnectError("Connection refused")
+        return httpx.Response(401)
+
+    async def run():
+        fan_out = FanOut()
+        for name in ("up", "down"):
+            sink = WebhookSink(name, f"http://{name}:8123/api/webhook/test?x=1")
+            sink.client = WebhookClient(transport=httpx.MockTransport(handler))
+            fan_out.add(sink)
+        fan_out.add(RecordingSink("recording"))
+        return await fan_out.probe()
+
+    assert asyncio.run(run()) == {"up": True, "down": False, "recording": True}
+    assert {(request.method, str(request.url)) for request in requests} == {
+        ("HEAD", "http://up:8123/"),
+        ("HEAD", "http://down:8123/"),
+    }
+
+
+def test_unix_socket_sink_replaced(tmp_path):
+    """Test closing a replaced sink keeps the socket of its replacement."""
+    path = os.path.join(tmp_path, "sink.sock")
+
+    async def run():
+        previous = UnixSocketSink("dashboard", path)
+        await previous.start()
+        sink = UnixSocketSink("dashboard", path)
+        await sink.start()
+        await previous.close()
+        assert os.path.exists(path)
+        await sink.send(MUTED, MUTED.known)
+        reader, writer = await asyncio.open_unix_connection(path)
+        line = await asyncio.wait_for(reader.readline(), timeout=1)
+        writer.close()
+        await sink.close()
+        return line
+
+    assert json.loads(asyncio.run(run())) == MUTED.to_message()
+
+
+def test_unix_socket_sink_keeps_other_files(tmp_path):
+    """Test a path that is not a socket is neither replaced nor deleted."""
+    path = os.path.join(tmp_path, "notes.txt")
+    with open(path, "w") as stream:
+        stream.write("keep")
+    sink = UnixSocketSink("dashboard", path)
+    with pytest.raises(OSError, match="Not a socket"):
+        asyncio.run(sink.start())
+    with open(path) as stream:
+        assert stream.read() == "keep"
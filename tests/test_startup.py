@@ -0,0 +1,18 @@
+"""Tests for startup time."""
+
+import pytest
+
+from benchmarks.startup import DEFERRED_MODULES, import_times
+
+# Generous enough for slow CI machines, but fails if the network stack is loaded eagerly.
+STARTUP_IMPORT_BUDGET_IN_SECONDS = 0.5
+
+
+@pytest.mark.parametrize("module", ["teams_connex.daemon", "teams_connex.app"])
+def test_startup_import_budget(module):
+    """Test that startup does not load the network stack and stays within budget."""
+    if module == "teams_connex.app":
+        pytest.importorskip("rumps")
+    times = import_times(module)
+    assert [name for name in DEFERRED_MODULES if name in times] == []
+    assert times[module][1] / 1_000_000 < STARTUP_IMPORT_BUDGET_IN_SECONDS
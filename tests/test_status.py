@@ -0,0 +1,38 @@
+"""Tests for the status handoff to the user interface."""
+
+import threading
+
+from teams_connex.status import ConnectionStatus, StatusChannel
+
+
+def test_status_channel_transitions():
+    """Test that only transitions are published and consumed once."""
+    channel = StatusChannel()
+    assert channel.consume() is None
+    assert not channel.publish(ConnectionStatus.DISCONNECTED)
+    assert channel.publish(ConnectionStatus.CONNECTED)
+    assert not channel.publish(ConnectionStatus.CONNECTED)
+    assert channel.consume() == ConnectionStatus.CONNECTED
+    assert channel.consume() is None
+
+
+def test_status_channel_latest_status_wins():
+    """Test that the consumer only sees the latest of several transitions."""
+    channel = StatusChannel()
+    channel.publish(ConnectionStatus.CONNECTED)
+    channel.publish(ConnectionStatus.READY)
+    channel.publish(ConnectionStatus.CONNECTED)
+    assert channel.consume() == ConnectionStatus.CONNECTED
+    # Back to the status the consumer has already applied, still a transition.
+    channel.publish(ConnectionStatus.DISCONNECTED)
+    channel.publish(ConnectionStatus.CONNECTED)
+    assert channel.consume() == ConnectionStatus.CONNECTED
+
+
+def test_status_channel_publish_from_other_thread():
+    """Test publishing from a different thread."""
+    channel = StatusChannel()
+    thread = threading.Thread(target=channel.publish, args=(ConnectionStatus.READY,))
+    thread.start()
+    thread.join()
+    assert channel.consume() == ConnectionStatus.READY
@@ -0,0 +1,100 @@
+"""Tests for payload templates."""
+
+import itertools
+
+import pytest
+
+from teams_connex.meeting import MEETING_FIELD_NAME_BITS, MeetingState
+from teams_connex.sinks import create_sink
+from teams_connex.templates import TemplateError, compile_template
+
+FIELDS = ("isMuted", "isVideoOn", "isInMeeting")
+
+
+def _state(**fields: bool) -> MeetingState:
+    """Return meeting state with the given meeting fields."""
+    return MeetingState.from_message({"meetingUpdate": {"meetingState": fields}})
+
+
+def test_template_render():
+    """Test selection, renaming, nesting, derived fields and constants."""
+    template = compile_template(
+        {
+            "muted": "isMuted",
+            "busy": "isInMeeting and not isMuted",
+            "call": {"video": "isVideoOn", "hand": "isHandRaised"},
+            "version": 1,
+        }
+    )
+    state = _state(isMuted=False, isVideoOn=True, isInMeeting=True)
+    assert template.render(state) == {
+        "muted": False,
+        "busy": True,
+        # Unknown fields are sent as null.
+        "call": {"video": True, "hand": None},
+        "version": 1,
+    }
+    # Deltas only contain entries that depend on changed fields.
+    assert template.render(state, MEETING_FIELD_NAME_BITS["isVideoOn"]) == {
+        "call": {"video": True},
+        "version": 1,
+    }
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "isMuted or isVideoOn",
+        "not isMuted or isVideoOn",
+        "isMuted and not isVideoOn and isInMeeting",
+        "(isMuted or isVideoOn) and not isInMeeting",
+        "not (isMuted and isVideoOn)",
+        "isMuted and not isMuted",
+        "isMuted or not isMuted",
+        "true and isMuted",
+    ],
+)
+def test_template_expressions(expression):
+    """Test compiled expressions agree with Python for every combination of fields."""
+    template = compile_template({"value": expression})
+    for values in itertools.product((False, True), repeat=len(FIELDS)):
+        fields = dict(zip(FIELDS, values, strict=True))
+        expected = eval(expression.replace("true", "True"), {}, fields)  # noqa: S307
+        assert template.render(_state(**fields)) == {"value": expected}
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        {"value": "isMuted and"},
+        {"value": "(isMuted"},
+        {"value": "isMuted isVideoOn"},
+        {"value": "isUnknown"},
+        {"value": "isMuted == true"},
+        {"value": ["isMuted"]},
+        "isMuted",
+    ],
+)
+def test_template_errors(template):
+    """Test invalid templates are rejected when compiled."""
+    with pytest.raises(TemplateError):
+        compile_template(template)
+
+
+def test_sink_template():
+    """Test sinks shape payloads and heartbeats with their template."""
+    sink, _ = create_sink(
+        {
+            "type": "webhook",
+            "uri": "http://localhost/api/webhook/test",
+            "template": {"muted": "isMuted"},
+        }
+    )
+    state = _state(isMuted=True)
+    assert sink.payload(state, state.known) == {"muted": True}
+    assert sink.payload(state, 0) == {
+        "muted": True,
+        "heartbeat": {"version": state.version},
+    }
+    with pytest.raises(ValueError, match="Unknown field"):
+        create_sink({"type": "webhook", "uri": "", "template": {"x": "isMute"}})
@@ -0,0 +1,37 @@
+"""Tests for the webhook client."""
+
+import asyncio
+import json
+
+import httpx
+
+from teams_connex.webhook import WebhookClient
+
+TIMEOUT = 1.5
+
+
+def test_webhook_client_reuses_connection_pool():
+    """Test that consecutive calls share one client and payloads are sent as JSON."""
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200)
+
+    async def run():
+        webhook_client = WebhookClient(
+            timeout=TIMEOUT, transport=httpx.MockTransport(handler)
+        )
+        client = webhook_client.client
+        assert client.timeout.read == TIMEOUT
+        response = await webhook_client.put("http://test/hook", {"a": 1})
+        assert response.status_code == httpx.codes.OK
+        await webhook_client.put("http://test/hook", {"a": 2})
+        assert webhook_client.client is client
+        await webhook_client.close()
+        assert client.is_closed
+
+    asyncio.run(run())
+    assert [request.method for request in requests] == ["PUT", "PUT"]
+    assert requests[0].headers["Content-Type"] == "application/json"
+    assert json.loads(requests[1].content) == {"a": 2}